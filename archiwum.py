@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Moduł archiwów rocznych bazy danych rachunków
+
+Rachunki zamkniętego roku mogą zostać przeniesione z głównej bazy do
+osobnego pliku obok niej, np. rachunki_2024.db. Archiwum ma ten sam schemat
+tabeli rachunki (te same id i indeksy), własny indeks pełnotekstowy, własne
+snapshoty danych sprzedawcy oraz gotowe agregaty przychodów i klientów. DatabaseManager dołącza archiwa
+przez ATTACH tylko do odczytu i łączy je z główną bazą, więc główna baza
+i VACUUM obejmują tylko bieżące lata, a kopia zapasowa kopiuje archiwum
+ponownie tylko po jego zmianie.
+"""
+
+import os
+import re
+import glob
+import sqlite3
+from typing import Dict, List
+
+# Obiekty głównej bazy, których definicje są kopiowane do archiwum
+TABELE_ARCHIWUM = ('rachunki', 'przychody_miesieczne', 'rachunki_fts', 'sprzedawca_snapshot')
+
+# Agregaty klientów w archiwum - dane klientów (imię, nazwisko) są tylko w głównej bazie
+SCHEMAT_KLIENCI = '''
+    CREATE TABLE IF NOT EXISTS archiwum.klienci (
+        id INTEGER PRIMARY KEY,
+        liczba_rachunkow INTEGER NOT NULL,
+        suma_gr INTEGER NOT NULL,
+        ostatni_rachunek DATE
+    )
+'''
+
+_CREATE = re.compile(r'^CREATE (UNIQUE INDEX|INDEX|TABLE|VIRTUAL TABLE) ("?)(\w+)\2', re.IGNORECASE)
+
+
+def sciezka_archiwum(db_path: str, rok: int) -> str:
+    """
+    Zwraca ścieżkę pliku archiwum roku, np. rachunki.db -> rachunki_2024.db
+
+    Args:
+        db_path: Ścieżka do głównej bazy danych
+        rok: Rok archiwum
+
+    Returns:
+        Ścieżka pliku archiwum obok głównej bazy
+    """
+    rdzen, rozszerzenie = os.path.splitext(db_path)
+    return f"{rdzen}_{rok:04d}{rozszerzenie or '.db'}"
+
+
+def lista_archiwow(db_path: str) -> Dict[int, str]:
+    """
+    Wyszukuje archiwa roczne głównej bazy
+
+    Args:
+        db_path: Ścieżka do głównej bazy danych
+
+    Returns:
+        Słownik rok -> ścieżka pliku archiwum, od najstarszego roku
+    """
+    rdzen, rozszerzenie = os.path.splitext(db_path)
+    wzorzec = f"{glob.escape(rdzen)}_[0-9][0-9][0-9][0-9]{rozszerzenie or '.db'}"
+    archiwa = {}
+    for sciezka in sorted(glob.glob(wzorzec)):
+        archiwa[int(sciezka[len(rdzen) + 1:len(rdzen) + 5])] = sciezka
+    return archiwa
+
+
+def schemat_archiwum(conn: sqlite3.Connection) -> List[str]:
+    """
+    Zwraca polecenia tworzące schemat archiwum dołączonego jako 'archiwum'
+
+    Tabele i indeksy rachunków są kopiowane z definicji w głównej bazie,
+    więc zapytania do archiwum korzystają z tych samych indeksów. Wyzwalacze
+    nie są kopiowane - archiwum zmienia się tylko przez przenies_rok.
+
+    Args:
+        conn: Połączenie z główną bazą
+
+    Returns:
+        Lista poleceń CREATE ... IF NOT EXISTS archiwum.*
+    """
+    znaczniki = ', '.join('?' * len(TABELE_ARCHIWUM))
+    cursor = conn.execute(f'''
+        SELECT sql FROM main.sqlite_master
+        WHERE tbl_name IN ({znaczniki}) AND type IN ('table', 'index') AND sql IS NOT NULL
+        ORDER BY type DESC
+    ''', TABELE_ARCHIWUM)
+
+    polecenia = [_CREATE.sub(r'CREATE \1 IF NOT EXISTS archiwum."\3"', sql, count=1)
+                 for (sql,) in cursor]
+    polecenia.append(SCHEMAT_KLIENCI)
+    return polecenia
+
+
+def kolumny_danych(conn: sqlite3.Connection) -> List[str]:
+    """Zwraca kolumny rachunków z danymi (bez kolumn generowanych)"""
+    return [wiersz[1] for wiersz in conn.execute("PRAGMA main.table_xinfo(rachunki)")
+            if wiersz[6] == 0]
+
+
+def przenies_rok(cursor: sqlite3.Cursor, rok: int) -> int:
+    """
+    Przenosi aktywne rachunki roku z głównej bazy do archiwum
+
+    Wywoływane w otwartej transakcji połączenia, do którego archiwum jest
+    dołączone jako 'archiwum'. Rachunki już obecne w archiwum są
+    nadpisywane, więc przerwane przeniesienie można powtórzyć. Rachunki
+    oznaczone jako usunięte zostają w głównej bazie, żeby można je było
+    przywrócić. Agregaty głównej bazy zmniejszają się przez wyzwalacze
+    usunięcia, a agregaty archiwum są liczone od nowa.
+
+    Args:
+        cursor: Kursor w transakcji połączenia z główną bazą
+        rok: Rok do przeniesienia
+
+    Returns:
+        Liczba przeniesionych rachunków
+    """
+    od, do = f"{rok:04d}-01-01", f"{rok + 1:04d}-01-01"
+    kolumny = kolumny_danych(cursor.connection)
+    pola_snapshotu = [wiersz[1] for wiersz in cursor.execute("PRAGMA main.table_info(sprzedawca_snapshot)")
+                      if wiersz[1] != 'id']
+
+    for sql in schemat_archiwum(cursor.connection):
+        cursor.execute(sql)
+
+    # Snapshoty sprzedawcy mają w archiwum własne id, więc rachunki wskazują je przez skrót
+    cursor.execute(f'''
+        INSERT OR IGNORE INTO archiwum.sprzedawca_snapshot ({', '.join(pola_snapshotu)})
+        SELECT {', '.join(pola_snapshotu)} FROM main.sprzedawca_snapshot
+        WHERE id IN (
+            SELECT sprzedawca_id FROM main.rachunki
+            WHERE deleted_at IS NULL AND data_wystawienia >= ? AND data_wystawienia < ?
+        )
+    ''', (od, do))
+    wyrazenia = {
+        'sprzedawca_id': '''(SELECT a.id FROM archiwum.sprzedawca_snapshot a
+                           JOIN main.sprzedawca_snapshot m ON m.skrot = a.skrot
+                           WHERE m.id = r.sprzedawca_id)''',
+    }
+    cursor.execute(f'''
+        INSERT OR REPLACE INTO archiwum.rachunki ({', '.join(kolumny)})
+        SELECT {', '.join(wyrazenia.get(k, f"r.{k}") for k in kolumny)} FROM main.rachunki r
+        WHERE deleted_at IS NULL AND data_wystawienia >= ? AND data_wystawienia < ?
+    ''', (od, do))
+    liczba = cursor.rowcount
+
+    cursor.execute("DELETE FROM archiwum.przychody_miesieczne")
+    cursor.execute('''
+        INSERT INTO archiwum.przychody_miesieczne (rok, miesiac, liczba, suma_gr, min_gr, max_gr)
+        SELECT rok, miesiac, COUNT(*), SUM(kwota_do_zaplaty_gr),
+               MIN(kwota_do_zaplaty_gr), MAX(kwota_do_zaplaty_gr)
+        FROM archiwum.rachunki
+        WHERE deleted_at IS NULL
+        GROUP BY rok, miesiac
+    ''')
+    cursor.execute("DELETE FROM archiwum.klienci")
+    cursor.execute('''
+        INSERT INTO archiwum.klienci (id, liczba_rachunkow, suma_gr, ostatni_rachunek)
+        SELECT klient_id, COUNT(*), SUM(kwota_do_zaplaty_gr), MAX(data_wystawienia)
+        FROM archiwum.rachunki
+        WHERE deleted_at IS NULL AND klient_id IS NOT NULL
+        GROUP BY klient_id
+    ''')
+    if cursor.execute("SELECT 1 FROM archiwum.sqlite_master WHERE name = 'rachunki_fts'").fetchone():
+        cursor.execute("INSERT INTO archiwum.rachunki_fts(rachunki_fts) VALUES ('rebuild')")
+
+    cursor.execute('''
+        DELETE FROM main.rachunki
+        WHERE deleted_at IS NULL AND data_wystawienia >= ? AND data_wystawienia < ?
+    ''', (od, do))
+    return liczba
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmarki warstwy bazy danych
+
+Użycie:
+    python benchmark_bazy.py polaczenia   - czas pojedynczego wywołania z pulą i bez puli połączeń
+    python benchmark_bazy.py batch        - przepustowość zapisu pojedynczego i zbiorczego
+    python benchmark_bazy.py statystyki   - statystyki ogólne: sześć zapytań i jedno z agregatów
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+import time
+import statistics
+from datetime import date, timedelta
+from database import DatabaseManager
+
+IMIONA = ["Anna", "Jan", "Piotr", "Katarzyna", "Tomasz", "Agnieszka", "Paweł", "Magdalena"]
+NAZWISKA = ["Nowak", "Kowalski", "Wiśniewski", "Wójcik", "Kowalczyk", "Kamiński", "Lewandowski", "Zieliński"]
+USLUGI = ["Naprawa komputera", "Projekt strony internetowej", "Korepetycje z matematyki",
+          "Tłumaczenie dokumentów", "Sesja zdjęciowa", "Konsultacja techniczna"]
+
+SPRZEDAWCA = {
+    'imie': 'Jan',
+    'nazwisko': 'Kowalski',
+    'ulica': 'Testowa',
+    'nr_domu': '1',
+    'kod_pocztowy': '00-001',
+    'miasto': 'Warszawa'
+}
+
+
+class DatabaseManagerBezPuli(DatabaseManager):
+    """Odtwarza wcześniejsze zachowanie - nowe połączenie przy każdym wywołaniu"""
+
+    def _polaczenie(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path)
+
+
+def przykladowy_rachunek(i: int, data_poczatkowa: date = date(2023, 1, 1)) -> dict:
+    """Zwraca dane i-tego syntetycznego rachunku"""
+    data = data_poczatkowa + timedelta(days=i % 1000)
+    kwota = round(50 + (i * 37) % 2000 + (i % 100) / 100, 2)
+    return {
+        'numer_rachunku': f"B{i}/{data.month:02d}/{data.year}",
+        'data_wystawienia': data.isoformat(),
+        'data_wykonania_uslugi': data.isoformat(),
+        'sprzedawca': SPRZEDAWCA,
+        'nabywca': {
+            'imie': IMIONA[i % len(IMIONA)],
+            'nazwisko': NAZWISKA[(i // len(IMIONA)) % len(NAZWISKA)],
+            'ulica': 'Kwiatowa',
+            'nr_domu': str(i % 150 + 1),
+            'kod_pocztowy': '30-001',
+            'miasto': 'Kraków'
+        },
+        'nazwa_uslugi': USLUGI[i % len(USLUGI)],
+        'cena_jednostkowa': kwota,
+        'kwota_do_zaplaty': kwota,
+        'kwota_slownie': 'kwota słownie',
+        'plik_pdf': ''
+    }
+
+
+def wypelnij_baze(db: DatabaseManager, liczba: int) -> None:
+    """Wypełnia bazę syntetycznymi rachunkami"""
+    db.zapisz_domyslnego_sprzedawce(SPRZEDAWCA)
+    db.zapisz_rachunki_batch((przykladowy_rachunek(i) for i in range(liczba)), szybki_zapis=True)
+
+
+def zmierz(funkcja, powtorzenia: int) -> dict:
+    """Mierzy czas wywołań funkcji i zwraca statystyki w mikrosekundach"""
+    czasy = []
+    for _ in range(powtorzenia):
+        start = time.perf_counter()
+        funkcja()
+        czasy.append((time.perf_counter() - start) * 1_000_000)
+    return {
+        'mediana': statistics.median(czasy),
+        'srednia': statistics.mean(czasy)
+    }
+
+
+def benchmark_polaczenia(liczba_rachunkow: int = 2000, powtorzenia: int = 300) -> None:
+    """Porównuje czas wywołań z nowym połączeniem i z pulą połączeń"""
+    print("=== BENCHMARK POŁĄCZEŃ ===")
+
+    with tempfile.TemporaryDirectory() as katalog:
+        db_path = os.path.join(katalog, "benchmark.db")
+        db = DatabaseManager(db_path)
+        wypelnij_baze(db, liczba_rachunkow)
+        db.zamknij()
+
+        wywolania = [
+            ("get_domyslny_sprzedawca", lambda d: d.get_domyslny_sprzedawca()),
+            ("pobierz_ustawienie", lambda d: d.pobierz_ustawienie('admin_password_hash')),
+            ("pobierz_przychody_miesiac", lambda d: d.pobierz_przychody_miesiac(6, 2024)),
+            ("szukaj_rachunki", lambda d: d.szukaj_rachunki('Nowak')),
+        ]
+
+        bez_puli = DatabaseManagerBezPuli(db_path)
+        z_pula = DatabaseManager(db_path)
+
+        print(f"Rachunków w bazie: {liczba_rachunkow}, powtórzeń: {powtorzenia}")
+        print(f"{'Metoda':<28}{'bez puli [µs]':>16}{'z pulą [µs]':>16}{'przyspieszenie':>16}")
+        for nazwa, wywolanie in wywolania:
+            przed = zmierz(lambda: wywolanie(bez_puli), powtorzenia)
+            po = zmierz(lambda: wywolanie(z_pula), powtorzenia)
+            print(f"{nazwa:<28}{przed['mediana']:>16.1f}{po['mediana']:>16.1f}"
+                  f"{przed['mediana'] / po['mediana']:>15.1f}x")
+
+        z_pula.zamknij()
+
+
+def benchmark_batch(liczba_rachunkow: int = 20000, liczba_pojedynczo: int = 2000) -> None:
+    """Porównuje przepustowość zapisz_rachunek i zapisz_rachunki_batch"""
+    print("=== BENCHMARK ZAPISU ZBIORCZEGO ===")
+
+    with tempfile.TemporaryDirectory() as katalog:
+        def nowa_baza(nazwa):
+            return DatabaseManager(os.path.join(katalog, f"{nazwa}.db"))
+
+        wyniki = []
+
+        db = nowa_baza("pojedynczo")
+        start = time.perf_counter()
+        for i in range(liczba_pojedynczo):
+            db.zapisz_rachunek(przykladowy_rachunek(i))
+        wyniki.append(("zapisz_rachunek (pętla)", liczba_pojedynczo, time.perf_counter() - start))
+        db.zamknij()
+
+        for nazwa, szybki_zapis in [("zapisz_rachunki_batch", False),
+                                    ("zapisz_rachunki_batch (synchronous=OFF)", True)]:
+            db = nowa_baza(f"batch_{szybki_zapis}")
+            start = time.perf_counter()
+            db.zapisz_rachunki_batch((przykladowy_rachunek(i) for i in range(liczba_rachunkow)),
+                                     szybki_zapis=szybki_zapis)
+            wyniki.append((nazwa, liczba_rachunkow, time.perf_counter() - start))
+            db.zamknij()
+
+        print(f"{'Metoda':<44}{'rachunków':>12}{'czas [s]':>12}{'wierszy/s':>14}")
+        for nazwa, liczba, czas in wyniki:
+            print(f"{nazwa:<44}{liczba:>12}{czas:>12.2f}{liczba / czas:>14.0f}")
+
+
+def statystyki_szesc_zapytan(db: DatabaseManager) -> dict:
+    """Odtwarza wcześniejsze pobierz_statystyki_ogolne - sześć zapytań po tabeli rachunków"""
+    cursor = db._polaczenie().cursor()
+    wyniki = [cursor.execute(sql).fetchone()[0] for sql in [
+        'SELECT COUNT(*) FROM rachunki',
+        'SELECT SUM(kwota_do_zaplaty_gr) FROM rachunki',
+        'SELECT AVG(kwota_do_zaplaty_gr) FROM rachunki',
+        'SELECT MIN(data_wystawienia) FROM rachunki',
+        'SELECT MAX(data_wystawienia) FROM rachunki',
+        'SELECT COUNT(DISTINCT nabywca_imie || nabywca_nazwisko) FROM rachunki',
+    ]]
+    return {
+        'total_rachunki': wyniki[0],
+        'total_kwota': round(wyniki[1] / 100, 2),
+        'srednia_kwota': round(wyniki[2] / 100, 2),
+        'pierwszy_rachunek': wyniki[3],
+        'ostatni_rachunek': wyniki[4],
+        'unikalni_klienci': wyniki[5]
+    }
+
+
+def benchmark_statystyki(liczba_rachunkow: int = 500000, powtorzenia: int = 20) -> None:
+    """Porównuje statystyki ogólne liczone sześcioma zapytaniami i z agregatów"""
+    print("=== BENCHMARK STATYSTYK OGÓLNYCH ===")
+
+    with tempfile.TemporaryDirectory() as katalog:
+        db = DatabaseManager(os.path.join(katalog, "benchmark.db"))
+        print(f"Wypełnianie bazy ({liczba_rachunkow} rachunków)...")
+        wypelnij_baze(db, liczba_rachunkow)
+
+        assert statystyki_szesc_zapytan(db) == db.pobierz_statystyki_ogolne()
+
+        przed = zmierz(lambda: statystyki_szesc_zapytan(db), powtorzenia)
+        po = zmierz(db.pobierz_statystyki_ogolne, powtorzenia)
+        db.zamknij()
+
+        print(f"{'Metoda':<28}{'mediana [ms]':>16}")
+        print(f"{'sześć zapytań':<28}{przed['mediana'] / 1000:>16.2f}")
+        print(f"{'jedno zapytanie':<28}{po['mediana'] / 1000:>16.3f}")
+        print(f"Przyspieszenie: {przed['mediana'] / po['mediana']:.0f}x")
+
+
+SCENARIUSZE = {
+    'polaczenia': benchmark_polaczenia,
+    'batch': benchmark_batch,
+    'statystyki': benchmark_statystyki,
+}
+
+if __name__ == "__main__":
+    nazwy = sys.argv[1:] or list(SCENARIUSZE)
+    for nazwa in nazwy:
+        if nazwa not in SCENARIUSZE:
+            print(f"Nieznany scenariusz: {nazwa} (dostępne: {', '.join(SCENARIUSZE)})")
+            sys.exit(1)
+        SCENARIUSZE[nazwa]()
+        print()
@@ -14,6 +14,29 @@ APP_FULL_TITLE = get_full_version_string()
 
 # Ustawienia bazy danych
 DATABASE_PATH = "rachunki.db"
+DB_JOURNAL_MODE = "WAL"       # Tryb dziennika SQLite (WAL pozwala czytać podczas zapisu)
+DB_SYNCHRONOUS = "NORMAL"     # Poziom synchronizacji zapisu na dysk (NORMAL jest bezpieczny w trybie WAL)
+DB_BUSY_TIMEOUT_MS = 5000     # Czas oczekiwania na zwolnienie blokady bazy (ms)
+DB_CACHE_SIZE_KB = 8192       # Rozmiar cache stron na połączenie (KiB)
+DB_MMAP_SIZE = 64 * 1024 * 1024  # Rozmiar mapowania pliku bazy w pamięci (bajty, 0 = wyłączone)
+DB_MIGRATION_CHUNK_SIZE = 5000  # Liczba wierszy przetwarzanych w jednej transakcji migracji
+SQLITE_MIN_VERSION = (3, 35, 0)  # Najstarsze obsługiwane SQLite (RETURNING przy numeracji rachunków)
+DB_BATCH_SIZE = 1000  # Liczba rachunków w jednym executemany przy zapisie zbiorczym
+INVOICE_PAGE_SIZE = 100  # Liczba rachunków ładowanych na jedną stronę listy
+
+# Ustawienia kopii zapasowych
+BACKUP_FOLDER = "kopie_zapasowe"  # Katalog na skompresowane kopie bazy
+BACKUP_KEEP = 10  # Liczba najnowszych kopii zachowywanych przy rotacji
+BACKUP_PAGES_PER_STEP = 256  # Liczba stron bazy kopiowanych w jednym kroku kopii online
+BACKUP_STEP_PAUSE = 0.005  # Przerwa między krokami kopii (s), w której aplikacja może pisać do bazy
+
+# Ustawienia konserwacji bazy danych
+MAINTENANCE_ON_CLOSE = True  # PRAGMA optimize i odzyskiwanie wolnych stron przy zamykaniu bazy
+MAINTENANCE_ANALYZE_ROWS = 1000  # ANALYZE po imporcie co najmniej tylu rachunków
+MAINTENANCE_FREELIST_PERCENT = 20  # Odzyskiwanie miejsca, gdy wolne strony przekroczą ten procent pliku
+MAINTENANCE_FREELIST_MIN_PAGES = 256  # ...i gdy jest ich co najmniej tyle (mała baza nie jest odchudzana)
+MAINTENANCE_VACUUM_PAGES = 2000  # Liczba stron zwalnianych jednym PRAGMA incremental_vacuum
+MAINTENANCE_LOG_KEEP = 200  # Liczba wpisów zachowywanych w dzienniku konserwacji
 
 # Ustawienia PDF
 DEFAULT_PDF_FOLDER = ""  # Pozostaw puste dla folderu aplikacji
@@ -46,6 +69,7 @@ VALIDATE_MONTHLY_LIMIT = True  # Czy sprawdzać limit miesięczny
 # Ustawienia eksportu CSV
 CSV_DELIMITER = ","
 CSV_ENCODING = "utf-8"
+CSV_FETCH_SIZE = 1000  # Liczba wierszy pobieranych z bazy naraz podczas eksportu
 
 # Komunikaty
 MESSAGES = {
@@ -61,4 +85,12 @@ MESSAGES = {
 
 # Ustawienia debugowania
 DEBUG_MODE = False
-VERBOSE_LOGGING = False
\ No newline at end of file
+VERBOSE_LOGGING = False
+
+# Diagnostyka zapytań SQL (włączana przez DEBUG_MODE, VERBOSE_LOGGING lub zmienną środowiskową)
+SQL_TRACE_ENV = "RACHUNKI_SQL_TRACE"  # Zmienna środowiskowa włączająca diagnostykę (RACHUNKI_SQL_TRACE=1)
+SQL_SLOW_QUERY_MS = 100  # Zapytania wolniejsze niż ten próg (ms) są zapisywane z planem w dzienniku
+SQL_SLOW_PER_CALL_MAX = 20  # Najwięcej wolnych zapytań zapisywanych z jednego wywołania metody
+SQL_LOG_FILE = "zapytania_sql.log"  # Dziennik wolnych zapytań i statystyk metod
+SQL_LOG_MAX_BYTES = 1024 * 1024  # Rozmiar dziennika, po którym zaczynany jest nowy plik
+SQL_LOG_BACKUPS = 3  # Liczba zachowywanych starszych plików dziennika
\ No newline at end of file
@@ -6,8 +6,79 @@ Moduł odpowiedzialny za zarządzanie bazą danych rachunków
 
 import sqlite3
 import os
+import re
+import json
+import base64
+import itertools
+import threading
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+from urllib.request import pathname2url
+from contextlib import contextmanager
+from typing import List, Dict, Iterable, Optional, Tuple
+import config
+import archiwum
+import konserwacja
+from diagnostyka_sql import DiagnostykaSQL, diagnostyka_wlaczona
+from migracje import wykonaj_migracje, skrot_sprzedawcy, KOLUMNY_FTS, POLA_SPRZEDAWCY
+from walidacja import WalidatorDanych
+from pieniadze import Kwota
+from wiersze import WierszRachunku, WierszUsunietegoRachunku
+
+SQL_ZAPISZ_RACHUNEK = '''
+    INSERT INTO rachunki (
+        numer_rachunku, data_wystawienia, data_wykonania_uslugi, sprzedawca_id,
+        nabywca_imie, nabywca_nazwisko, nabywca_ulica, 
+        nabywca_nr_domu, nabywca_kod_pocztowy, nabywca_miasto,
+        nazwa_uslugi, cena_jednostkowa_gr, kwota_do_zaplaty_gr, kwota_slownie, plik_pdf, klient_id
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# Kolumny list rachunków, w kolejności pól WierszRachunku
+KOLUMNY_LISTY = ', '.join(WierszRachunku.KOLUMNY)
+
+# Kolumny eksportu CSV: klucz -> (nagłówek, wyrażenie SQL); sp to snapshot danych sprzedawcy
+KOLUMNY_CSV = {
+    'numer_rachunku': ('Numer rachunku', 'numer_rachunku'),
+    'data_wystawienia': ('Data wystawienia', 'data_wystawienia'),
+    'data_wykonania_uslugi': ('Data wykonania usługi', 'data_wykonania_uslugi'),
+    'sprzedawca_imie': ('Imię sprzedawcy', 'sp.imie'),
+    'sprzedawca_nazwisko': ('Nazwisko sprzedawcy', 'sp.nazwisko'),
+    'sprzedawca_ulica': ('Ulica sprzedawcy', 'sp.ulica'),
+    'sprzedawca_nr_domu': ('Nr domu sprzedawcy', 'sp.nr_domu'),
+    'sprzedawca_kod_pocztowy': ('Kod pocztowy sprzedawcy', 'sp.kod_pocztowy'),
+    'sprzedawca_miasto': ('Miasto sprzedawcy', 'sp.miasto'),
+    'nabywca_imie': ('Imię nabywcy', 'nabywca_imie'),
+    'nabywca_nazwisko': ('Nazwisko nabywcy', 'nabywca_nazwisko'),
+    'nabywca_ulica': ('Ulica nabywcy', 'nabywca_ulica'),
+    'nabywca_nr_domu': ('Nr domu nabywcy', 'nabywca_nr_domu'),
+    'nabywca_kod_pocztowy': ('Kod pocztowy nabywcy', 'nabywca_kod_pocztowy'),
+    'nabywca_miasto': ('Miasto nabywcy', 'nabywca_miasto'),
+    'nazwa_uslugi': ('Nazwa usługi', 'nazwa_uslugi'),
+    'cena_jednostkowa': ('Cena jednostkowa (PLN)',
+                         "printf('%d.%02d', cena_jednostkowa_gr / 100, cena_jednostkowa_gr % 100)"),
+    'kwota_do_zaplaty': ('Kwota (PLN)',
+                         "printf('%d.%02d', kwota_do_zaplaty_gr / 100, kwota_do_zaplaty_gr % 100)"),
+    'kwota_slownie': ('Kwota słownie', 'kwota_slownie'),
+    'plik_pdf': ('Plik PDF', 'plik_pdf'),
+    'data_utworzenia': ('Data utworzenia', 'data_utworzenia'),
+}
+
+# Wagi kolumn rachunki_fts dla bm25 (kolejność jak w KOLUMNY_FTS)
+WAGI_FTS = {
+    'numer_rachunku': 10.0,
+    'nabywca_imie': 5.0,
+    'nabywca_nazwisko': 5.0,
+    'nabywca_ulica': 1.0,
+    'nabywca_kod_pocztowy': 1.0,
+    'nabywca_miasto': 1.0,
+    'nazwa_uslugi': 2.0,
+    'data_wystawienia': 3.0,
+    'data_wykonania_uslugi': 1.0
+}
+
+# Domyślny limit baz dołączonych do połączenia (SQLITE_LIMIT_ATTACHED) dla Pythona
+# bez Connection.getlimit
+DOMYSLNY_LIMIT_DOLACZONYCH = 10
 
 class DatabaseManager:
     """Klasa zarządzająca bazą danych rachunków"""
@@ -18,13 +89,351 @@ class DatabaseManager:
         
         Args:
             db_path: Ścieżka do pliku bazy danych
+        
+        Raises:
+            RuntimeError: Jeśli Python korzysta ze starszego SQLite niż config.SQLITE_MIN_VERSION
         """
+        if sqlite3.sqlite_version_info < config.SQLITE_MIN_VERSION:
+            raise RuntimeError(
+                f"Wymagane SQLite {'.'.join(map(str, config.SQLITE_MIN_VERSION))} lub nowsze, "
+                f"a Python korzysta z SQLite {sqlite3.sqlite_version}"
+            )
         self.db_path = db_path
+        self._lokalne = threading.local()
+        self._polaczenia = []
+        self._blokada_polaczen = threading.Lock()
+        self._fts = None
+        # Numery tabel tymczasowych z wynikami grup archiwów
+        self._numery_tabel = itertools.count()
+        # Ustawienia i dane sprzedawcy wspólne dla wątków, ważne do zmiany
+        # PRAGMA data_version (zapis z innego połączenia lub procesu)
+        self._pamiec = {}
+        # Liczniki, histogramy czasów metod i dziennik wolnych zapytań (tryb diagnostyczny)
+        self.diagnostyka = None
+        if diagnostyka_wlaczona():
+            self.diagnostyka = DiagnostykaSQL(self._polaczenie)
+            self.diagnostyka.opakuj_metody(self)
         self.init_database()
     
+    def _polaczenie(self) -> sqlite3.Connection:
+        """
+        Zwraca połączenie z bazą przypisane do bieżącego wątku
+        
+        Połączenie jest otwierane przy pierwszym użyciu w danym wątku
+        i pozostaje otwarte aż do wywołania zamknij(), więc kolejne
+        zapytania korzystają z gotowego schematu i ciepłego cache stron.
+        
+        Returns:
+            Połączenie SQLite dla bieżącego wątku
+        """
+        conn = getattr(self._lokalne, 'conn', None)
+        if conn is None:
+            conn = self._otworz_polaczenie()
+            self._lokalne.conn = conn
+            with self._blokada_polaczen:
+                self._polaczenia.append(conn)
+        return conn
+    
+    def _otworz_polaczenie(self) -> sqlite3.Connection:
+        """Otwiera nowe połączenie i ustawia parametry z config.py"""
+        # check_same_thread=False tylko po to, by zamknij() mogło zamknąć
+        # połączenia innych wątków - każdy wątek używa wyłącznie swojego;
+        # uri=True pozwala dołączać archiwa roczne tylko do odczytu (mode=ro)
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=config.DB_BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False,
+            uri=True
+        )
+        conn.execute(f"PRAGMA busy_timeout = {int(config.DB_BUSY_TIMEOUT_MS)}")
+        # Działa tylko dla nowej, pustej bazy (przed pierwszym zapisem, także przed
+        # journal_mode = WAL); starsza baza przechodzi na ten tryb przy pełnym VACUUM
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute(f"PRAGMA journal_mode = {config.DB_JOURNAL_MODE}")
+        conn.execute(f"PRAGMA synchronous = {config.DB_SYNCHRONOUS}")
+        conn.execute(f"PRAGMA cache_size = -{int(config.DB_CACHE_SIZE_KB)}")
+        conn.execute(f"PRAGMA mmap_size = {int(config.DB_MMAP_SIZE)}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        if self.diagnostyka:
+            conn.set_trace_callback(self.diagnostyka.sledz)
+        return conn
+    
+    def zamknij(self) -> None:
+        """
+        Zamyka wszystkie otwarte połączenia z bazą danych
+        
+        Wcześniej na połączeniu bieżącego wątku wykonywana jest konserwacja
+        (PRAGMA optimize i odzyskanie wolnych stron); połączeń innych wątków
+        zamknij() nie używa do zapytań, tylko je zamyka.
+        """
+        with self._blokada_polaczen:
+            wlasne = getattr(self._lokalne, 'conn', None)
+            polaczenia = self._polaczenia
+            self._polaczenia = []
+            self._lokalne = threading.local()
+        
+        if config.MAINTENANCE_ON_CLOSE and wlasne is not None:
+            try:
+                konserwacja.przy_zamknieciu(wlasne)
+            except sqlite3.Error as e:
+                # Konserwacja nie może przeszkodzić w zamknięciu (np. baza zablokowana przez inny proces)
+                konserwacja.log.warning("Pominięto konserwację przy zamykaniu bazy %s: %s", self.db_path, e)
+        
+        for conn in polaczenia:
+            conn.close()
+        
+        if self.diagnostyka:
+            self.diagnostyka.zapisz_podsumowanie()
+    
+    def _pamiec_podreczna(self) -> Dict:
+        """
+        Zwraca pamięć podręczną ustawień, danych sprzedawcy i listy archiwów
+        
+        PRAGMA data_version połączenia zmienia się, gdy bazę zmieni inne
+        połączenie (inny wątek lub proces) - wtedy pamięć jest czyszczona.
+        Zapisy przez ten DatabaseManager aktualizują pamięć od razu.
+        
+        Returns:
+            Słownik wpisów pamięci podręcznej
+        """
+        wersja = self._polaczenie().execute("PRAGMA data_version").fetchone()[0]
+        if getattr(self._lokalne, 'wersja_danych', None) != wersja:
+            self._lokalne.wersja_danych = wersja
+            self._pamiec.clear()
+        return self._pamiec
+    
+    @contextmanager
+    def _transakcja(self, conn: sqlite3.Connection, tryb: str = "IMMEDIATE"):
+        """
+        Otwiera jawną transakcję i zatwierdza ją po wyjściu z bloku
+        
+        Tryb IMMEDIATE od razu zajmuje blokadę zapisu, więc odczyt i zapis
+        wewnątrz bloku nie mogą się przeplatać z innym procesem.
+        
+        Args:
+            conn: Połączenie z bazą danych
+            tryb: Rodzaj transakcji (DEFERRED, IMMEDIATE, EXCLUSIVE)
+            
+        Yields:
+            Kursor połączenia
+        """
+        conn.execute(f"BEGIN {tryb}")
+        try:
+            yield conn.cursor()
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
+            conn.commit()
+    
+    def _archiwa(self) -> Dict[int, str]:
+        """
+        Zwraca archiwa roczne bazy
+        
+        Lista plików archiwów jest w pamięci podręcznej, więc przeniesienie
+        roku przez inne połączenie jest widoczne od razu.
+        
+        Returns:
+            Słownik rok -> ścieżka pliku archiwum, od najstarszego roku
+        """
+        pamiec = self._pamiec_podreczna()
+        if 'archiwa' not in pamiec:
+            pamiec['archiwa'] = archiwum.lista_archiwow(self.db_path)
+        return pamiec['archiwa']
+    
+    @staticmethod
+    def _limit_dolaczonych(conn: sqlite3.Connection) -> int:
+        """Zwraca, ile baz można naraz dołączyć do połączenia (SQLITE_LIMIT_ATTACHED)"""
+        # Connection.getlimit jest dostępne od Pythona 3.11
+        if hasattr(conn, 'getlimit'):
+            return conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+        return DOMYSLNY_LIMIT_DOLACZONYCH
+    
+    def _dolacz_archiwa(self, conn: sqlite3.Connection, lata: List[int]) -> List[str]:
+        """
+        Dołącza archiwa podanych lat i zwraca ich schematy
+        
+        Archiwum jest dołączane (ATTACH, tylko do odczytu) przy pierwszym
+        zapytaniu, które go potrzebuje, i pozostaje dołączone, dopóki nie
+        zabraknie miejsca w limicie dołączonych baz - wtedy najpierw są
+        odłączane archiwa spoza listy.
+        
+        Args:
+            conn: Połączenie bieżącego wątku
+            lata: Lata archiwów (nie więcej niż _limit_dolaczonych)
+        
+        Returns:
+            Lista schematów, np. ['archiwum_2023', 'archiwum_2024']
+        """
+        pliki = self._archiwa()
+        dolaczone = getattr(self._lokalne, 'archiwa', None)
+        if dolaczone is None:
+            dolaczone = self._lokalne.archiwa = set()
+        
+        schematy = [f"archiwum_{rok}" for rok in lata]
+        nowe = [(rok, schemat) for rok, schemat in zip(lata, schematy) if schemat not in dolaczone]
+        nadmiar = len(dolaczone) + len(nowe) - self._limit_dolaczonych(conn)
+        if nadmiar > 0:
+            for schemat in sorted(dolaczone - set(schematy))[:nadmiar]:
+                conn.execute(f"DETACH DATABASE {schemat}")
+                dolaczone.discard(schemat)
+        
+        for rok, schemat in nowe:
+            uri = f"file:{pathname2url(os.path.abspath(pliki[rok]))}?mode=ro"
+            conn.execute(f"ATTACH DATABASE ? AS {schemat}", (uri,))
+            dolaczone.add(schemat)
+        return schematy
+    
+    def _schematy(self, conn: sqlite3.Connection, rok: int) -> List[str]:
+        """
+        Zwraca schematy z rachunkami jednego roku: bazę główną i archiwum roku
+        
+        Args:
+            conn: Połączenie bieżącego wątku
+            rok: Rok danych
+        
+        Returns:
+            Lista schematów, np. ['main', 'archiwum_2023'] lub ['main']
+        """
+        return ['main'] + self._dolacz_archiwa(conn, [rok] if rok in self._archiwa() else [])
+    
+    @contextmanager
+    def _unia_archiwow(self, conn: sqlite3.Connection, zapytanie: str,
+                       parametry: tuple = (), z_glowna: bool = True):
+        """
+        Składa zapytanie wykonywane w bazie głównej i we wszystkich archiwach rocznych
+        
+        Jeśli archiwa mieszczą się w limicie dołączonych baz, wynikiem jest
+        jedno UNION ALL po dołączonych archiwach. Przy większej liczbie lat
+        archiwa są dołączane grupami w limicie, wynik zapytania każdej grupy
+        trafia do tabeli tymczasowej, a UNION ALL łączy bazę główną z tymi
+        tabelami. Tabele tymczasowe są usuwane po wyjściu z bloku, więc
+        wyniki trzeba pobrać wewnątrz niego.
+        
+        Args:
+            conn: Połączenie bieżącego wątku
+            zapytanie: Zapytanie z {s}.tabela w miejscu tabel
+            parametry: Parametry zapytania w jednym schemacie
+            z_glowna: Czy obejmować bazę główną (False - tylko archiwa)
+        
+        Yields:
+            Krotka (złożone zapytanie lub None gdy nie ma archiwów ani bazy głównej,
+            parametry złożonego zapytania)
+        """
+        lata = list(self._archiwa())
+        limit = self._limit_dolaczonych(conn)
+        glowna = ['main'] if z_glowna else []
+        if len(lata) <= limit:
+            schematy = glowna + self._dolacz_archiwa(conn, lata)
+            yield (self._unia(schematy, zapytanie) if schematy else None), tuple(parametry) * len(schematy)
+            return
+        
+        tabele = []
+        try:
+            for poczatek in range(0, len(lata), limit):
+                grupa = self._dolacz_archiwa(conn, lata[poczatek:poczatek + limit])
+                tabela = f"wynik_archiwow_{next(self._numery_tabel)}"
+                conn.execute(f"CREATE TEMP TABLE {tabela} AS {self._unia(grupa, zapytanie)}",
+                             tuple(parametry) * len(grupa))
+                tabele.append(tabela)
+            czesci = [self._unia(glowna, zapytanie)] if glowna else []
+            czesci += [f"SELECT * FROM temp.{tabela}" for tabela in tabele]
+            yield '\n UNION ALL \n'.join(czesci), tuple(parametry) * len(glowna)
+        finally:
+            for tabela in tabele:
+                conn.execute(f"DROP TABLE temp.{tabela}")
+    
+    @staticmethod
+    def _unia(schematy: List[str], zapytanie: str) -> str:
+        """
+        Składa zapytanie wykonywane w każdym schemacie w jedno UNION ALL
+        
+        Args:
+            schematy: Schematy z _schematy()
+            zapytanie: Zapytanie z {s}.tabela w miejscu tabel
+            
+        Returns:
+            Złożone zapytanie (dla samej bazy głównej - pojedyncze zapytanie)
+        """
+        # Tabele głównej bazy zostają bez przedrostka - nazwa bez schematu
+        # wskazuje najpierw bazę główną, a plany zapytań się nie zmieniają
+        return '\n UNION ALL \n'.join(
+            zapytanie.replace('{s}.', '' if s == 'main' else f'{s}.') for s in schematy
+        )
+    
+    def archiwizuj_rok(self, rok: int) -> int:
+        """
+        Przenosi rachunki zamkniętego roku do archiwum rocznego (np. rachunki_2024.db)
+        
+        Po przeniesieniu odczyty (listy, wyszukiwanie, raporty, klienci,
+        statystyki) nadal obejmują rachunki roku, czytając je z archiwum.
+        
+        Args:
+            rok: Rok wcześniejszy niż bieżący
+        
+        Returns:
+            Liczba przeniesionych rachunków
+        
+        Raises:
+            ValueError: Jeśli rok nie jest jeszcze zamknięty
+        """
+        if rok >= datetime.now().year:
+            raise ValueError(f"Rok {rok} nie jest zamknięty - archiwizować można tylko wcześniejsze lata")
+        
+        cursor = self._polaczenie().execute('''
+            SELECT 1 FROM rachunki
+            WHERE deleted_at IS NULL AND data_wystawienia >= ? AND data_wystawienia < ?
+            LIMIT 1
+        ''', (f"{rok:04d}-01-01", f"{rok + 1:04d}-01-01"))
+        if cursor.fetchone() is None:
+            return 0
+        
+        # Osobne połączenie: połączenia wątków mogą mieć to archiwum dołączone
+        # tylko do odczytu, a ich blokada odczytu wstrzymałaby zatwierdzenie.
+        # Zmiana głównej bazy zmienia ich PRAGMA data_version, więc lista
+        # archiwów w pamięci podręcznej zostanie odświeżona.
+        conn = self._otworz_polaczenie()
+        try:
+            conn.execute("ATTACH DATABASE ? AS archiwum", (archiwum.sciezka_archiwum(self.db_path, rok),))
+            # Archiwum jest jednym plikiem bez dziennika WAL - później jest tylko czytane
+            conn.execute("PRAGMA archiwum.journal_mode = DELETE")
+            with self._transakcja(conn) as cursor:
+                liczba = archiwum.przenies_rok(cursor, rok)
+        finally:
+            conn.close()
+        
+        if liczba >= config.MAINTENANCE_ANALYZE_ROWS:
+            konserwacja.analizuj(self._polaczenie())
+        return liczba
+    
+    def konserwuj(self, pelna: bool = False) -> List[Dict]:
+        """
+        Konserwacja bazy na żądanie: odzyskanie wolnych stron i odświeżenie statystyk
+        
+        Args:
+            pelna: Czy wykonać pełne VACUUM (przepisuje cały plik i przełącza
+                starszą bazę na auto_vacuum = INCREMENTAL)
+        
+        Returns:
+            Lista wykonanych kroków ({'krok', 'czas_ms', 'szczegoly'})
+        """
+        return konserwacja.konserwuj(self._polaczenie(), pelna)
+    
+    def historia_konserwacji(self, limit: int = 20) -> List[Dict]:
+        """
+        Pobiera ostatnie kroki konserwacji zapisane w dzienniku
+        
+        Args:
+            limit: Liczba wpisów
+        
+        Returns:
+            Lista kroków od najnowszego ({'data', 'krok', 'czas_ms', 'szczegoly'})
+        """
+        return konserwacja.historia(self._polaczenie(), limit)
+    
     def init_database(self) -> None:
-        """Tworzenie tabel w bazie danych jeśli nie istnieją"""
-        with sqlite3.connect(self.db_path) as conn:
+        """Tworzenie tabel w bazie danych jeśli nie istnieją i migracja schematu"""
+        with self._polaczenie() as conn:
             cursor = conn.cursor()
             
             # Tabela z danymi sprzedawcy (ustawienia domyślne)
@@ -41,7 +450,7 @@ class DatabaseManager:
                 )
             ''')
             
-            # Tabela z rachunkami
+            # Tabela z rachunkami (schemat wyjściowy - kwoty w groszach od migracji 5)
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS rachunki (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -84,7 +493,7 @@ class DatabaseManager:
                 )
             ''')
             
-            # Tabela z usuniętymi rachunkami (soft delete)
+            # Tabela z usuniętymi rachunkami (soft delete; od migracji 6 widok na rachunki z deleted_at)
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS usunięte_rachunki (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -130,51 +539,62 @@ class DatabaseManager:
             ''')
             
             conn.commit()
+            
+            # Indeksy i późniejsze zmiany schematu (PRAGMA user_version)
+            wykonaj_migracje(conn)
     
     def get_domyslny_sprzedawca(self) -> Optional[Dict]:
         """Pobiera dane domyślnego sprzedawcy"""
-        with sqlite3.connect(self.db_path) as conn:
+        pamiec = self._pamiec_podreczna()
+        if 'sprzedawca' not in pamiec:
+            pamiec['sprzedawca'] = self._wczytaj_sprzedawce()
+        sprzedawca = pamiec['sprzedawca']
+        return dict(sprzedawca) if sprzedawca else None
+    
+    def _wczytaj_sprzedawce(self) -> Optional[Dict]:
+        """Odczytuje z bazy najnowsze dane sprzedawcy"""
+        with self._polaczenie() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT imie, nazwisko, ulica, nr_domu, kod_pocztowy, miasto
                 FROM sprzedawca 
-                ORDER BY data_utworzenia DESC 
+                ORDER BY id DESC 
                 LIMIT 1
             ''')
             
             result = cursor.fetchone()
             if result:
-                return {
-                    'imie': result[0],
-                    'nazwisko': result[1],
-                    'ulica': result[2],
-                    'nr_domu': result[3],
-                    'kod_pocztowy': result[4],
-                    'miasto': result[5]
-                }
+                return dict(zip(POLA_SPRZEDAWCY, result))
             return None
     
     def zapisz_domyslnego_sprzedawce(self, dane_sprzedawcy: Dict) -> None:
-        """Zapisuje lub aktualizuje dane domyślnego sprzedawcy"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO sprzedawca (imie, nazwisko, ulica, nr_domu, kod_pocztowy, miasto)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                dane_sprzedawcy['imie'],
-                dane_sprzedawcy['nazwisko'],
-                dane_sprzedawcy['ulica'],
-                dane_sprzedawcy['nr_domu'],
-                dane_sprzedawcy['kod_pocztowy'],
-                dane_sprzedawcy['miasto']
-            ))
-            conn.commit()
+        """
+        Zapisuje lub aktualizuje dane domyślnego sprzedawcy
+        
+        Przechowywany jest tylko najnowszy wpis - rachunki wskazują własny snapshot
+        danych sprzedawcy, więc starsze wpisy są usuwane przy zapisie.
+        """
+        nowe = {pole: dane_sprzedawcy[pole] for pole in POLA_SPRZEDAWCY}
+        if nowe == self.get_domyslny_sprzedawca():
+            return
+        
+        with self._transakcja(self._polaczenie()) as cursor:
+            cursor.execute(f'''
+                INSERT INTO sprzedawca ({', '.join(POLA_SPRZEDAWCY)})
+                VALUES ({', '.join('?' * len(POLA_SPRZEDAWCY))})
+            ''', tuple(nowe.values()))
+            cursor.execute('DELETE FROM sprzedawca WHERE id < ?', (cursor.lastrowid,))
+        
+        self._pamiec['sprzedawca'] = nowe
     
     def generuj_numer_rachunku(self) -> str:
         """
         Generuje unikalny numer rachunku w formacie nr/miesiąc/rok
         
+        Numer jest zużywany od razu - do wystawienia rachunku lepiej użyć
+        zapisz_rachunek_z_numerem, które nadaje numer i zapisuje rachunek
+        w jednej transakcji.
+        
         Returns:
             Numer rachunku jako string
         """
@@ -182,34 +602,130 @@ class DatabaseManager:
         miesiac = teraz.month
         rok = teraz.year
         
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._transakcja(self._polaczenie()) as cursor:
+            nowy_numer = self._nastepny_numer(cursor, miesiac, rok)
             
-            # Sprawdź ostatni numer dla tego miesiąca i roku
+        return f"{nowy_numer}/{miesiac:02d}/{rok}"
+    
+    @staticmethod
+    def _nastepny_numer(cursor: sqlite3.Cursor, miesiac: int, rok: int, ile: int = 1) -> int:
+        """
+        Zwiększa licznik numeracji miesiąca w bieżącej transakcji
+        
+        Args:
+            cursor: Kursor połączenia z otwartą transakcją IMMEDIATE
+            miesiac: Miesiąc numeracji
+            rok: Rok numeracji
+            ile: O ile zwiększyć licznik (rezerwacja bloku numerów)
+            
+        Returns:
+            Ostatni zarezerwowany numer w miesiącu (dla ile=1 - kolejny numer)
+        """
+        # Odczyt i zwiększenie licznika jednym poleceniem
+        cursor.execute('''
+            INSERT INTO numeracja (miesiac, rok, ostatni_numer)
+            VALUES (?, ?, ?)
+            ON CONFLICT (miesiac, rok) DO UPDATE SET ostatni_numer = ostatni_numer + excluded.ostatni_numer
+            RETURNING ostatni_numer
+        ''', (miesiac, rok, ile))
+        return cursor.fetchone()[0]
+    
+    def zarezerwuj_numery(self, ile: int, miesiac: int = None, rok: int = None) -> 'PulaNumerow':
+        """
+        Rezerwuje ciągły blok numerów rachunków jedną aktualizacją licznika
+        
+        Numery są wydawane z pamięci przez zwróconą pulę. Użyta jako
+        context manager pula po wyjściu z bloku (także po błędzie) oddaje
+        niewykorzystaną końcówkę bloku.
+        
+        Args:
+            ile: Liczba numerów do zarezerwowania
+            miesiac: Miesiąc numeracji (domyślnie bieżący)
+            rok: Rok numeracji (domyślnie bieżący)
+            
+        Returns:
+            Pula zarezerwowanych numerów
+        """
+        if ile < 1:
+            raise ValueError("Liczba rezerwowanych numerów musi być dodatnia")
+        
+        teraz = datetime.now()
+        miesiac = miesiac or teraz.month
+        rok = rok or teraz.year
+        
+        with self._transakcja(self._polaczenie()) as cursor:
+            ostatni = self._nastepny_numer(cursor, miesiac, rok, ile)
+        
+        return PulaNumerow(self, miesiac, rok, ostatni - ile + 1, ostatni)
+    
+    def _zwroc_numery(self, miesiac: int, rok: int, ostatni_zarezerwowany: int,
+                      ostatni_uzyty: int) -> bool:
+        """
+        Cofa licznik numeracji do ostatniego użytego numeru bloku
+        
+        Licznik jest cofany tylko wtedy, gdy nikt nie zarezerwował numerów
+        po tym bloku - w przeciwnym razie powstałaby kolizja numerów.
+        
+        Returns:
+            True jeśli niewykorzystane numery zostały zwrócone
+        """
+        with self._transakcja(self._polaczenie()) as cursor:
             cursor.execute('''
-                SELECT ostatni_numer FROM numeracja 
-                WHERE miesiac = ? AND rok = ?
-            ''', (miesiac, rok))
+                UPDATE numeracja 
+                SET ostatni_numer = ? 
+                WHERE miesiac = ? AND rok = ? AND ostatni_numer = ?
+            ''', (ostatni_uzyty, miesiac, rok, ostatni_zarezerwowany))
+            return cursor.rowcount > 0
+    
+    def zapisz_rachunek_z_numerem(self, dane_rachunku: Dict) -> Tuple[int, str]:
+        """
+        Nadaje numer i zapisuje rachunek w jednej transakcji BEGIN IMMEDIATE
+        
+        Numer pochodzi z miesiąca daty wystawienia. Jeśli zapis się nie
+        powiedzie, licznik numeracji jest wycofywany razem z rachunkiem,
+        więc numery nie giną i nie powtarzają się nawet przy kilku
+        instancjach aplikacji pracujących na jednej bazie. Transakcja
+        obejmuje tylko zapytania - plik PDF powstaje po zatwierdzeniu
+        (ustaw_plik_pdf), więc blokada zapisu nie czeka na jego generowanie.
+        
+        Args:
+            dane_rachunku: Słownik z danymi rachunku (bez numeru)
             
-            result = cursor.fetchone()
+        Returns:
+            Krotka (ID rachunku, numer rachunku)
+        """
+        dane = dict(dane_rachunku)
+        if not dane.get('data_wystawienia'):
+            dane['data_wystawienia'] = datetime.now().strftime('%Y-%m-%d')
+        data = datetime.strptime(dane['data_wystawienia'], '%Y-%m-%d')
+        
+        with self._transakcja(self._polaczenie()) as cursor:
+            numer = self._nastepny_numer(cursor, data.month, data.year)
+            dane['numer_rachunku'] = f"{numer}/{data.month:02d}/{data.year}"
             
-            if result:
-                nowy_numer = result[0] + 1
-                cursor.execute('''
-                    UPDATE numeracja 
-                    SET ostatni_numer = ? 
-                    WHERE miesiac = ? AND rok = ?
-                ''', (nowy_numer, miesiac, rok))
-            else:
-                nowy_numer = 1
-                cursor.execute('''
-                    INSERT INTO numeracja (miesiac, rok, ostatni_numer)
-                    VALUES (?, ?, ?)
-                ''', (miesiac, rok, nowy_numer))
+            klient_id = self._klient_id(cursor, dane['nabywca'])
+            sprzedawca_id = self._sprzedawca_id(cursor, dane['sprzedawca'])
+            cursor.execute(SQL_ZAPISZ_RACHUNEK, self._parametry_rachunku(dane, klient_id, sprzedawca_id))
             
-            conn.commit()
+        return cursor.lastrowid, dane['numer_rachunku']
+    
+    def ustaw_plik_pdf(self, rachunek_id: int, sciezka_pdf: Optional[str]) -> bool:
+        """
+        Zapisuje ścieżkę wygenerowanego pliku PDF rachunku
+        
+        Rachunek bez ścieżki (NULL) nie ma jeszcze pliku PDF - jego
+        generowanie po zapisie się nie powiodło.
+        
+        Args:
+            rachunek_id: ID rachunku
+            sciezka_pdf: Ścieżka pliku PDF lub None
             
-        return f"{nowy_numer}/{miesiac:02d}/{rok}"
+        Returns:
+            True jeśli zaktualizowano, False jeśli rachunku nie ma w bieżącej bazie
+        """
+        with self._transakcja(self._polaczenie()) as cursor:
+            cursor.execute("UPDATE rachunki SET plik_pdf = ? WHERE id = ?", (sciezka_pdf, rachunek_id))
+            return cursor.rowcount > 0
     
     def zapisz_rachunek(self, dane_rachunku: Dict) -> int:
         """
@@ -221,70 +737,288 @@ class DatabaseManager:
         Returns:
             ID zapisanego rachunku
         """
-        with sqlite3.connect(self.db_path) as conn:
+        with self._polaczenie() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO rachunki (
-                    numer_rachunku, data_wystawienia, data_wykonania_uslugi,
-                    sprzedawca_imie, sprzedawca_nazwisko, sprzedawca_ulica, 
-                    sprzedawca_nr_domu, sprzedawca_kod_pocztowy, sprzedawca_miasto,
-                    nabywca_imie, nabywca_nazwisko, nabywca_ulica, 
-                    nabywca_nr_domu, nabywca_kod_pocztowy, nabywca_miasto,
-                    nazwa_uslugi, cena_jednostkowa, kwota_do_zaplaty, kwota_slownie, plik_pdf
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                dane_rachunku['numer_rachunku'],
-                dane_rachunku['data_wystawienia'],
-                dane_rachunku['data_wykonania_uslugi'],
-                dane_rachunku['sprzedawca']['imie'],
-                dane_rachunku['sprzedawca']['nazwisko'],
-                dane_rachunku['sprzedawca']['ulica'],
-                dane_rachunku['sprzedawca']['nr_domu'],
-                dane_rachunku['sprzedawca']['kod_pocztowy'],
-                dane_rachunku['sprzedawca']['miasto'],
-                dane_rachunku['nabywca']['imie'],
-                dane_rachunku['nabywca']['nazwisko'],
-                dane_rachunku['nabywca']['ulica'],
-                dane_rachunku['nabywca']['nr_domu'],
-                dane_rachunku['nabywca']['kod_pocztowy'],
-                dane_rachunku['nabywca']['miasto'],
-                dane_rachunku['nazwa_uslugi'],
-                dane_rachunku['cena_jednostkowa'],
-                dane_rachunku['kwota_do_zaplaty'],
-                dane_rachunku['kwota_slownie'],
-                dane_rachunku.get('plik_pdf', '')
-            ))
+            klient_id = self._klient_id(cursor, dane_rachunku['nabywca'])
+            sprzedawca_id = self._sprzedawca_id(cursor, dane_rachunku['sprzedawca'])
+            cursor.execute(SQL_ZAPISZ_RACHUNEK,
+                           self._parametry_rachunku(dane_rachunku, klient_id, sprzedawca_id))
             
             conn.commit()
             return cursor.lastrowid
     
-    def pobierz_wszystkie_rachunki(self) -> List[Dict]:
+    def zapisz_rachunki_batch(self, rachunki: Iterable[Dict], rozmiar_paczki: int = None,
+                              szybki_zapis: bool = False) -> List[Tuple[int, str]]:
+        """
+        Zapisuje wiele rachunków w jednej transakcji (import, migracja danych)
+        
+        Rachunki bez klucza 'numer_rachunku' otrzymują kolejny numer z miesiąca
+        daty wystawienia. Wiersze są wstawiane przez executemany paczkami,
+        więc dane wejściowe mogą być dowolnie długim generatorem.
+        
+        Args:
+            rachunki: Dane rachunków w formacie jak dla zapisz_rachunek
+            rozmiar_paczki: Liczba rachunków w jednym wywołaniu executemany
+            szybki_zapis: Czy na czas zapisu wyłączyć synchronizację z dyskiem
+                (PRAGMA synchronous = OFF) - szybciej, ale awaria systemu w trakcie
+                importu może uszkodzić bazę
+            
+        Returns:
+            Lista (id, numer_rachunku) w kolejności danych wejściowych
+        """
+        if rozmiar_paczki is None:
+            rozmiar_paczki = config.DB_BATCH_SIZE
+        
+        conn = self._polaczenie()
+        if szybki_zapis:
+            poprzedni_synchronous = conn.execute("PRAGMA synchronous").fetchone()[0]
+            conn.execute("PRAGMA synchronous = OFF")
+        
+        wynik = []
+        try:
+            with self._transakcja(conn) as cursor:
+                paczka = []
+                for dane_rachunku in rachunki:
+                    paczka.append(dane_rachunku)
+                    if len(paczka) >= rozmiar_paczki:
+                        wynik.extend(self._wstaw_paczke(cursor, paczka))
+                        paczka = []
+                if paczka:
+                    wynik.extend(self._wstaw_paczke(cursor, paczka))
+        finally:
+            if szybki_zapis:
+                conn.execute(f"PRAGMA synchronous = {poprzedni_synchronous}")
+        
+        # Po dużym imporcie statystyki planisty nie odpowiadają już danym
+        if len(wynik) >= config.MAINTENANCE_ANALYZE_ROWS:
+            konserwacja.analizuj(conn)
+        
+        return wynik
+    
+    def _wstaw_paczke(self, cursor: sqlite3.Cursor, paczka: List[Dict]) -> List[Tuple[int, str]]:
+        """
+        Nadaje brakujące numery i wstawia paczkę rachunków jednym executemany
+        
+        Numery są rezerwowane blokiem - jedna aktualizacja licznika na miesiąc
+        w paczce. Transakcja trzyma blokadę zapisu, a id z AUTOINCREMENT są
+        nadawane kolejno, więc id paczki to ostatnie wstawione id i jego
+        poprzednicy.
+        """
+        dzis = datetime.now().strftime('%Y-%m-%d')
+        paczka = [dict(d, data_wystawienia=d.get('data_wystawienia') or dzis) for d in paczka]
+        
+        # Liczba brakujących numerów w każdym miesiącu paczki
+        bez_numeru = {}
+        for dane in paczka:
+            if not dane.get('numer_rachunku'):
+                okres = tuple(int(x) for x in dane['data_wystawienia'][:7].split('-'))
+                bez_numeru[okres] = bez_numeru.get(okres, 0) + 1
+        
+        kolejne = {}
+        for (rok, miesiac), ile in bez_numeru.items():
+            ostatni = self._nastepny_numer(cursor, miesiac, rok, ile)
+            kolejne[(rok, miesiac)] = iter(range(ostatni - ile + 1, ostatni + 1))
+        
+        for dane in paczka:
+            if not dane.get('numer_rachunku'):
+                rok, miesiac = (int(x) for x in dane['data_wystawienia'][:7].split('-'))
+                dane['numer_rachunku'] = f"{next(kolejne[(rok, miesiac)])}/{miesiac:02d}/{rok}"
+        
+        klienci = {}
+        sprzedawcy = {}
+        cursor.executemany(SQL_ZAPISZ_RACHUNEK, [
+            self._parametry_rachunku(d, self._klient_id(cursor, d['nabywca'], klienci),
+                                     self._sprzedawca_id(cursor, d['sprzedawca'], sprzedawcy))
+            for d in paczka
+        ])
+        ostatnie_id = cursor.execute("SELECT last_insert_rowid()").fetchone()[0]
+        pierwsze_id = ostatnie_id - len(paczka) + 1
+        return [(pierwsze_id + i, d['numer_rachunku']) for i, d in enumerate(paczka)]
+    
+    @staticmethod
+    def _klient_id(cursor: sqlite3.Cursor, nabywca: Dict, pamiec: Dict[str, int] = None) -> int:
+        """
+        Zwraca ID klienta dla danych nabywcy, tworząc klienta przy pierwszym rachunku
+        
+        Args:
+            cursor: Kursor w otwartej transakcji zapisu
+            nabywca: Słownik z danymi nabywcy
+            pamiec: Opcjonalny słownik klucz -> ID, oszczędzający zapytań przy zapisie zbiorczym
+            
+        Returns:
+            ID klienta
+        """
+        klucz = WalidatorDanych.normalizuj_klucz_klienta(nabywca['imie'], nabywca['nazwisko'])
+        if pamiec is not None and klucz in pamiec:
+            return pamiec[klucz]
+        
+        cursor.execute(
+            "INSERT OR IGNORE INTO klienci (klucz, imie, nazwisko) VALUES (?, ?, ?)",
+            (klucz, nabywca['imie'].strip(), nabywca['nazwisko'].strip())
+        )
+        klient_id = cursor.execute("SELECT id FROM klienci WHERE klucz = ?", (klucz,)).fetchone()[0]
+        
+        if pamiec is not None:
+            pamiec[klucz] = klient_id
+        return klient_id
+    
+    @staticmethod
+    def _sprzedawca_id(cursor: sqlite3.Cursor, sprzedawca: Dict, pamiec: Dict[str, int] = None) -> int:
+        """
+        Zwraca ID snapshotu danych sprzedawcy, tworząc go przy pierwszym rachunku z tymi danymi
+        
+        Snapshot jest wskazywany przez skrót treści, więc rachunki wystawione
+        z tymi samymi danymi sprzedawcy dzielą jeden wiersz, a zmiana danych
+        tworzy nowy snapshot i nie zmienia wcześniejszych rachunków.
+        
+        Args:
+            cursor: Kursor w otwartej transakcji zapisu
+            sprzedawca: Słownik z danymi sprzedawcy
+            pamiec: Opcjonalny słownik skrót -> ID, oszczędzający zapytań przy zapisie zbiorczym
+            
+        Returns:
+            ID snapshotu sprzedawcy
+        """
+        pola = tuple(sprzedawca[pole] for pole in POLA_SPRZEDAWCY)
+        skrot = skrot_sprzedawcy(*pola)
+        if pamiec is not None and skrot in pamiec:
+            return pamiec[skrot]
+        
+        cursor.execute(f'''
+            INSERT OR IGNORE INTO sprzedawca_snapshot (skrot, {', '.join(POLA_SPRZEDAWCY)})
+            VALUES (?, {', '.join('?' * len(POLA_SPRZEDAWCY))})
+        ''', (skrot, *pola))
+        sprzedawca_id = cursor.execute(
+            "SELECT id FROM sprzedawca_snapshot WHERE skrot = ?", (skrot,)
+        ).fetchone()[0]
+        
+        if pamiec is not None:
+            pamiec[skrot] = sprzedawca_id
+        return sprzedawca_id
+    
+    @staticmethod
+    def _parametry_rachunku(dane_rachunku: Dict, klient_id: int = None, sprzedawca_id: int = None) -> Tuple:
+        """Zamienia słownik rachunku na parametry SQL_ZAPISZ_RACHUNEK"""
+        return (
+            dane_rachunku['numer_rachunku'],
+            dane_rachunku['data_wystawienia'],
+            dane_rachunku['data_wykonania_uslugi'],
+            sprzedawca_id,
+            dane_rachunku['nabywca']['imie'],
+            dane_rachunku['nabywca']['nazwisko'],
+            dane_rachunku['nabywca']['ulica'],
+            dane_rachunku['nabywca']['nr_domu'],
+            dane_rachunku['nabywca']['kod_pocztowy'],
+            dane_rachunku['nabywca']['miasto'],
+            dane_rachunku['nazwa_uslugi'],
+            Kwota.z_zlotych(dane_rachunku['cena_jednostkowa']).grosze,
+            Kwota.z_zlotych(dane_rachunku['kwota_do_zaplaty']).grosze,
+            dane_rachunku['kwota_slownie'],
+            dane_rachunku.get('plik_pdf', ''),
+            klient_id
+        )
+    
+    def pobierz_wszystkie_rachunki(self) -> List[WierszRachunku]:
         """Pobiera wszystkie rachunki z bazy danych"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._polaczenie() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT id, numer_rachunku, data_wystawienia, 
-                       nabywca_imie, nabywca_nazwisko, kwota_do_zaplaty, plik_pdf
-                FROM rachunki 
-                ORDER BY data_wystawienia DESC
-            ''')
+            cursor.row_factory = WierszRachunku.fabryka
+            with self._unia_archiwow(conn, f'''
+                SELECT {KOLUMNY_LISTY}
+                FROM {{s}}.rachunki 
+                WHERE deleted_at IS NULL
+            ''') as (unia, parametry):
+                cursor.execute(f"{unia} ORDER BY data_wystawienia DESC", parametry)
+                
+                return cursor.fetchall()
+    
+    def pobierz_strone_rachunkow(self, kursor: Optional[str] = None,
+                                 rozmiar_strony: int = None) -> Dict:
+        """
+        Pobiera jedną stronę rachunków, od najnowszych
+        
+        Stronicowanie odbywa się kursorem po (data_wystawienia, id), więc
+        koszt pobrania strony nie zależy od liczby rachunków w bazie.
+        Id rachunków przeniesionych do archiwów są unikalne także między
+        plikami, więc kursor działa tak samo dla połączonej listy.
+        
+        Args:
+            kursor: Token kontynuacji z poprzedniej strony (None - pierwsza strona)
+            rozmiar_strony: Liczba rachunków na stronie (domyślnie z config.py)
             
-            rachunki = []
-            for row in cursor.fetchall():
-                rachunki.append({
-                    'id': row[0],
-                    'numer_rachunku': row[1],
-                    'data_wystawienia': row[2],
-                    'nabywca': f"{row[3]} {row[4]}",
-                    'kwota': row[5],
-                    'plik_pdf': row[6]
-                })
+        Returns:
+            Słownik {'rachunki': List[WierszRachunku], 'kursor': token następnej strony lub None}
+        """
+        if rozmiar_strony is None:
+            rozmiar_strony = config.INVOICE_PAGE_SIZE
+        
+        warunek = "deleted_at IS NULL"
+        parametry = ()
+        if kursor is not None:
+            warunek += " AND (data_wystawienia, id) < (?, ?)"
+            parametry = self._odczytaj_kursor(kursor)
+        
+        with self._polaczenie() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = WierszRachunku.fabryka
             
-            return rachunki
+            # Złożone ORDER BY z LIMIT scala posortowane strony z indeksów
+            # każdej bazy i kończy po pierwszych rozmiar_strony + 1 wierszach;
+            # LIMIT w każdej bazie ogranicza też wyniki grup archiwów
+            # zapisywane w tabelach tymczasowych
+            with self._unia_archiwow(conn, f'''
+                SELECT * FROM (
+                    SELECT {KOLUMNY_LISTY}
+                    FROM {{s}}.rachunki 
+                    WHERE {warunek}
+                    ORDER BY data_wystawienia DESC, id DESC
+                    LIMIT ?
+                )
+            ''', parametry + (rozmiar_strony + 1,)) as (unia, parametry_unii):
+                cursor.execute(f'''
+                    {unia}
+                    ORDER BY data_wystawienia DESC, id DESC
+                    LIMIT ?
+                ''', parametry_unii + (rozmiar_strony + 1,))
+                
+                wiersze = cursor.fetchall()
+        
+        # Dodatkowy wiersz mówi tylko, czy istnieje następna strona
+        nastepny_kursor = None
+        if len(wiersze) > rozmiar_strony:
+            wiersze = wiersze[:rozmiar_strony]
+            ostatni = wiersze[-1]
+            nastepny_kursor = self._utworz_kursor(ostatni.data_wystawienia, ostatni.id)
+        
+        return {'rachunki': wiersze, 'kursor': nastepny_kursor}
     
-    def szukaj_rachunki(self, query: str) -> List[Dict]:
+    @staticmethod
+    def _utworz_kursor(data_wystawienia: str, rachunek_id: int) -> str:
+        """Koduje pozycję ostatniego rachunku strony jako token kontynuacji"""
+        surowy = json.dumps([data_wystawienia, rachunek_id]).encode('utf-8')
+        return base64.urlsafe_b64encode(surowy).decode('ascii')
+    
+    @staticmethod
+    def _odczytaj_kursor(kursor: str) -> Tuple[str, int]:
         """
-        Wyszukuje rachunki po numerze, dacie lub nazwisku nabywcy
+        Dekoduje token kontynuacji
+        
+        Raises:
+            ValueError: Jeśli token jest nieprawidłowy
+        """
+        try:
+            data_wystawienia, rachunek_id = json.loads(base64.urlsafe_b64decode(kursor.encode('ascii')))
+            return str(data_wystawienia), int(rachunek_id)
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Nieprawidłowy kursor strony: {kursor}") from e
+    
+    def szukaj_rachunki(self, query: str) -> List[WierszRachunku]:
+        """
+        Wyszukuje rachunki po numerze, dacie, danych nabywcy lub nazwie usługi
+        
+        Jeśli dostępny jest indeks FTS5, każde słowo zapytania jest
+        dopasowywane jako prefiks, a wyniki są sortowane według trafności.
+        W przeciwnym razie używane jest wyszukiwanie LIKE.
         
         Args:
             query: Fraza do wyszukania
@@ -292,67 +1026,179 @@ class DatabaseManager:
         Returns:
             Lista znalezionych rachunków
         """
-        with sqlite3.connect(self.db_path) as conn:
+        zapytanie_fts = self._zapytanie_fts(query)
+        
+        with self._polaczenie() as conn:
             cursor = conn.cursor()
+            cursor.row_factory = WierszRachunku.fabryka
+            
+            if zapytanie_fts and self._fts_dostepne(conn):
+                # Każde archiwum ma własny indeks FTS; trafność bm25 jest
+                # liczona w obrębie pliku, a wyniki są scalane według niej
+                wagi = ', '.join(str(WAGI_FTS[k]) for k in KOLUMNY_FTS)
+                with self._unia_archiwow(conn, f'''
+                    SELECT {', '.join('r.' + k for k in WierszRachunku.KOLUMNY)},
+                           bm25(rachunki_fts, {wagi}) AS trafnosc
+                    FROM {{s}}.rachunki_fts 
+                    JOIN {{s}}.rachunki r ON r.id = rachunki_fts.rowid
+                    WHERE rachunki_fts MATCH ? AND r.deleted_at IS NULL
+                ''', (zapytanie_fts,)) as (unia, parametry):
+                    cursor.execute(f'''
+                        SELECT {KOLUMNY_LISTY}
+                        FROM ({unia})
+                        ORDER BY trafnosc, data_wystawienia DESC
+                    ''', parametry)
+                    return cursor.fetchall()
             
             # Wyszukiwanie w numerze rachunku, nazwisku nabywcy i dacie
-            cursor.execute('''
-                SELECT id, numer_rachunku, data_wystawienia, 
-                       nabywca_imie, nabywca_nazwisko, kwota_do_zaplaty, plik_pdf
-                FROM rachunki 
-                WHERE numer_rachunku LIKE ? 
+            with self._unia_archiwow(conn, f'''
+                SELECT {KOLUMNY_LISTY}
+                FROM {{s}}.rachunki 
+                WHERE deleted_at IS NULL
+                  AND (numer_rachunku LIKE ? 
                    OR nabywca_imie LIKE ? 
                    OR nabywca_nazwisko LIKE ?
-                   OR data_wystawienia LIKE ?
-                ORDER BY data_wystawienia DESC
-            ''', (f'%{query}%', f'%{query}%', f'%{query}%', f'%{query}%'))
-            
-            rachunki = []
-            for row in cursor.fetchall():
-                rachunki.append({
-                    'id': row[0],
-                    'numer_rachunku': row[1],
-                    'data_wystawienia': row[2],
-                    'nabywca': f"{row[3]} {row[4]}",
-                    'kwota': row[5],
-                    'plik_pdf': row[6]
-                })
+                   OR data_wystawienia LIKE ?)
+            ''', (f'%{query}%',) * 4) as (unia, parametry):
+                cursor.execute(f"{unia} ORDER BY data_wystawienia DESC", parametry)
+                return cursor.fetchall()
+    
+    def _fts_dostepne(self, conn: sqlite3.Connection) -> bool:
+        """Sprawdza czy baza ma indeks pełnotekstowy rachunków"""
+        if self._fts is None:
+            cursor = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'rachunki_fts'"
+            )
+            self._fts = cursor.fetchone() is not None
+        return self._fts
+    
+    @staticmethod
+    def _zapytanie_fts(query: str) -> Optional[str]:
+        """
+        Buduje zapytanie FTS5 z frazy wpisanej przez użytkownika
+        
+        Każde słowo staje się frazą z dopasowaniem prefiksu na ostatnim
+        tokenie, np. "Now 08/2025" -> "now"* "08 2025"*
+        
+        Args:
+            query: Fraza do wyszukania
             
-            return rachunki
+        Returns:
+            Zapytanie MATCH lub None jeśli fraza nie zawiera słów
+        """
+        frazy = []
+        for slowo in query.split():
+            tokeny = re.findall(r'\w+', slowo)
+            if tokeny:
+                frazy.append('"' + ' '.join(tokeny) + '"*')
+        return ' '.join(frazy) or None
     
     def pobierz_rachunek_szczegoly(self, rachunek_id: int) -> Optional[Dict]:
-        """Pobiera szczegółowe dane rachunku"""
-        with sqlite3.connect(self.db_path) as conn:
+        """Pobiera szczegółowe dane rachunku (także z archiwów rocznych)"""
+        # Dane sprzedawcy ze snapshotu, pod dawnymi nazwami kolumn sprzedawca_*
+        zapytanie = f'''
+            SELECT rachunki.*, {', '.join(f"sp.{pole} AS sprzedawca_{pole}" for pole in POLA_SPRZEDAWCY)}
+            FROM {{s}}.rachunki
+            LEFT JOIN {{s}}.sprzedawca_snapshot sp ON sp.id = rachunki.sprzedawca_id
+            WHERE rachunki.id = ?
+        '''
+        with self._polaczenie() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT * FROM rachunki WHERE id = ?', (rachunek_id,))
+            cursor.execute(self._unia(['main'], zapytanie), (rachunek_id,))
             
             result = cursor.fetchone()
+            if not result:
+                # Rachunku nie ma w głównej bazie - może być w archiwum rocznym
+                for rok in self._archiwa():
+                    schemat, = self._dolacz_archiwa(conn, [rok])
+                    cursor.execute(self._unia([schemat], zapytanie), (rachunek_id,))
+                    result = cursor.fetchone()
+                    if result:
+                        break
             if not result:
                 return None
             
             columns = [desc[0] for desc in cursor.description]
-            return dict(zip(columns, result))
+            szczegoly = dict(zip(columns, result))
+            
+            # Kwoty zwracane w złotych, jak przed przejściem na grosze
+            szczegoly['cena_jednostkowa'] = szczegoly.pop('cena_jednostkowa_gr') / 100
+            szczegoly['kwota_do_zaplaty'] = szczegoly.pop('kwota_do_zaplaty_gr') / 100
+            return szczegoly
     
-    def eksportuj_do_csv(self, sciezka_pliku: str) -> None:
-        """Eksportuje wszystkie rachunki do pliku CSV"""
-        import csv
+    def eksportuj_do_csv(self, sciezka_pliku: str, kolumny: List[str] = None,
+                         data_od: str = None, data_do: str = None,
+                         kompresja: bool = None) -> int:
+        """
+        Eksportuje rachunki do pliku CSV
         
-        rachunki = self.pobierz_wszystkie_rachunki()
+        Wiersze są pobierane z kursora paczkami (fetchmany) i od razu
+        zapisywane do pliku, więc zużycie pamięci nie zależy od liczby
+        rachunków.
         
-        with open(sciezka_pliku, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = ['Numer rachunku', 'Data wystawienia', 'Nabywca', 'Kwota (PLN)']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        Args:
+            sciezka_pliku: Ścieżka do pliku CSV
+            kolumny: Klucze z KOLUMNY_CSV do eksportu (domyślnie wszystkie)
+            data_od: Najwcześniejsza data wystawienia YYYY-MM-DD (włącznie)
+            data_do: Najpóźniejsza data wystawienia YYYY-MM-DD (włącznie)
+            kompresja: Czy kompresować plik gzipem (domyślnie gdy ścieżka kończy się na .gz)
             
-            writer.writeheader()
-            for rachunek in rachunki:
-                writer.writerow({
-                    'Numer rachunku': rachunek['numer_rachunku'],
-                    'Data wystawienia': rachunek['data_wystawienia'],
-                    'Nabywca': rachunek['nabywca'],
-                    'Kwota (PLN)': f"{rachunek['kwota']:.2f}"
-                })
+        Returns:
+            Liczba wyeksportowanych rachunków
+        """
+        import csv
+        import gzip
+        
+        if kolumny is None:
+            kolumny = list(KOLUMNY_CSV)
+        nieznane = [k for k in kolumny if k not in KOLUMNY_CSV]
+        if nieznane:
+            raise ValueError(f"Nieznane kolumny eksportu: {', '.join(nieznane)}")
+        if kompresja is None:
+            kompresja = sciezka_pliku.lower().endswith('.gz')
+        
+        warunki = ["deleted_at IS NULL"]
+        parametry = []
+        if data_od:
+            warunki.append("data_wystawienia >= ?")
+            parametry.append(data_od)
+        if data_do:
+            warunki.append("data_wystawienia <= ?")
+            parametry.append(data_do)
+        where = f"WHERE {' AND '.join(warunki)}"
+        
+        wyrazenia = ', '.join(f"{KOLUMNY_CSV[k][1]} AS {k}" for k in kolumny)
+        otworz = gzip.open if kompresja else open
+        liczba = 0
+        
+        with self._polaczenie() as conn:
+            cursor = conn.cursor()
+            with self._unia_archiwow(conn, f'''
+                SELECT {wyrazenia}, data_wystawienia AS _data, {{s}}.rachunki.id AS _id
+                FROM {{s}}.rachunki 
+                LEFT JOIN {{s}}.sprzedawca_snapshot sp ON sp.id = sprzedawca_id
+                {where}
+            ''', tuple(parametry)) as (unia, parametry_unii):
+                cursor.execute(f'''
+                    SELECT {', '.join(kolumny)}
+                    FROM ({unia})
+                    ORDER BY _data DESC, _id DESC
+                ''', parametry_unii)
+                
+                with otworz(sciezka_pliku, 'wt', newline='', encoding=config.CSV_ENCODING) as csvfile:
+                    writer = csv.writer(csvfile, delimiter=config.CSV_DELIMITER)
+                    writer.writerow([KOLUMNY_CSV[k][0] for k in kolumny])
+                    
+                    while True:
+                        wiersze = cursor.fetchmany(config.CSV_FETCH_SIZE)
+                        if not wiersze:
+                            break
+                        writer.writerows(wiersze)
+                        liczba += len(wiersze)
+        
+        return liczba
     
-    def pobierz_przychody_miesiac(self, miesiac: int, rok: int) -> float:
+    def pobierz_przychody_miesiac(self, miesiac: int, rok: int) -> Kwota:
         """
         Pobiera sumę przychodów dla danego miesiąca i roku
         
@@ -361,31 +1207,31 @@ class DatabaseManager:
             rok: Rok
             
         Returns:
-            Suma przychodów w PLN
+            Suma przychodów (dokładna, w groszach)
         """
-        with sqlite3.connect(self.db_path) as conn:
+        with self._polaczenie() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT COALESCE(SUM(kwota_do_zaplaty), 0) 
-                FROM rachunki 
-                WHERE strftime('%m', data_wystawienia) = ? 
-                AND strftime('%Y', data_wystawienia) = ?
-            ''', (f"{miesiac:02d}", str(rok)))
+            schematy = self._schematy(conn, rok)
+            unia = self._unia(schematy, '''
+                SELECT suma_gr FROM {s}.przychody_miesieczne 
+                WHERE rok = ? AND miesiac = ?
+            ''')
+            cursor.execute(f"SELECT SUM(suma_gr) FROM ({unia})", (rok, miesiac) * len(schematy))
             
-            result = cursor.fetchone()
-            return result[0] if result else 0.0
+            result = cursor.fetchone()[0]
+            return Kwota(result or 0)
     
-    def pobierz_przychody_biezacy_miesiac(self) -> float:
+    def pobierz_przychody_biezacy_miesiac(self) -> Kwota:
         """
         Pobiera sumę przychodów dla bieżącego miesiąca
         
         Returns:
-            Suma przychodów w PLN
+            Suma przychodów (dokładna, w groszach)
         """
         teraz = datetime.now()
         return self.pobierz_przychody_miesiac(teraz.month, teraz.year)
     
-    def pobierz_rachunki_miesiac(self, miesiac: int, rok: int) -> List[Dict]:
+    def pobierz_rachunki_miesiac(self, miesiac: int, rok: int) -> List[WierszRachunku]:
         """
         Pobiera wszystkie rachunki dla danego miesiąca i roku
         
@@ -396,29 +1242,24 @@ class DatabaseManager:
         Returns:
             Lista rachunków
         """
-        with sqlite3.connect(self.db_path) as conn:
+        # Przedział [początek miesiąca, początek następnego) czyta tylko rachunki
+        # miesiąca z indeksu dat, już w kolejności sortowania
+        od = f"{rok:04d}-{miesiac:02d}-01"
+        do = f"{rok + miesiac // 12:04d}-{miesiac % 12 + 1:02d}-01"
+        
+        with self._polaczenie() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT id, numer_rachunku, data_wystawienia, 
-                       nabywca_imie, nabywca_nazwisko, kwota_do_zaplaty, plik_pdf
-                FROM rachunki 
-                WHERE strftime('%m', data_wystawienia) = ? 
-                AND strftime('%Y', data_wystawienia) = ?
-                ORDER BY data_wystawienia DESC
-            ''', (f"{miesiac:02d}", str(rok)))
-            
-            rachunki = []
-            for row in cursor.fetchall():
-                rachunki.append({
-                    'id': row[0],
-                    'numer_rachunku': row[1],
-                    'data_wystawienia': row[2],
-                    'nabywca': f"{row[3]} {row[4]}",
-                    'kwota': row[5],
-                    'plik_pdf': row[6]
-                })
+            cursor.row_factory = WierszRachunku.fabryka
+            schematy = self._schematy(conn, rok)
+            unia = self._unia(schematy, f'''
+                SELECT {KOLUMNY_LISTY}
+                FROM {{s}}.rachunki 
+                WHERE deleted_at IS NULL
+                AND data_wystawienia >= ? AND data_wystawienia < ?
+            ''')
+            cursor.execute(f"{unia} ORDER BY data_wystawienia DESC", (od, do) * len(schematy))
             
-            return rachunki
+            return cursor.fetchall()
     
     def pobierz_raport_miesięczny(self, rok: int = None) -> List[Dict]:
         """
@@ -428,26 +1269,28 @@ class DatabaseManager:
             rok: Rok do analizy (domyślnie bieżący)
             
         Returns:
-            Lista z podsumowaniem dla każdego miesiąca
+            Lista z podsumowaniem dla każdego miesiąca (suma, minimum
+            i maksimum jako Kwota)
         """
         if rok is None:
             rok = datetime.now().year
             
-        with sqlite3.connect(self.db_path) as conn:
+        with self._polaczenie() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT 
-                    strftime('%m', data_wystawienia) as miesiac,
-                    COUNT(*) as liczba_rachunkow,
-                    SUM(kwota_do_zaplaty) as suma_kwot,
-                    AVG(kwota_do_zaplaty) as srednia_kwota,
-                    MIN(kwota_do_zaplaty) as min_kwota,
-                    MAX(kwota_do_zaplaty) as max_kwota
-                FROM rachunki 
-                WHERE strftime('%Y', data_wystawienia) = ?
-                GROUP BY strftime('%m', data_wystawienia)
+            schematy = self._schematy(conn, rok)
+            # Miesiąc może mieć wiersze w głównej bazie i w archiwum roku
+            # (rachunek dopisany lub przywrócony po archiwizacji)
+            unia = self._unia(schematy, '''
+                SELECT miesiac, liczba, suma_gr, min_gr, max_gr
+                FROM {s}.przychody_miesieczne 
+                WHERE rok = ?
+            ''')
+            cursor.execute(f'''
+                SELECT miesiac, SUM(liczba), SUM(suma_gr), MIN(min_gr), MAX(max_gr)
+                FROM ({unia})
+                GROUP BY miesiac
                 ORDER BY miesiac
-            ''', (str(rok),))
+            ''', (rok,) * len(schematy))
             
             miesiace = []
             nazwa_miesiecy = [
@@ -455,17 +1298,16 @@ class DatabaseManager:
                 "Lipiec", "Sierpień", "Wrzesień", "Październik", "Listopad", "Grudzień"
             ]
             
-            for row in cursor.fetchall():
-                miesiac_nr = int(row[0])
+            for miesiac_nr, liczba, suma_gr, min_gr, max_gr in cursor.fetchall():
                 miesiace.append({
                     'miesiac_nr': miesiac_nr,
                     'miesiac_nazwa': nazwa_miesiecy[miesiac_nr - 1],
                     'rok': rok,
-                    'liczba_rachunkow': row[1],
-                    'suma_kwot': round(row[2], 2),
-                    'srednia_kwota': round(row[3], 2),
-                    'min_kwota': round(row[4], 2),
-                    'max_kwota': round(row[5], 2)
+                    'liczba_rachunkow': liczba,
+                    'suma_kwot': Kwota(suma_gr),
+                    'srednia_kwota': round(suma_gr / liczba / 100, 2),
+                    'min_kwota': Kwota(min_gr),
+                    'max_kwota': Kwota(max_gr)
                 })
             
             return miesiace
@@ -475,32 +1317,37 @@ class DatabaseManager:
         Pobiera raport roczny dla wszystkich lat
         
         Returns:
-            Lista z podsumowaniem dla każdego roku
+            Lista z podsumowaniem dla każdego roku (suma, minimum
+            i maksimum jako Kwota)
         """
-        with sqlite3.connect(self.db_path) as conn:
+        with self._polaczenie() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT 
-                    strftime('%Y', data_wystawienia) as rok,
-                    COUNT(*) as liczba_rachunkow,
-                    SUM(kwota_do_zaplaty) as suma_kwot,
-                    AVG(kwota_do_zaplaty) as srednia_kwota,
-                    MIN(kwota_do_zaplaty) as min_kwota,
-                    MAX(kwota_do_zaplaty) as max_kwota
-                FROM rachunki 
-                GROUP BY strftime('%Y', data_wystawienia)
-                ORDER BY rok DESC
-            ''')
+            with self._unia_archiwow(conn, '''
+                SELECT rok, liczba, suma_gr, min_gr, max_gr
+                FROM {s}.przychody_miesieczne
+            ''') as (unia, parametry):
+                cursor.execute(f'''
+                    SELECT 
+                        rok,
+                        SUM(liczba) as liczba_rachunkow,
+                        SUM(suma_gr) as suma_gr,
+                        MIN(min_gr) as min_gr,
+                        MAX(max_gr) as max_gr
+                    FROM ({unia}) 
+                    GROUP BY rok
+                    ORDER BY rok DESC
+                ''', parametry)
+                wiersze = cursor.fetchall()
             
             lata = []
-            for row in cursor.fetchall():
+            for rok, liczba, suma_gr, min_gr, max_gr in wiersze:
                 lata.append({
-                    'rok': int(row[0]),
-                    'liczba_rachunkow': row[1],
-                    'suma_kwot': round(row[2], 2),
-                    'srednia_kwota': round(row[3], 2),
-                    'min_kwota': round(row[4], 2),
-                    'max_kwota': round(row[5], 2)
+                    'rok': rok,
+                    'liczba_rachunkow': liczba,
+                    'suma_kwot': Kwota(suma_gr),
+                    'srednia_kwota': round(suma_gr / liczba / 100, 2),
+                    'min_kwota': Kwota(min_gr),
+                    'max_kwota': Kwota(max_gr)
                 })
             
             return lata
@@ -515,63 +1362,168 @@ class DatabaseManager:
         Returns:
             Lista z top klientami
         """
-        with sqlite3.connect(self.db_path) as conn:
+        with self._polaczenie() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT 
-                    nabywca_imie || ' ' || nabywca_nazwisko as klient,
-                    COUNT(*) as liczba_rachunkow,
-                    SUM(kwota_do_zaplaty) as suma_kwot,
-                    AVG(kwota_do_zaplaty) as srednia_kwota,
-                    MAX(data_wystawienia) as ostatni_rachunek
-                FROM rachunki 
-                GROUP BY nabywca_imie, nabywca_nazwisko
-                ORDER BY suma_kwot DESC
-                LIMIT ?
-            ''', (limit,))
+            if not self._archiwa():
+                # Agregaty klientów są utrzymywane przez wyzwalacze, a indeks
+                # idx_klienci_suma zwraca ich od razu w kolejności sumy
+                cursor.execute('''
+                    SELECT id, imie || ' ' || nazwisko, liczba_rachunkow, suma_gr, ostatni_rachunek
+                    FROM klienci
+                    WHERE liczba_rachunkow > 0
+                    ORDER BY suma_gr DESC
+                    LIMIT ?
+                ''', (limit,))
+                wiersze = cursor.fetchall()
+            else:
+                # Archiwa mają agregaty klientów ze swojego roku, a imiona
+                # i nazwiska są tylko w tabeli klientów głównej bazy
+                with self._unia_archiwow(conn, '''
+                    SELECT id, liczba_rachunkow, suma_gr, ostatni_rachunek
+                    FROM {s}.klienci
+                    WHERE liczba_rachunkow > 0
+                ''') as (unia, parametry):
+                    cursor.execute(f'''
+                        SELECT k.id, k.imie || ' ' || k.nazwisko, SUM(a.liczba_rachunkow),
+                               SUM(a.suma_gr), MAX(a.ostatni_rachunek)
+                        FROM ({unia}) a
+                        JOIN main.klienci k ON k.id = a.id
+                        GROUP BY k.id
+                        ORDER BY SUM(a.suma_gr) DESC
+                        LIMIT ?
+                    ''', parametry + (limit,))
+                    wiersze = cursor.fetchall()
             
             klienci = []
-            for row in cursor.fetchall():
+            for klient_id, klient, liczba, suma_gr, ostatni in wiersze:
                 klienci.append({
-                    'klient': row[0],
-                    'liczba_rachunkow': row[1],
-                    'suma_kwot': round(row[2], 2),
-                    'srednia_kwota': round(row[3], 2),
-                    'ostatni_rachunek': row[4]
+                    'klient_id': klient_id,
+                    'klient': klient,
+                    'liczba_rachunkow': liczba,
+                    'suma_kwot': round(suma_gr / 100, 2),
+                    'srednia_kwota': round(suma_gr / liczba / 100, 2),
+                    'ostatni_rachunek': ostatni
                 })
             
             return klienci
     
-    def pobierz_statystyki_ogolne(self) -> Dict:
+    def znajdz_klienta(self, imie: str, nazwisko: str) -> Optional[Dict]:
         """
-        Pobiera ogólne statystyki aplikacji
+        Wyszukuje klienta po imieniu i nazwisku (bez względu na wielkość liter i spacje)
         
+        Args:
+            imie: Imię nabywcy
+            nazwisko: Nazwisko nabywcy
+            
         Returns:
-            Słownik z ogólnymi statystykami
+            Słownik z danymi klienta lub None
         """
-        with sqlite3.connect(self.db_path) as conn:
+        klucz = WalidatorDanych.normalizuj_klucz_klienta(imie, nazwisko)
+        with self._polaczenie() as conn:
             cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id, imie, nazwisko, liczba_rachunkow, suma_gr, ostatni_rachunek
+                FROM klienci WHERE klucz = ?
+            ''', (klucz,))
             
-            # Podstawowe statystyki
-            cursor.execute('SELECT COUNT(*) FROM rachunki')
-            total_rachunki = cursor.fetchone()[0]
+            row = cursor.fetchone()
+            if not row:
+                return None
             
-            cursor.execute('SELECT SUM(kwota_do_zaplaty) FROM rachunki')
-            total_kwota = cursor.fetchone()[0] or 0
+            klient_id, imie, nazwisko, liczba, suma_gr, ostatni = row
+            with self._unia_archiwow(conn, '''
+                SELECT liczba_rachunkow, suma_gr, ostatni_rachunek
+                FROM {s}.klienci WHERE id = ?
+            ''', (klient_id,), z_glowna=False) as (unia, parametry):
+                if unia:
+                    cursor.execute(f'''
+                        SELECT COALESCE(SUM(liczba_rachunkow), 0), COALESCE(SUM(suma_gr), 0),
+                               MAX(ostatni_rachunek)
+                        FROM ({unia})
+                    ''', parametry)
+                    liczba_arch, suma_arch, ostatni_arch = cursor.fetchone()
+                    liczba += liczba_arch
+                    suma_gr += suma_arch
+                    ostatni = max(filter(None, (ostatni, ostatni_arch)), default=None)
             
-            cursor.execute('SELECT AVG(kwota_do_zaplaty) FROM rachunki')
-            avg_kwota = cursor.fetchone()[0] or 0
+            return {
+                'id': klient_id,
+                'imie': imie,
+                'nazwisko': nazwisko,
+                'liczba_rachunkow': liczba,
+                'suma_kwot': round(suma_gr / 100, 2),
+                'ostatni_rachunek': ostatni
+            }
+    
+    def pobierz_rachunki_klienta(self, klient_id: int) -> List[Dict]:
+        """
+        Pobiera historię rachunków klienta, od najnowszego
+        
+        Args:
+            klient_id: ID klienta
             
-            # Pierwszy i ostatni rachunek
-            cursor.execute('SELECT MIN(data_wystawienia) FROM rachunki')
-            pierwszy_rachunek = cursor.fetchone()[0]
+        Returns:
+            Lista rachunków klienta
+        """
+        with self._polaczenie() as conn:
+            cursor = conn.cursor()
+            with self._unia_archiwow(conn, '''
+                SELECT id, numer_rachunku, data_wystawienia, nazwa_uslugi, kwota_do_zaplaty_gr / 100.0
+                FROM {s}.rachunki
+                WHERE klient_id = ? AND deleted_at IS NULL
+            ''', (klient_id,)) as (unia, parametry):
+                cursor.execute(f"{unia} ORDER BY data_wystawienia DESC", parametry)
+                wiersze = cursor.fetchall()
             
-            cursor.execute('SELECT MAX(data_wystawienia) FROM rachunki')
-            ostatni_rachunek = cursor.fetchone()[0]
+            rachunki = []
+            for row in wiersze:
+                rachunki.append({
+                    'id': row[0],
+                    'numer_rachunku': row[1],
+                    'data_wystawienia': row[2],
+                    'nazwa_uslugi': row[3],
+                    'kwota_do_zaplaty': row[4]
+                })
             
-            # Liczba unikalnych klientów
-            cursor.execute('SELECT COUNT(DISTINCT nabywca_imie || nabywca_nazwisko) FROM rachunki')
-            unikalni_klienci = cursor.fetchone()[0]
+            return rachunki
+    
+    def pobierz_statystyki_ogolne(self) -> Dict:
+        """
+        Pobiera ogólne statystyki aplikacji
+        
+        Returns:
+            Słownik z ogólnymi statystykami
+        """
+        with self._polaczenie() as conn:
+            cursor = conn.cursor()
+            
+            # Jedno zapytanie: liczba i suma z agregatów miesięcznych, klienci
+            # z tabeli klientów, a pierwsza i ostatnia data z końców indeksu
+            # idx_rachunki_data_wystawienia - bez przeglądania rachunków,
+            # osobno w głównej bazie i w każdym archiwum (zapytania nie mają parametrów)
+            with self._unia_archiwow(conn, "SELECT liczba, suma_gr FROM {s}.przychody_miesieczne") \
+                    as (przychody, _), \
+                    self._unia_archiwow(conn, '''
+                        SELECT MIN(data_wystawienia) AS data FROM {s}.rachunki WHERE deleted_at IS NULL
+                    ''') as (pierwsze, _), \
+                    self._unia_archiwow(conn, '''
+                        SELECT MAX(data_wystawienia) AS data FROM {s}.rachunki WHERE deleted_at IS NULL
+                    ''') as (ostatnie, _), \
+                    self._unia_archiwow(conn, "SELECT id FROM {s}.klienci WHERE liczba_rachunkow > 0") \
+                    as (klienci, _):
+                cursor.execute(f'''
+                    SELECT
+                        (SELECT COALESCE(SUM(liczba), 0) FROM ({przychody})),
+                        (SELECT COALESCE(SUM(suma_gr), 0) FROM ({przychody})),
+                        (SELECT MIN(data) FROM ({pierwsze})),
+                        (SELECT MAX(data) FROM ({ostatnie})),
+                        (SELECT COUNT(DISTINCT id) FROM ({klienci}))
+                ''')
+                (total_rachunki, suma_gr, pierwszy_rachunek,
+                 ostatni_rachunek, unikalni_klienci) = cursor.fetchone()
+            
+            total_kwota = suma_gr / 100
+            avg_kwota = total_kwota / total_rachunki if total_rachunki else 0
             
             return {
                 'total_rachunki': total_rachunki,
@@ -584,7 +1536,7 @@ class DatabaseManager:
     
     def usun_rachunek(self, rachunek_id: int, powod: str = "") -> bool:
         """
-        Usuwa rachunek (soft delete - przenosi do tabeli usuniętych)
+        Usuwa rachunek (soft delete - oznacza rachunek jako usunięty)
         
         Args:
             rachunek_id: ID rachunku do usunięcia
@@ -593,138 +1545,165 @@ class DatabaseManager:
         Returns:
             True jeśli usunięto, False w przeciwnym razie
         """
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            # Pobierz dane rachunku
-            cursor.execute('SELECT * FROM rachunki WHERE id = ?', (rachunek_id,))
-            rachunek = cursor.fetchone()
-            
-            if not rachunek:
-                return False
-            
-            # Przenieś do tabeli usuniętych
-            cursor.execute('''
-                INSERT INTO usunięte_rachunki (
-                    original_id, numer_rachunku, data_wystawienia, data_wykonania_uslugi,
-                    sprzedawca_imie, sprzedawca_nazwisko, sprzedawca_ulica, 
-                    sprzedawca_nr_domu, sprzedawca_kod_pocztowy, sprzedawca_miasto,
-                    nabywca_imie, nabywca_nazwisko, nabywca_ulica, 
-                    nabywca_nr_domu, nabywca_kod_pocztowy, nabywca_miasto,
-                    nazwa_uslugi, cena_jednostkowa, kwota_do_zaplaty, kwota_slownie, 
-                    plik_pdf, data_utworzenia, powod_usuniecia
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                rachunek[0], rachunek[1], rachunek[2], rachunek[3],
-                rachunek[4], rachunek[5], rachunek[6], rachunek[7], rachunek[8], rachunek[9],
-                rachunek[10], rachunek[11], rachunek[12], rachunek[13], rachunek[14], rachunek[15],
-                rachunek[16], rachunek[17], rachunek[18], rachunek[19], 
-                rachunek[20], rachunek[21], powod
-            ))
-            
-            # Usuń z głównej tabeli
-            cursor.execute('DELETE FROM rachunki WHERE id = ?', (rachunek_id,))
+        return self.usun_rachunki([rachunek_id], powod)[rachunek_id]
+    
+    def _odrzuc_archiwalne(self, rachunek_ids: List[int]) -> None:
+        """
+        Zgłasza błąd, jeśli któryś z rachunków jest w archiwum rocznym
+        
+        Archiwa są dołączane tylko do odczytu, a zmiany dotyczą rachunków
+        głównej bazy - rachunek z archiwum nie zostałby zmieniony bez
+        żadnego komunikatu.
+        
+        Args:
+            rachunek_ids: ID rachunków do zmiany
+        
+        Raises:
+            ValueError: Jeśli któryś z rachunków jest w archiwum
+        """
+        if not rachunek_ids or not self._archiwa():
+            return
+        
+        conn = self._polaczenie()
+        with self._unia_archiwow(conn, '''
+            SELECT id, numer_rachunku, rok FROM {s}.rachunki
+            WHERE id IN (SELECT value FROM json_each(?))
+        ''', (json.dumps(rachunek_ids),), z_glowna=False) as (unia, parametry):
+            archiwalne = conn.execute(f"{unia} ORDER BY id", parametry).fetchall()
+        if archiwalne:
+            lata = ', '.join(str(rok) for rok in sorted({rok for _, _, rok in archiwalne}))
+            numery = ', '.join(numer for _, numer, _ in archiwalne[:5])
+            if len(archiwalne) > 5:
+                numery += f" i {len(archiwalne) - 5} innych"
+            raise ValueError(f"Rachunki z archiwum ({lata}) są tylko do odczytu: {numery}")
+    
+    def usun_rachunki(self, rachunek_ids: Iterable[int], powod: str = "") -> Dict[int, bool]:
+        """
+        Usuwa wiele rachunków w jednej transakcji (soft delete)
+        
+        Args:
+            rachunek_ids: ID rachunków do usunięcia
+            powod: Powód usunięcia (wspólny dla wszystkich rachunków)
             
-            conn.commit()
-            return True
+        Returns:
+            Słownik ID rachunku -> True jeśli usunięto, False jeśli nie istnieje
+            lub był już usunięty
+        
+        Raises:
+            ValueError: Jeśli któryś z rachunków jest w archiwum rocznym
+        """
+        rachunek_ids = list(dict.fromkeys(rachunek_ids))
+        self._odrzuc_archiwalne(rachunek_ids)
+        
+        wyniki = {}
+        with self._transakcja(self._polaczenie()) as cursor:
+            for rachunek_id in rachunek_ids:
+                cursor.execute('''
+                    UPDATE rachunki SET deleted_at = CURRENT_TIMESTAMP, powod_usuniecia = ?
+                    WHERE id = ? AND deleted_at IS NULL
+                ''', (powod, rachunek_id))
+                wyniki[rachunek_id] = cursor.rowcount > 0
+        return wyniki
     
-    def pobierz_usunięte_rachunki(self) -> List[Dict]:
+    def pobierz_usunięte_rachunki(self) -> List[WierszUsunietegoRachunku]:
         """
         Pobiera listę usuniętych rachunków
         
         Returns:
             Lista usuniętych rachunków
         """
-        with sqlite3.connect(self.db_path) as conn:
+        with self._polaczenie() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT id, original_id, numer_rachunku, data_wystawienia,
-                       nabywca_imie, nabywca_nazwisko, kwota_do_zaplaty,
-                       data_usuniecia, powod_usuniecia
+            cursor.row_factory = WierszUsunietegoRachunku.fabryka
+            cursor.execute(f'''
+                SELECT {', '.join(WierszUsunietegoRachunku.KOLUMNY)}
                 FROM usunięte_rachunki 
                 ORDER BY data_usuniecia DESC
             ''')
             
-            rachunki = []
-            for row in cursor.fetchall():
-                rachunki.append({
-                    'id': row[0],
-                    'original_id': row[1],
-                    'numer_rachunku': row[2],
-                    'data_wystawienia': row[3],
-                    'nabywca': f"{row[4]} {row[5]}",
-                    'kwota': row[6],
-                    'data_usuniecia': row[7],
-                    'powod_usuniecia': row[8] or 'Brak powodu'
-                })
-            
-            return rachunki
+            return cursor.fetchall()
     
     def przywroc_rachunek(self, deleted_id: int) -> bool:
         """
         Przywraca usunięty rachunek
         
         Args:
-            deleted_id: ID w tabeli usuniętych rachunków
+            deleted_id: ID usuniętego rachunku (z listy usuniętych rachunków)
             
         Returns:
             True jeśli przywrócono, False w przeciwnym razie
         """
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            # Pobierz dane usuniętego rachunku
-            cursor.execute('SELECT * FROM usunięte_rachunki WHERE id = ?', (deleted_id,))
-            rachunek = cursor.fetchone()
-            
-            if not rachunek:
-                return False
-            
-            # Sprawdź czy numer rachunku nie koliduje
-            cursor.execute('SELECT COUNT(*) FROM rachunki WHERE numer_rachunku = ?', (rachunek[2],))
-            if cursor.fetchone()[0] > 0:
-                return False  # Numer już istnieje
-            
-            # Przywróć do głównej tabeli
-            cursor.execute('''
-                INSERT INTO rachunki (
-                    numer_rachunku, data_wystawienia, data_wykonania_uslugi,
-                    sprzedawca_imie, sprzedawca_nazwisko, sprzedawca_ulica, 
-                    sprzedawca_nr_domu, sprzedawca_kod_pocztowy, sprzedawca_miasto,
-                    nabywca_imie, nabywca_nazwisko, nabywca_ulica, 
-                    nabywca_nr_domu, nabywca_kod_pocztowy, nabywca_miasto,
-                    nazwa_uslugi, cena_jednostkowa, kwota_do_zaplaty, kwota_slownie, 
-                    plik_pdf, data_utworzenia
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                rachunek[2], rachunek[3], rachunek[4],
-                rachunek[5], rachunek[6], rachunek[7], rachunek[8], rachunek[9], rachunek[10],
-                rachunek[11], rachunek[12], rachunek[13], rachunek[14], rachunek[15], rachunek[16],
-                rachunek[17], rachunek[18], rachunek[19], rachunek[20], 
-                rachunek[21], rachunek[22]
-            ))
-            
-            # Usuń z tabeli usuniętych
-            cursor.execute('DELETE FROM usunięte_rachunki WHERE id = ?', (deleted_id,))
+        return self.przywroc_rachunki([deleted_id])[deleted_id]
+    
+    def przywroc_rachunki(self, deleted_ids: Iterable[int]) -> Dict[int, bool]:
+        """
+        Przywraca wiele usuniętych rachunków w jednej transakcji
+        
+        Rachunek, którego numer zajął w międzyczasie aktywny rachunek, nie jest
+        przywracany; pozostałe z listy są przywracane normalnie.
+        
+        Args:
+            deleted_ids: ID usuniętych rachunków (z listy usuniętych rachunków)
             
-            conn.commit()
-            return True
+        Returns:
+            Słownik ID rachunku -> True jeśli przywrócono, False w przeciwnym razie
+        
+        Raises:
+            ValueError: Jeśli któryś z rachunków jest w archiwum rocznym
+        """
+        deleted_ids = list(dict.fromkeys(deleted_ids))
+        self._odrzuc_archiwalne(deleted_ids)
+        
+        wyniki = {}
+        with self._transakcja(self._polaczenie()) as cursor:
+            for deleted_id in deleted_ids:
+                try:
+                    cursor.execute('''
+                        UPDATE rachunki SET deleted_at = NULL, powod_usuniecia = NULL
+                        WHERE id = ? AND deleted_at IS NOT NULL
+                    ''', (deleted_id,))
+                except sqlite3.IntegrityError:
+                    # Numer rachunku jest już używany przez aktywny rachunek;
+                    # SQLite wycofuje tylko tę instrukcję, transakcja trwa dalej
+                    wyniki[deleted_id] = False
+                else:
+                    wyniki[deleted_id] = cursor.rowcount > 0
+        return wyniki
     
     def trwale_usun_rachunek(self, deleted_id: int) -> bool:
         """
-        Trwale usuwa rachunek z tabeli usuniętych
+        Trwale usuwa rachunek oznaczony jako usunięty
         
         Args:
-            deleted_id: ID w tabeli usuniętych rachunków
+            deleted_id: ID usuniętego rachunku (z listy usuniętych rachunków)
             
         Returns:
             True jeśli usunięto, False w przeciwnym razie
         """
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('DELETE FROM usunięte_rachunki WHERE id = ?', (deleted_id,))
-            conn.commit()
-            return cursor.rowcount > 0
+        return self.trwale_usun_rachunki([deleted_id])[deleted_id]
+    
+    def trwale_usun_rachunki(self, deleted_ids: Iterable[int]) -> Dict[int, bool]:
+        """
+        Trwale usuwa wiele rachunków oznaczonych jako usunięte w jednej transakcji
+        
+        Args:
+            deleted_ids: ID usuniętych rachunków (z listy usuniętych rachunków)
+            
+        Returns:
+            Słownik ID rachunku -> True jeśli usunięto, False w przeciwnym razie
+        
+        Raises:
+            ValueError: Jeśli któryś z rachunków jest w archiwum rocznym
+        """
+        deleted_ids = list(dict.fromkeys(deleted_ids))
+        self._odrzuc_archiwalne(deleted_ids)
+        
+        wyniki = {}
+        with self._transakcja(self._polaczenie()) as cursor:
+            for deleted_id in deleted_ids:
+                cursor.execute('DELETE FROM rachunki WHERE id = ? AND deleted_at IS NOT NULL', (deleted_id,))
+                wyniki[deleted_id] = cursor.rowcount > 0
+        return wyniki
     
     def pobierz_ustawienie(self, klucz: str) -> Optional[str]:
         """
@@ -736,11 +1715,15 @@ class DatabaseManager:
         Returns:
             Wartość ustawienia lub None
         """
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT wartosc FROM ustawienia WHERE klucz = ?', (klucz,))
-            result = cursor.fetchone()
-            return result[0] if result else None
+        pamiec = self._pamiec_podreczna()
+        klucz_pamieci = ('ustawienie', klucz)
+        if klucz_pamieci not in pamiec:
+            with self._polaczenie() as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT wartosc FROM ustawienia WHERE klucz = ?', (klucz,))
+                result = cursor.fetchone()
+                pamiec[klucz_pamieci] = result[0] if result else None
+        return pamiec[klucz_pamieci]
     
     def zapisz_ustawienie(self, klucz: str, wartosc: str) -> None:
         """
@@ -750,10 +1733,73 @@ class DatabaseManager:
             klucz: Klucz ustawienia
             wartosc: Wartość ustawienia
         """
-        with sqlite3.connect(self.db_path) as conn:
+        with self._polaczenie() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT OR REPLACE INTO ustawienia (klucz, wartosc)
                 VALUES (?, ?)
             ''', (klucz, wartosc))
-            conn.commit()
\ No newline at end of file
+            conn.commit()
+        
+        self._pamiec[('ustawienie', klucz)] = wartosc
+
+
+class PulaNumerow:
+    """Blok numerów rachunków zarezerwowany w tabeli numeracja"""
+    
+    def __init__(self, db: DatabaseManager, miesiac: int, rok: int, pierwszy: int, ostatni: int):
+        """
+        Args:
+            db: Manager bazy, w której zarezerwowano numery
+            miesiac: Miesiąc numeracji
+            rok: Rok numeracji
+            pierwszy: Pierwszy numer bloku
+            ostatni: Ostatni numer bloku
+        """
+        self.db = db
+        self.miesiac = miesiac
+        self.rok = rok
+        self.pierwszy = pierwszy
+        self.ostatni = ostatni
+        self._nastepny = pierwszy
+        self._blokada = threading.Lock()
+    
+    def nastepny(self) -> str:
+        """
+        Wydaje kolejny numer z bloku
+        
+        Raises:
+            IndexError: Jeśli blok został wyczerpany
+        """
+        with self._blokada:
+            if self._nastepny > self.ostatni:
+                raise IndexError("Pula numerów rachunków została wyczerpana")
+            numer = self._nastepny
+            self._nastepny += 1
+        return f"{numer}/{self.miesiac:02d}/{self.rok}"
+    
+    def pozostalo(self) -> int:
+        """Zwraca liczbę niewydanych numerów"""
+        return self.ostatni - self._nastepny + 1
+    
+    def zwroc(self) -> bool:
+        """
+        Oddaje niewydane numery do licznika numeracji
+        
+        Returns:
+            True jeśli nie było czego oddawać lub licznik został cofnięty,
+            False jeśli po bloku zarezerwowano już kolejne numery
+        """
+        with self._blokada:
+            if self._nastepny > self.ostatni:
+                return True
+            if self.db._zwroc_numery(self.miesiac, self.rok, self.ostatni, self._nastepny - 1):
+                self.ostatni = self._nastepny - 1
+                return True
+            return False
+    
+    def __enter__(self) -> 'PulaNumerow':
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.zwroc()
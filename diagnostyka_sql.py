@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Moduł diagnostyki zapytań SQL warstwy bazy danych
+
+Tryb diagnostyczny jest włączany przez config.DEBUG_MODE, config.VERBOSE_LOGGING
+lub zmienną środowiskową RACHUNKI_SQL_TRACE=1. DatabaseManager opakowuje wtedy
+swoje publiczne metody pomiarem czasu, a połączenia zgłaszają każde zapytanie
+przez set_trace_callback. Dla każdej metody zbierana jest liczba wywołań
+i histogram czasów, a zapytania wolniejsze od progu trafiają z planem
+EXPLAIN QUERY PLAN do rotowanego pliku dziennika.
+
+SQLite zgłasza tylko początek zapytania, więc czas zapytania to czas do
+początku następnego zapytania lub końca metody - obejmuje też pobieranie
+wierszy przez Pythona. Czas zapytania jest liczony, gdy zaczyna się
+następne, a pamiętane są tylko wolne zapytania (najwyżej
+SQL_SLOW_PER_CALL_MAX na wywołanie) - executemany zgłasza każdy wiersz
+jako osobne zapytanie, więc duży import nie zapełnia pamięci.
+"""
+
+import os
+import time
+import logging
+import sqlite3
+import functools
+import threading
+from logging.handlers import RotatingFileHandler
+from typing import Callable, Dict, List, Optional, Tuple
+import config
+
+# Górne granice przedziałów histogramu w milisekundach; ostatni przedział jest otwarty
+PRZEDZIALY_MS = (1, 5, 10, 50, 100, 500, 1000)
+
+# Zapytania, dla których SQLite potrafi pokazać plan
+ZAPYTANIA_Z_PLANEM = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+def diagnostyka_wlaczona() -> bool:
+    """Sprawdza czy tryb diagnostyki SQL jest włączony w config.py lub zmienną środowiskową"""
+    zmienna = os.environ.get(config.SQL_TRACE_ENV, '').strip().lower()
+    return config.DEBUG_MODE or config.VERBOSE_LOGGING or zmienna in ('1', 'true', 'tak')
+
+
+def _dziennik(plik: str) -> logging.Logger:
+    """Zwraca logger wolnych zapytań zapisujący do rotowanego pliku"""
+    logger = logging.getLogger('rachunki.sql')
+    sciezka = os.path.abspath(plik)
+    if not any(getattr(h, 'baseFilename', None) == sciezka for h in logger.handlers):
+        handler = RotatingFileHandler(sciezka, maxBytes=config.SQL_LOG_MAX_BYTES,
+                                      backupCount=config.SQL_LOG_BACKUPS, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(message)s'))
+        logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger
+
+
+class _Wywolanie:
+    """Wolne zapytania zgłoszone w trakcie jednego wywołania metody"""
+
+    __slots__ = ('metoda', 'biezace', 'wolne', 'pominiete')
+
+    def __init__(self, metoda: str):
+        self.metoda = metoda
+        # (czas początku, tekst zapytania) trwającego zapytania lub None
+        self.biezace: Optional[Tuple[float, str]] = None
+        # (czas w ms, tekst zapytania) zapytań wolniejszych od progu
+        self.wolne: List[Tuple[float, str]] = []
+        # Liczba wolnych zapytań ponad limit, których tekst nie został zapamiętany
+        self.pominiete = 0
+
+    def zakoncz_biezace(self, koniec: float, prog_ms: float) -> None:
+        """Kończy trwające zapytanie i zapamiętuje je, jeśli było wolne"""
+        if self.biezace is None:
+            return
+        poczatek, sql = self.biezace
+        self.biezace = None
+        czas_ms = (koniec - poczatek) * 1000
+        if czas_ms >= prog_ms:
+            if len(self.wolne) < config.SQL_SLOW_PER_CALL_MAX:
+                self.wolne.append((czas_ms, sql))
+            else:
+                self.pominiete += 1
+
+
+class DiagnostykaSQL:
+    """Liczniki wywołań, histogramy czasów i dziennik wolnych zapytań"""
+
+    def __init__(self, polaczenie: Callable[[], sqlite3.Connection],
+                 prog_ms: float = None, plik_logu: str = None):
+        """
+        Inicjalizacja diagnostyki
+
+        Args:
+            polaczenie: Funkcja zwracająca połączenie bieżącego wątku (do EXPLAIN)
+            prog_ms: Czas zapytania, od którego jest zapisywane w dzienniku (domyślnie z config.py)
+            plik_logu: Plik dziennika wolnych zapytań (domyślnie z config.py)
+        """
+        self.polaczenie = polaczenie
+        self.prog_ms = config.SQL_SLOW_QUERY_MS if prog_ms is None else prog_ms
+        self.log = _dziennik(plik_logu or config.SQL_LOG_FILE)
+        self._blokada = threading.Lock()
+        self._metody: Dict[str, Dict] = {}
+        self._lokalne = threading.local()
+
+    def opakuj_metody(self, obiekt) -> None:
+        """
+        Zastępuje publiczne metody obiektu wersjami mierzącymi czas
+
+        Args:
+            obiekt: Instancja DatabaseManager
+        """
+        for nazwa in dir(type(obiekt)):
+            if not nazwa.startswith('_') and callable(getattr(type(obiekt), nazwa)):
+                setattr(obiekt, nazwa, self.opakuj(nazwa, getattr(obiekt, nazwa)))
+
+    def opakuj(self, nazwa: str, metoda: Callable) -> Callable:
+        """
+        Zwraca metodę mierzącą czas wywołania i zbierającą jej zapytania
+
+        Args:
+            nazwa: Nazwa metody w statystykach
+            metoda: Metoda do opakowania
+
+        Returns:
+            Opakowana metoda
+        """
+        @functools.wraps(metoda)
+        def opakowana(*args, **kwargs):
+            stos = self._stos()
+            if stos:
+                # Zapytanie metody zewnętrznej kończy się przed wywołaniem zagnieżdżonym
+                stos[-1].zakoncz_biezace(time.perf_counter(), self.prog_ms)
+            wywolanie = _Wywolanie(nazwa)
+            stos.append(wywolanie)
+            poczatek = time.perf_counter()
+            try:
+                return metoda(*args, **kwargs)
+            finally:
+                koniec = time.perf_counter()
+                stos.pop()
+                self._zapisz_czas(nazwa, (koniec - poczatek) * 1000)
+                self._zapisz_wolne(wywolanie, koniec)
+        return opakowana
+
+    def sledz(self, sql: str) -> None:
+        """
+        Funkcja dla Connection.set_trace_callback - notuje początek zapytania
+
+        Podzapytania wyzwalaczy są zgłaszane z tym samym tekstem co
+        zapytanie, które je wywołało, a wewnętrzne zapytania tabel
+        wirtualnych (FTS5) jako komentarze '-- ...', więc ich czas jest
+        doliczany do zapytania nadrzędnego.
+        """
+        if getattr(self._lokalne, 'wstrzymane', False) or sql.startswith('--'):
+            return
+        stos = self._stos()
+        if not stos:
+            return
+        wywolanie = stos[-1]
+        if wywolanie.biezace is not None and wywolanie.biezace[1] == sql:
+            return
+        teraz = time.perf_counter()
+        wywolanie.zakoncz_biezace(teraz, self.prog_ms)
+        wywolanie.biezace = (teraz, sql)
+
+    def statystyki(self) -> Dict[str, Dict]:
+        """
+        Zwraca statystyki wywołań metod
+
+        Returns:
+            Słownik metoda -> {'liczba', 'suma_ms', 'srednia_ms', 'max_ms', 'histogram'},
+            gdzie histogram to słownik przedział -> liczba wywołań
+        """
+        etykiety = [f"<={g} ms" for g in PRZEDZIALY_MS] + [f">{PRZEDZIALY_MS[-1]} ms"]
+        with self._blokada:
+            return {
+                nazwa: {
+                    'liczba': s['liczba'],
+                    'suma_ms': round(s['suma_ms'], 3),
+                    'srednia_ms': round(s['suma_ms'] / s['liczba'], 3),
+                    'max_ms': round(s['max_ms'], 3),
+                    'histogram': dict(zip(etykiety, s['histogram'])),
+                }
+                for nazwa, s in self._metody.items()
+            }
+
+    def raport(self) -> str:
+        """Zwraca tekstowe podsumowanie statystyk, od metod o największym łącznym czasie"""
+        statystyki = sorted(self.statystyki().items(), key=lambda e: e[1]['suma_ms'], reverse=True)
+        linie = [f"{'Metoda':<32} {'wywołań':>8} {'razem ms':>10} {'śr. ms':>8} {'max ms':>8}  histogram"]
+        for nazwa, s in statystyki:
+            histogram = ', '.join(f"{k}: {v}" for k, v in s['histogram'].items() if v)
+            linie.append(f"{nazwa:<32} {s['liczba']:>8} {s['suma_ms']:>10.1f} "
+                         f"{s['srednia_ms']:>8.2f} {s['max_ms']:>8.2f}  {histogram}")
+        return '\n'.join(linie)
+
+    def zapisz_podsumowanie(self) -> None:
+        """Zapisuje podsumowanie statystyk w dzienniku"""
+        if self._metody:
+            self.log.info("Statystyki metod DatabaseManager:\n%s", self.raport())
+
+    def _stos(self) -> List[_Wywolanie]:
+        """Zwraca stos wywołań metod bieżącego wątku"""
+        stos = getattr(self._lokalne, 'stos', None)
+        if stos is None:
+            stos = self._lokalne.stos = []
+        return stos
+
+    def _zapisz_czas(self, nazwa: str, czas_ms: float) -> None:
+        """Dolicza wywołanie metody do statystyk"""
+        przedzial = next((i for i, g in enumerate(PRZEDZIALY_MS) if czas_ms <= g), len(PRZEDZIALY_MS))
+        with self._blokada:
+            s = self._metody.get(nazwa)
+            if s is None:
+                s = self._metody[nazwa] = {'liczba': 0, 'suma_ms': 0.0, 'max_ms': 0.0,
+                                           'histogram': [0] * (len(PRZEDZIALY_MS) + 1)}
+            s['liczba'] += 1
+            s['suma_ms'] += czas_ms
+            s['max_ms'] = max(s['max_ms'], czas_ms)
+            s['histogram'][przedzial] += 1
+
+    def _zapisz_wolne(self, wywolanie: _Wywolanie, koniec: float) -> None:
+        """Zapisuje w dzienniku zapytania metody wolniejsze od progu"""
+        wywolanie.zakoncz_biezace(koniec, self.prog_ms)
+        for czas_ms, sql in wywolanie.wolne:
+            self.log.warning("Wolne zapytanie ~%.1f ms w %s: %s\n%s",
+                             czas_ms, wywolanie.metoda, sql.strip(), self._plan(sql))
+        if wywolanie.pominiete:
+            self.log.warning("Pominięto %d kolejnych wolnych zapytań w %s",
+                             wywolanie.pominiete, wywolanie.metoda)
+
+    def _plan(self, sql: str) -> str:
+        """Zwraca plan EXPLAIN QUERY PLAN zapytania jako wcięte linie"""
+        if not sql.lstrip().upper().startswith(ZAPYTANIA_Z_PLANEM):
+            return "    (brak planu)"
+        # EXPLAIN też przechodzi przez set_trace_callback
+        self._lokalne.wstrzymane = True
+        try:
+            kroki = [wiersz[3] for wiersz in self.polaczenie().execute(f"EXPLAIN QUERY PLAN {sql}")]
+        except sqlite3.Error as e:
+            return f"    (plan niedostępny: {e})"
+        finally:
+            self._lokalne.wstrzymane = False
+        return '\n'.join(f"    {krok}" for krok in kroki)
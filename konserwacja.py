@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Moduł konserwacji bazy danych rachunków
+
+Usuwanie, przywracanie i archiwizacja rachunków, zmiany danych sprzedawcy
+oraz reset numeracji zostawiają w pliku bazy wolne strony, a duże importy
+dezaktualizują statystyki planisty zapytań. Konserwacja wykonuje:
+
+- PRAGMA optimize przy zamykaniu bazy, na połączeniu wątku, który ją
+  zamyka (SQLite sam decyduje, czy statystyki którejś tabeli wymagają
+  odświeżenia),
+- ANALYZE po dużym imporcie lub przeniesieniu roku do archiwum,
+- PRAGMA incremental_vacuum, gdy wolne strony przekroczą próg z config.py;
+  baza utworzona przed włączeniem auto_vacuum = INCREMENTAL przechodzi
+  na ten tryb dopiero przy pełnym VACUUM zleconym wprost (pelna=True),
+  bo przepisuje ono cały plik pod wyłączną blokadą.
+
+Każdy krok jest zapisywany z czasem trwania w tabeli konserwacja.
+"""
+
+import time
+import logging
+import sqlite3
+from typing import Callable, Dict, List, Tuple
+import config
+
+# PRAGMA auto_vacuum: 0 = NONE, 1 = FULL, 2 = INCREMENTAL
+AUTO_VACUUM_INCREMENTAL = 2
+
+log = logging.getLogger('rachunki.konserwacja')
+
+
+def wolne_strony(conn: sqlite3.Connection) -> Tuple[int, int]:
+    """
+    Zwraca liczbę wolnych stron i wszystkich stron pliku bazy
+
+    Args:
+        conn: Połączenie z bazą danych
+
+    Returns:
+        (wolne strony, wszystkie strony)
+    """
+    wolne = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    wszystkie = conn.execute("PRAGMA page_count").fetchone()[0]
+    return wolne, wszystkie
+
+
+def tryb_przyrostowy(conn: sqlite3.Connection) -> bool:
+    """Sprawdza czy baza ma auto_vacuum = INCREMENTAL (odzyskiwanie miejsca bez pełnego VACUUM)"""
+    return conn.execute("PRAGMA auto_vacuum").fetchone()[0] == AUTO_VACUUM_INCREMENTAL
+
+
+def wymaga_odzyskania(conn: sqlite3.Connection) -> bool:
+    """Sprawdza czy wolne strony przekroczyły próg z config.py"""
+    wolne, wszystkie = wolne_strony(conn)
+    return (wolne >= config.MAINTENANCE_FREELIST_MIN_PAGES
+            and wolne * 100 >= wszystkie * config.MAINTENANCE_FREELIST_PERCENT)
+
+
+def zapisz_krok(conn: sqlite3.Connection, krok: str, czas_ms: float, szczegoly: str = None) -> None:
+    """
+    Zapisuje wykonany krok w dzienniku konserwacji i usuwa najstarsze wpisy ponad limit
+
+    Args:
+        conn: Połączenie z bazą danych (poza otwartą transakcją)
+        krok: Nazwa kroku, np. 'optimize', 'analyze', 'incremental_vacuum', 'vacuum'
+        czas_ms: Czas trwania kroku
+        szczegoly: Opis wyniku kroku
+    """
+    with conn:
+        cursor = conn.execute(
+            "INSERT INTO konserwacja (krok, czas_ms, szczegoly) VALUES (?, ?, ?)",
+            (krok, round(czas_ms, 3), szczegoly)
+        )
+        conn.execute("DELETE FROM konserwacja WHERE id <= ?",
+                     (cursor.lastrowid - config.MAINTENANCE_LOG_KEEP,))
+
+
+def _wykonaj(conn: sqlite3.Connection, krok: str, funkcja: Callable[[], str]) -> Dict:
+    """Mierzy czas kroku, zapisuje go w dzienniku i zwraca jego opis"""
+    poczatek = time.perf_counter()
+    szczegoly = funkcja()
+    czas_ms = (time.perf_counter() - poczatek) * 1000
+    zapisz_krok(conn, krok, czas_ms, szczegoly)
+    return {'krok': krok, 'czas_ms': round(czas_ms, 3), 'szczegoly': szczegoly}
+
+
+def optymalizuj(conn: sqlite3.Connection) -> Dict:
+    """
+    Wykonuje PRAGMA optimize na połączeniu przed jego zamknięciem
+
+    Args:
+        conn: Połączenie bieżącego wątku
+
+    Returns:
+        Opis wykonanego kroku
+    """
+    def wykonaj():
+        # Ograniczenie liczby wierszy czytanych przez ANALYZE wywołane z optimize
+        conn.execute("PRAGMA analysis_limit = 400")
+        conn.execute("PRAGMA main.optimize")
+        return None
+    return _wykonaj(conn, 'optimize', wykonaj)
+
+
+def analizuj(conn: sqlite3.Connection) -> Dict:
+    """
+    Odświeża statystyki planisty zapytań wszystkich tabel i indeksów (ANALYZE)
+
+    Args:
+        conn: Połączenie z bazą danych
+
+    Returns:
+        Opis wykonanego kroku
+    """
+    def wykonaj():
+        conn.execute("ANALYZE main")
+        tabele = conn.execute("SELECT COUNT(DISTINCT tbl) FROM main.sqlite_stat1").fetchone()[0]
+        return f"tabel ze statystykami: {tabele}"
+    return _wykonaj(conn, 'analyze', wykonaj)
+
+
+def odzyskaj_miejsce(conn: sqlite3.Connection, strony: int = None, pelna: bool = False) -> Dict:
+    """
+    Zwalnia wolne strony z końca pliku bazy
+
+    W trybie auto_vacuum = INCREMENTAL wykonywane jest PRAGMA incremental_vacuum,
+    które nie przepisuje całej bazy. Pełne VACUUM przepisuje plik (i przełącza
+    starszą bazę na tryb INCREMENTAL), więc jest wykonywane tylko na żądanie.
+
+    Args:
+        conn: Połączenie z bazą danych (poza otwartą transakcją)
+        strony: Najwięcej stron zwalnianych przez incremental_vacuum
+            (domyślnie wszystkie wolne)
+        pelna: Czy wykonać pełne VACUUM
+
+    Returns:
+        Opis wykonanego kroku
+
+    Raises:
+        ValueError: Gdy baza nie ma trybu INCREMENTAL, a pełne VACUUM nie zostało zlecone
+    """
+    if not pelna and not tryb_przyrostowy(conn):
+        raise ValueError("Baza nie ma trybu auto_vacuum = INCREMENTAL - "
+                         "odzyskanie miejsca wymaga pełnego VACUUM (pelna=True)")
+    przed = wolne_strony(conn)
+
+    def wykonaj():
+        if pelna:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+        else:
+            # execute() wykonuje tylko pierwszy krok tego PRAGMA (jedną stronę),
+            # executescript() wykonuje je do końca
+            conn.executescript(f"PRAGMA incremental_vacuum({int(strony or 0)})")
+        po = wolne_strony(conn)
+        return f"wolne strony {przed[0]} -> {po[0]}, plik {przed[1]} -> {po[1]} stron"
+    return _wykonaj(conn, 'vacuum' if pelna else 'incremental_vacuum', wykonaj)
+
+
+def przy_zamknieciu(conn: sqlite3.Connection) -> List[Dict]:
+    """
+    Konserwacja wykonywana przy zamykaniu bazy: optimize i odzyskanie części wolnych stron
+
+    Wykonywana tylko na połączeniu wątku zamykającego bazę - połączenia
+    innych wątków są jedynie zamykane. Pełne VACUUM nie jest tu wykonywane -
+    może trwać długo, więc bazę bez trybu INCREMENTAL trzeba przełączyć
+    przez konserwuj(pelna=True).
+
+    Args:
+        conn: Połączenie bieżącego wątku
+
+    Returns:
+        Lista opisów wykonanych kroków
+    """
+    kroki = [optymalizuj(conn)]
+    if tryb_przyrostowy(conn) and wymaga_odzyskania(conn):
+        kroki.append(odzyskaj_miejsce(conn, strony=config.MAINTENANCE_VACUUM_PAGES))
+    return kroki
+
+
+def konserwuj(conn: sqlite3.Connection, pelna: bool = False) -> List[Dict]:
+    """
+    Pełna konserwacja na żądanie (wiersz poleceń): odzyskanie miejsca i ANALYZE
+
+    Bez pelna=True baza bez trybu INCREMENTAL nie jest przepisywana -
+    pominięcie odzyskania miejsca jest zgłaszane w dzienniku i w zwróconych
+    krokach.
+
+    Args:
+        conn: Połączenie z bazą danych (poza otwartą transakcją)
+        pelna: Czy wykonać pełne VACUUM niezależnie od liczby wolnych stron
+
+    Returns:
+        Lista opisów wykonanych kroków
+    """
+    kroki = []
+    if pelna or wymaga_odzyskania(conn):
+        if pelna or tryb_przyrostowy(conn):
+            kroki.append(odzyskaj_miejsce(conn, pelna=pelna))
+        else:
+            wolne, wszystkie = wolne_strony(conn)
+            szczegoly = (f"pominięto: {wolne} z {wszystkie} stron wolnych, baza bez "
+                         f"auto_vacuum = INCREMENTAL wymaga pełnego VACUUM (--pelna)")
+            log.warning("Konserwacja: %s", szczegoly)
+            kroki.append({'krok': 'vacuum', 'czas_ms': 0.0, 'szczegoly': szczegoly})
+    kroki.append(analizuj(conn))
+    return kroki
+
+
+def historia(conn: sqlite3.Connection, limit: int = 20) -> List[Dict]:
+    """
+    Zwraca ostatnie kroki konserwacji, od najnowszego
+
+    Args:
+        conn: Połączenie z bazą danych
+        limit: Liczba wpisów
+
+    Returns:
+        Lista słowników z kluczami 'data', 'krok', 'czas_ms', 'szczegoly'
+    """
+    cursor = conn.execute('''
+        SELECT data_wykonania, krok, czas_ms, szczegoly
+        FROM konserwacja
+        ORDER BY id DESC
+        LIMIT ?
+    ''', (limit,))
+    return [{'data': data, 'krok': krok, 'czas_ms': czas_ms, 'szczegoly': szczegoly}
+            for data, krok, czas_ms, szczegoly in cursor]
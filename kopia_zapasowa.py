@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Moduł tworzący kopie zapasowe bazy danych rachunków
+
+Kopia jest robiona przez API kopii online SQLite (Connection.backup)
+porcjami stron, więc aplikacja może w tym czasie normalnie czytać i zapisywać
+bazę. Każda kopia jest sprawdzana przez PRAGMA integrity_check, kompresowana
+gzipem do pliku z datą i godziną w nazwie, a najstarsze kopie ponad limit
+są usuwane.
+
+Archiwa roczne (archiwum.py) są kopiowane do podkatalogu archiwa jako jedna
+kopia na rok. Archiwum zmienia się tylko przy ponownym przeniesieniu roku,
+więc jest kopiowane tylko wtedy, gdy czas modyfikacji pliku różni się od
+zapisanego w jego kopii.
+"""
+
+import os
+import glob
+import gzip
+import shutil
+import sqlite3
+from datetime import datetime, timedelta
+from urllib.request import pathname2url
+from typing import Callable, Dict, List, Optional
+import config
+import archiwum
+
+# Mikrosekundy w nazwie - kopie z tej samej sekundy nie nadpisują się nawzajem,
+# a stała szerokość zachowuje kolejność nazw zgodną z kolejnością w czasie
+FORMAT_DATY = "%Y%m%d_%H%M%S_%f"
+
+# Podkatalog katalogu kopii z kopiami archiwów rocznych
+KATALOG_ARCHIWOW = "archiwa"
+
+
+def _wzorzec_nazwy(db_path: str) -> str:
+    """Zwraca początek nazwy plików kopii dla danej bazy, np. 'rachunki'"""
+    return os.path.splitext(os.path.basename(db_path))[0]
+
+
+def _nazwa_kopii(db_path: str, katalog: str) -> str:
+    """
+    Zwraca nazwę nowej kopii (bez rozszerzenia .gz), której nie ma jeszcze w katalogu
+
+    Zegar systemowy bywa mniej dokładny niż mikrosekunda (np. w Windows),
+    więc przy zajętej nazwie czas w nazwie jest przesuwany o mikrosekundę.
+    """
+    czas = datetime.now()
+    while True:
+        nazwa = f"{_wzorzec_nazwy(db_path)}_{czas.strftime(FORMAT_DATY)}.db"
+        sciezka = os.path.join(katalog, nazwa)
+        if not any(os.path.exists(sciezka + koncowka) for koncowka in (".gz", ".tmp", ".gz.tmp")):
+            return nazwa
+        czas += timedelta(microseconds=1)
+
+
+def sprawdz_integralnosc(sciezka: str) -> List[str]:
+    """
+    Sprawdza integralność nieskompresowanej bazy SQLite
+
+    Args:
+        sciezka: Ścieżka do pliku bazy
+
+    Returns:
+        Lista problemów zgłoszonych przez PRAGMA integrity_check (pusta jeśli ok)
+    """
+    conn = sqlite3.connect(f"file:{pathname2url(os.path.abspath(sciezka))}?mode=ro", uri=True)
+    try:
+        wyniki = [wiersz[0] for wiersz in conn.execute("PRAGMA integrity_check")]
+    finally:
+        conn.close()
+    return [] if wyniki == ['ok'] else wyniki
+
+
+def _kopiuj_baze(zrodlo_path: str, plik_kopii: str,
+                 postep: Optional[Callable[[int, int], None]] = None) -> None:
+    """
+    Kopiuje bazę przez Connection.backup, sprawdza kopię i zapisuje ją jako plik .gz
+
+    Args:
+        zrodlo_path: Ścieżka do kopiowanej bazy
+        plik_kopii: Ścieżka docelowego pliku .gz
+        postep: Funkcja wywoływana po każdej porcji z liczbą skopiowanych
+            i wszystkich stron
+
+    Raises:
+        ValueError: Gdy kopia nie przeszła sprawdzenia integralności
+    """
+    plik_tymczasowy = os.path.splitext(plik_kopii)[0] + ".tmp"
+
+    def raportuj(status, pozostalo, razem):
+        if postep:
+            postep(razem - pozostalo, razem)
+
+    try:
+        # Zapis innego połączenia w trakcie kopii powoduje jej wznowienie od początku,
+        # dlatego porcje są małe, a przerwy między nimi oddają blokadę aplikacji
+        zrodlo = sqlite3.connect(zrodlo_path, timeout=config.DB_BUSY_TIMEOUT_MS / 1000)
+        cel = sqlite3.connect(plik_tymczasowy)
+        try:
+            zrodlo.backup(cel, pages=config.BACKUP_PAGES_PER_STEP,
+                          progress=raportuj, sleep=config.BACKUP_STEP_PAUSE)
+            # Kopia ma być jednym plikiem, bez dziennika WAL obok
+            cel.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            cel.close()
+            zrodlo.close()
+
+        problemy = sprawdz_integralnosc(plik_tymczasowy)
+        if problemy:
+            raise ValueError("Kopia zapasowa jest uszkodzona: " + "; ".join(problemy[:5]))
+
+        with open(plik_tymczasowy, 'rb') as wejscie, gzip.open(plik_kopii + ".tmp", 'wb') as wyjscie:
+            shutil.copyfileobj(wejscie, wyjscie, 1024 * 1024)
+        os.replace(plik_kopii + ".tmp", plik_kopii)
+    finally:
+        for plik in (plik_tymczasowy, plik_kopii + ".tmp"):
+            if os.path.exists(plik):
+                os.remove(plik)
+
+
+def utworz_kopie(db_path: str = config.DATABASE_PATH,
+                 katalog: str = config.BACKUP_FOLDER,
+                 zachowaj: int = config.BACKUP_KEEP,
+                 postep: Optional[Callable[[int, int], None]] = None) -> str:
+    """
+    Tworzy skompresowaną i sprawdzoną kopię zapasową bazy danych i jej archiwów
+
+    Args:
+        db_path: Ścieżka do bazy danych
+        katalog: Katalog na kopie zapasowe
+        zachowaj: Liczba najnowszych kopii pozostawianych po rotacji
+        postep: Funkcja wywoływana po każdej porcji z liczbą skopiowanych
+            i wszystkich stron
+
+    Returns:
+        Ścieżka do utworzonego pliku .db.gz
+
+    Raises:
+        ValueError: Gdy kopia nie przeszła sprawdzenia integralności
+    """
+    os.makedirs(katalog, exist_ok=True)
+    plik_kopii = os.path.join(katalog, _nazwa_kopii(db_path, katalog) + ".gz")
+    _kopiuj_baze(db_path, plik_kopii, postep)
+    # Archiwa po bazie: rok przeniesiony w międzyczasie jest wtedy w obu kopiach,
+    # a nie w żadnej
+    kopiuj_archiwa(db_path, katalog)
+
+    usun_stare_kopie(db_path, katalog, zachowaj)
+    return plik_kopii
+
+
+def _kopia_archiwum(sciezka: str, katalog: str) -> str:
+    """Zwraca ścieżkę kopii archiwum w podkatalogu archiwów, np. archiwa/rachunki_2024.db.gz"""
+    return os.path.join(katalog, KATALOG_ARCHIWOW, os.path.basename(sciezka) + ".gz")
+
+
+def kopie_archiwow(db_path: str = config.DATABASE_PATH,
+                   katalog: str = config.BACKUP_FOLDER) -> Dict[int, str]:
+    """
+    Zwraca kopie archiwów rocznych bazy
+
+    Args:
+        db_path: Ścieżka do bazy danych
+        katalog: Katalog z kopiami zapasowymi
+
+    Returns:
+        Słownik rok -> ścieżka pliku .gz, od najstarszego roku
+    """
+    rdzen, rozszerzenie = os.path.splitext(os.path.basename(db_path))
+    katalog_archiwow = os.path.join(katalog, KATALOG_ARCHIWOW)
+    wzorzec = f"{glob.escape(rdzen)}_[0-9][0-9][0-9][0-9]{rozszerzenie or '.db'}.gz"
+    kopie = {}
+    for sciezka in sorted(glob.glob(os.path.join(glob.escape(katalog_archiwow), wzorzec))):
+        kopie[int(os.path.basename(sciezka)[len(rdzen) + 1:len(rdzen) + 5])] = sciezka
+    return kopie
+
+
+def kopiuj_archiwa(db_path: str = config.DATABASE_PATH,
+                   katalog: str = config.BACKUP_FOLDER) -> List[str]:
+    """
+    Kopiuje archiwa roczne, które zmieniły się od ostatniej kopii
+
+    Kopia archiwum dostaje czas modyfikacji archiwum, więc niezmienione
+    archiwum nie jest kopiowane ponownie.
+
+    Args:
+        db_path: Ścieżka do bazy danych
+        katalog: Katalog na kopie zapasowe
+
+    Returns:
+        Lista utworzonych lub odświeżonych plików kopii archiwów
+
+    Raises:
+        ValueError: Gdy kopia archiwum nie przeszła sprawdzenia integralności
+    """
+    katalog_archiwow = os.path.join(katalog, KATALOG_ARCHIWOW)
+    skopiowane = []
+    for sciezka in archiwum.lista_archiwow(db_path).values():
+        plik_kopii = _kopia_archiwum(sciezka, katalog)
+        # Czas odczytany przed kopią - zmiana archiwum w trakcie kopii wymusi następną
+        czas = os.stat(sciezka).st_mtime_ns
+        if os.path.exists(plik_kopii) and os.stat(plik_kopii).st_mtime_ns == czas:
+            continue
+        os.makedirs(katalog_archiwow, exist_ok=True)
+        _kopiuj_baze(sciezka, plik_kopii)
+        os.utime(plik_kopii, ns=(czas, czas))
+        skopiowane.append(plik_kopii)
+    return skopiowane
+
+
+def lista_kopii(db_path: str = config.DATABASE_PATH,
+                katalog: str = config.BACKUP_FOLDER) -> List[str]:
+    """
+    Zwraca kopie zapasowe bazy od najstarszej do najnowszej
+
+    Args:
+        db_path: Ścieżka do bazy danych
+        katalog: Katalog z kopiami zapasowymi
+
+    Returns:
+        Lista ścieżek plików .db.gz
+    """
+    # Data w nazwie ma stałą szerokość, więc kolejność nazw to kolejność w czasie
+    return sorted(glob.glob(os.path.join(katalog, f"{_wzorzec_nazwy(db_path)}_*.db.gz")))
+
+
+def usun_stare_kopie(db_path: str = config.DATABASE_PATH,
+                     katalog: str = config.BACKUP_FOLDER,
+                     zachowaj: int = config.BACKUP_KEEP) -> List[str]:
+    """
+    Usuwa najstarsze kopie zapasowe ponad limit
+
+    Args:
+        db_path: Ścieżka do bazy danych
+        katalog: Katalog z kopiami zapasowymi
+        zachowaj: Liczba najnowszych kopii do pozostawienia
+
+    Returns:
+        Lista usuniętych plików
+    """
+    kopie = lista_kopii(db_path, katalog)
+    do_usuniecia = kopie[:-zachowaj] if zachowaj > 0 else []
+    for plik in do_usuniecia:
+        os.remove(plik)
+    return do_usuniecia
+
+
+def sprawdz_kopie(plik_kopii: str) -> List[str]:
+    """
+    Rozpakowuje kopię do pliku tymczasowego i sprawdza jej integralność
+
+    Args:
+        plik_kopii: Ścieżka do pliku .db.gz
+
+    Returns:
+        Lista problemów zgłoszonych przez PRAGMA integrity_check (pusta jeśli ok)
+    """
+    plik_tymczasowy = plik_kopii + ".sprawdzenie"
+    try:
+        with gzip.open(plik_kopii, 'rb') as wejscie, open(plik_tymczasowy, 'wb') as wyjscie:
+            shutil.copyfileobj(wejscie, wyjscie, 1024 * 1024)
+        return sprawdz_integralnosc(plik_tymczasowy)
+    finally:
+        if os.path.exists(plik_tymczasowy):
+            os.remove(plik_tymczasowy)
+
+
+def przywroc_kopie(plik_kopii: str, db_path: str = config.DATABASE_PATH) -> List[str]:
+    """
+    Rozpakowuje kopię bazy i kopie jej archiwów z tego samego katalogu
+
+    Args:
+        plik_kopii: Ścieżka do pliku .db.gz z kopią bazy
+        db_path: Ścieżka przywracanej bazy (archiwa trafiają obok niej)
+
+    Returns:
+        Lista przywróconych plików, najpierw baza, potem archiwa
+
+    Raises:
+        FileExistsError: Gdy baza lub któreś archiwum już istnieje
+    """
+    pliki = {db_path: plik_kopii}
+    for rok, kopia in kopie_archiwow(db_path, os.path.dirname(plik_kopii)).items():
+        pliki[archiwum.sciezka_archiwum(db_path, rok)] = kopia
+    istniejace = [sciezka for sciezka in pliki if os.path.exists(sciezka)]
+    if istniejace:
+        raise FileExistsError(f"Przywracanie nie nadpisuje plików: {', '.join(istniejace)}")
+
+    for sciezka, kopia in pliki.items():
+        with gzip.open(kopia, 'rb') as wejscie, open(sciezka + ".tmp", 'wb') as wyjscie:
+            shutil.copyfileobj(wejscie, wyjscie, 1024 * 1024)
+        os.replace(sciezka + ".tmp", sciezka)
+    return list(pliki)
+
+
+if __name__ == "__main__":
+    print(f"Kopia zapasowa zapisana: {utworz_kopie()}")
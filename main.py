@@ -20,12 +20,79 @@ def main():
         elif sys.argv[1] in ['--help', '-h']:
             print_help()
             return
+        elif sys.argv[1] in ['--kopia', '--backup']:
+            utworz_kopie_zapasowa()
+            return
+        elif sys.argv[1] in ['--archiwizuj', '--archive']:
+            archiwizuj_rok(sys.argv[2:])
+            return
+        elif sys.argv[1] in ['--konserwacja', '--maintenance']:
+            konserwuj_baze(sys.argv[2:])
+            return
     
     # Uruchom aplikację GUI
     root = tk.Tk()
     app = RachunekApp(root)
     root.mainloop()
 
+def utworz_kopie_zapasowa():
+    """Tworzy kopię zapasową bazy danych bez uruchamiania GUI"""
+    from kopia_zapasowa import utworz_kopie
+    
+    def postep(skopiowane, razem):
+        print(f"\rKopiowanie bazy: {skopiowane}/{razem} stron", end="", flush=True)
+    
+    try:
+        plik = utworz_kopie(postep=postep)
+    except Exception as e:
+        print(f"\nBłąd podczas tworzenia kopii zapasowej: {e}")
+        sys.exit(1)
+    print(f"\nKopia zapasowa zapisana i sprawdzona: {plik}")
+
+def archiwizuj_rok(argumenty):
+    """Przenosi rachunki zamkniętego roku do archiwum bez uruchamiania GUI"""
+    from rachunek_manager import RachunekManager
+    import config
+    
+    if len(argumenty) != 1 or not argumenty[0].isdigit():
+        print("Użycie: python main.py --archiwizuj ROK")
+        sys.exit(2)
+    
+    rok = int(argumenty[0])
+    manager = RachunekManager(config.DATABASE_PATH)
+    try:
+        wynik = manager.archiwizuj_rok(rok)
+    finally:
+        manager.zamknij()
+    if not wynik['success']:
+        print(wynik['error'])
+        sys.exit(1)
+    print(f"Przeniesiono do archiwum {wynik['liczba']} rachunków z roku {rok}")
+
+def konserwuj_baze(argumenty):
+    """Wykonuje konserwację bazy danych bez uruchamiania GUI i pokazuje jej dziennik"""
+    from rachunek_manager import RachunekManager
+    import config
+    
+    if argumenty not in ([], ['--pelna'], ['--full']):
+        print("Użycie: python main.py --konserwacja [--pelna]")
+        sys.exit(2)
+    
+    manager = RachunekManager(config.DATABASE_PATH)
+    try:
+        wynik = manager.konserwuj_baze(pelna=bool(argumenty))
+        historia = manager.db.historia_konserwacji(10)
+    finally:
+        manager.zamknij()
+    if not wynik['success']:
+        print(wynik['error'])
+        sys.exit(1)
+    for krok in wynik['kroki']:
+        print(f"{krok['krok']:<20} {krok['czas_ms']:>10.1f} ms  {krok['szczegoly'] or ''}")
+    print("\nOstatnie kroki konserwacji:")
+    for krok in historia:
+        print(f"  {krok['data']}  {krok['krok']:<20} {krok['czas_ms']:>10.1f} ms  {krok['szczegoly'] or ''}")
+
 def print_help():
     """Wyświetla pomoc dla aplikacji"""
     print(f"""
@@ -35,10 +102,14 @@ Użycie:
     python main.py              - Uruchamia aplikację GUI
     python main.py --version    - Wyświetla informacje o wersji
     python main.py --help       - Wyświetla tę pomoc
+    python main.py --kopia      - Tworzy kopię zapasową bazy danych
+    python main.py --archiwizuj ROK - Przenosi rachunki zamkniętego roku do archiwum
+    python main.py --konserwacja [--pelna] - Odzyskuje wolne miejsce i odświeża statystyki bazy
 
 Dostępne pliki:
     python run.py              - Uruchamia tryb diagnostyczny
     python test_pdf.py         - Testuje generator PDF
+    python benchmark_bazy.py   - Mierzy wydajność bazy danych
     python version.py          - Wyświetla szczegółowe info o wersji
 
 Więcej informacji znajdziesz w pliku README.md
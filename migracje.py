@@ -0,0 +1,882 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Moduł odpowiedzialny za wersjonowane migracje schematu bazy danych
+
+Wersja schematu jest przechowywana w PRAGMA user_version. Każda migracja
+składa się z kroków wykonywanych w osobnych transakcjach. Migracje
+uzupełniające dane (aktualizuj_w_paczkach) zatwierdzają każdą paczkę
+wierszy osobno, więc nie blokują dużej bazy na długo. Przebudowa tabeli
+(przebuduj_tabele) jest natomiast jedną transakcją i trzyma blokadę zapisu
+przez całe kopiowanie - stara i nowa tabela nie mogą istnieć obok siebie
+między transakcjami. Kroki muszą być idempotentne - przerwaną migrację
+można bezpiecznie powtórzyć przy następnym uruchomieniu.
+"""
+
+import json
+import sqlite3
+import hashlib
+from typing import Callable, Dict, List, Optional, Tuple, Union
+import config
+import archiwum
+from pieniadze import Kwota
+from walidacja import WalidatorDanych
+
+Krok = Union[str, Callable[[sqlite3.Connection, int], None]]
+
+
+def wersja_schematu(conn: sqlite3.Connection) -> int:
+    """Zwraca obecną wersję schematu bazy danych"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def aktualizuj_w_paczkach(conn: sqlite3.Connection, tabela: str, sql: str,
+                          rozmiar_paczki: int, max_id: int = None) -> None:
+    """
+    Wykonuje polecenie dla kolejnych zakresów id tabeli, zatwierdzając każdą paczkę
+
+    Args:
+        conn: Połączenie z bazą danych
+        tabela: Tabela, po której id dzielone są paczki
+        sql: Polecenie z parametrami :od i :do (zakres id, od wyłącznie, do włącznie)
+        rozmiar_paczki: Liczba identyfikatorów w jednej paczce
+        max_id: Ostatnie przetwarzane id (domyślnie obecne maksimum w tabeli)
+    """
+    if max_id is None:
+        max_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {tabela}").fetchone()[0]
+    od = 0
+    while od < max_id:
+        do = min(od + rozmiar_paczki, max_id)
+        with conn:
+            conn.execute(sql, {'od': od, 'do': do})
+        od = do
+
+
+def przebuduj_tabele(conn: sqlite3.Connection, tabela: str, definicja: str,
+                     wyrazenia: Dict[str, str] = None,
+                     obiekty: Dict[str, Optional[str]] = None) -> None:
+    """
+    Przebudowuje tabelę według nowej definicji (zmiana typu, usunięcie kolumny lub ograniczenia)
+    
+    Procedura zalecana przez SQLite: nowa tabela, skopiowanie wierszy, usunięcie
+    starej tabeli i zmiana nazwy nowej. Indeksy i wyzwalacze tabeli oraz widoki
+    są odtwarzane z sqlite_master, chyba że słownik obiekty podaje dla nich
+    nową definicję. Całość wykonuje się w jednej transakcji BEGIN IMMEDIATE,
+    więc przerwana przebudowa nie zostawia bazy w stanie pośrednim, ale inne
+    połączenia nie mogą pisać do bazy aż do jej końca.
+    
+    Args:
+        conn: Połączenie z bazą danych
+        tabela: Nazwa przebudowywanej tabeli
+        definicja: Definicje kolumn i ograniczeń nowej tabeli (wnętrze CREATE TABLE)
+        wyrazenia: Kolumna nowej tabeli -> wyrażenie SQL na wierszu starej tabeli;
+            pozostałe kolumny o tej samej nazwie są kopiowane wprost
+        obiekty: Nazwa indeksu, wyzwalacza lub widoku -> nowa definicja SQL
+            albo None, jeśli obiekt ma nie zostać odtworzony
+    """
+    wyrazenia = wyrazenia or {}
+    obiekty = obiekty or {}
+    nowa = f"{tabela}_nowa"
+    
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Widoki mogą odwoływać się do tabeli, więc na czas przebudowy są usuwane
+        zapisane = conn.execute('''
+            SELECT type, name, sql FROM sqlite_master
+            WHERE sql IS NOT NULL AND (type = 'view' OR (type IN ('index', 'trigger') AND tbl_name = ?))
+            ORDER BY type = 'view'
+        ''', (tabela,)).fetchall()
+        for typ, nazwa, _ in zapisane:
+            if typ == 'view':
+                conn.execute(f'DROP VIEW "{nazwa}"')
+        
+        conn.execute(f'DROP TABLE IF EXISTS "{nowa}"')
+        conn.execute(f'CREATE TABLE "{nowa}" ({definicja})')
+        
+        stare_kolumny = set(_kolumny_tabeli(conn, tabela))
+        kolumny = [k for k in _kolumny_tabeli(conn, nowa) if k in wyrazenia or k in stare_kolumny]
+        lista = ', '.join(kolumny)
+        wybor = ', '.join(wyrazenia.get(k, k) for k in kolumny)
+        
+        conn.execute(f'INSERT INTO "{nowa}" ({lista}) SELECT {wybor} FROM "{tabela}" ORDER BY id')
+        
+        # Licznik AUTOINCREMENT przenoszony, żeby id usuniętych wierszy nie wróciły
+        sekwencja = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (tabela,)).fetchone()
+        
+        conn.execute(f'DROP TABLE "{tabela}"')
+        conn.execute(f'ALTER TABLE "{nowa}" RENAME TO "{tabela}"')
+        
+        if sekwencja is not None:
+            conn.execute("DELETE FROM sqlite_sequence WHERE name = ?", (tabela,))
+            conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (tabela, sekwencja[0]))
+        
+        for _, nazwa, sql in zapisane:
+            if nazwa not in obiekty:
+                conn.execute(sql)
+        for sql in obiekty.values():
+            if sql is not None:
+                conn.execute(sql)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def _kolumny_tabeli(conn: sqlite3.Connection, tabela: str) -> List[str]:
+    """Zwraca nazwy kolumn tabeli"""
+    return [row[1] for row in conn.execute(f'PRAGMA table_info("{tabela}")')]
+
+
+# Migracja 1: indeksy dla najczęstszych zapytań DatabaseManager
+MIGRACJA_1 = [
+    # Lista rachunków (ORDER BY data_wystawienia), pierwszy/ostatni rachunek
+    "CREATE INDEX IF NOT EXISTS idx_rachunki_data_wystawienia "
+    "ON rachunki(data_wystawienia)",
+    # Przychody miesiąca, rachunki miesiąca, raport miesięczny i roczny
+    "CREATE INDEX IF NOT EXISTS idx_rachunki_okres "
+    "ON rachunki(strftime('%Y', data_wystawienia), strftime('%m', data_wystawienia), kwota_do_zaplaty)",
+    # Top klienci - grupowanie po nabywcy bez odczytu tabeli
+    "CREATE INDEX IF NOT EXISTS idx_rachunki_nabywca "
+    "ON rachunki(nabywca_imie, nabywca_nazwisko, kwota_do_zaplaty, data_wystawienia)",
+    # Lista usuniętych rachunków
+    "CREATE INDEX IF NOT EXISTS idx_usuniete_data_usuniecia "
+    "ON usunięte_rachunki(data_usuniecia)",
+    # Domyślny sprzedawca (ostatnio zapisany)
+    "CREATE INDEX IF NOT EXISTS idx_sprzedawca_data_utworzenia "
+    "ON sprzedawca(data_utworzenia)",
+]
+
+
+# Kolumny rachunków indeksowane przez wyszukiwarkę pełnotekstową
+KOLUMNY_FTS = [
+    'numer_rachunku', 'nabywca_imie', 'nabywca_nazwisko', 'nabywca_ulica',
+    'nabywca_kod_pocztowy', 'nabywca_miasto', 'nazwa_uslugi',
+    'data_wystawienia', 'data_wykonania_uslugi'
+]
+
+
+def fts5_dostepne(conn: sqlite3.Connection) -> bool:
+    """Sprawdza czy biblioteka SQLite obsługuje moduł FTS5"""
+    try:
+        conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS temp.test_fts5 USING fts5(x)")
+        conn.execute("DROP TABLE temp.test_fts5")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def _migracja_2_fts(conn: sqlite3.Connection, rozmiar_paczki: int) -> None:
+    """Tworzy indeks pełnotekstowy rachunków utrzymywany przez wyzwalacze"""
+    if not fts5_dostepne(conn):
+        # Wyszukiwanie pozostaje na LIKE
+        return
+    
+    kolumny = ', '.join(KOLUMNY_FTS)
+    nowe = ', '.join(f'new.{k}' for k in KOLUMNY_FTS)
+    stare = ', '.join(f'old.{k}' for k in KOLUMNY_FTS)
+    
+    with conn:
+        conn.execute(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS rachunki_fts USING fts5(
+                {kolumny},
+                content='rachunki', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS rachunki_fts_ai AFTER INSERT ON rachunki BEGIN
+                INSERT INTO rachunki_fts(rowid, {kolumny}) VALUES (new.id, {nowe});
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS rachunki_fts_ad AFTER DELETE ON rachunki BEGIN
+                INSERT INTO rachunki_fts(rachunki_fts, rowid, {kolumny}) VALUES ('delete', old.id, {stare});
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS rachunki_fts_au AFTER UPDATE ON rachunki BEGIN
+                INSERT INTO rachunki_fts(rachunki_fts, rowid, {kolumny}) VALUES ('delete', old.id, {stare});
+                INSERT INTO rachunki_fts(rowid, {kolumny}) VALUES (new.id, {nowe});
+            END
+        ''')
+        # Powtórzona migracja zaczyna indeksowanie od zera
+        conn.execute("INSERT INTO rachunki_fts(rachunki_fts) VALUES ('delete-all')")
+    
+    aktualizuj_w_paczkach(conn, 'rachunki', f'''
+        INSERT INTO rachunki_fts(rowid, {kolumny})
+        SELECT id, {kolumny} FROM rachunki WHERE id > :od AND id <= :do
+    ''', rozmiar_paczki)
+
+
+# Kwota rachunku w groszach: przed migracją 5 z kolumny REAL, później wprost z kolumny
+GROSZE_REAL = "kwota_gr({0}.kwota_do_zaplaty)"
+GROSZE = "{0}.kwota_do_zaplaty_gr"
+
+# Rok i miesiąc daty wystawienia jako liczby, z {0} w miejscu kolumny daty
+ROK_Z_DATY = "CAST(strftime('%Y', {0}) AS INTEGER)"
+MIESIAC_Z_DATY = "CAST(strftime('%m', {0}) AS INTEGER)"
+
+
+def _kwota_gr(kwota) -> Optional[int]:
+    """
+    Funkcja SQL kwota_gr: kwota REAL w złotych jako grosze, zaokrąglona jak Kwota.z_zlotych
+    
+    ROUND(kwota * 100) w SQLite zaokrągla iloczyn binarny - 1.005 zapisane
+    jako 1.00499999... dałoby 100 groszy zamiast 101, jak przy wpisaniu
+    tej kwoty w aplikacji.
+    """
+    return None if kwota is None else Kwota.z_zlotych(kwota).grosze
+
+
+def _wyzwalacze_agregatu(prefiks: str, dodaj: str, odejmij: str, kolumny: str,
+                         flaga_usuniecia: bool) -> Dict[str, str]:
+    """
+    Składa wyzwalacze wstawienia, usunięcia i aktualizacji rachunku dla tabeli agregatu
+    
+    Przy usuwaniu przez flagę deleted_at agregat liczy tylko aktywne rachunki:
+    oznaczenie rachunku jako usuniętego odejmuje go, a przywrócenie dodaje.
+    
+    Args:
+        prefiks: Początek nazw wyzwalaczy
+        dodaj: Polecenia doliczające wiersz new
+        odejmij: Polecenia odejmujące wiersz old
+        kolumny: Kolumny, których zmiana przelicza agregat
+        flaga_usuniecia: Czy rachunki mają kolumnę deleted_at
+        
+    Returns:
+        Słownik nazwa wyzwalacza -> CREATE TRIGGER
+    """
+    if not flaga_usuniecia:
+        return {
+            f'{prefiks}_ai': f"CREATE TRIGGER IF NOT EXISTS {prefiks}_ai AFTER INSERT ON rachunki BEGIN {dodaj} END",
+            f'{prefiks}_ad': f"CREATE TRIGGER IF NOT EXISTS {prefiks}_ad AFTER DELETE ON rachunki BEGIN {odejmij} END",
+            f'{prefiks}_au': f'''
+                CREATE TRIGGER IF NOT EXISTS {prefiks}_au
+                AFTER UPDATE OF {kolumny} ON rachunki BEGIN {odejmij} {dodaj} END
+            ''',
+        }
+    
+    return {
+        f'{prefiks}_ai': f'''
+            CREATE TRIGGER IF NOT EXISTS {prefiks}_ai AFTER INSERT ON rachunki
+            WHEN new.deleted_at IS NULL BEGIN {dodaj} END
+        ''',
+        f'{prefiks}_ad': f'''
+            CREATE TRIGGER IF NOT EXISTS {prefiks}_ad AFTER DELETE ON rachunki
+            WHEN old.deleted_at IS NULL BEGIN {odejmij} END
+        ''',
+        f'{prefiks}_au_stary': f'''
+            CREATE TRIGGER IF NOT EXISTS {prefiks}_au_stary AFTER UPDATE OF {kolumny}, deleted_at ON rachunki
+            WHEN old.deleted_at IS NULL BEGIN {odejmij} END
+        ''',
+        f'{prefiks}_au_nowy': f'''
+            CREATE TRIGGER IF NOT EXISTS {prefiks}_au_nowy AFTER UPDATE OF {kolumny}, deleted_at ON rachunki
+            WHEN new.deleted_at IS NULL BEGIN {dodaj} END
+        ''',
+    }
+
+
+def _wyzwalacze_przychodow(grosze: str, kolumna_kwoty: str,
+                           flaga_usuniecia: bool = False,
+                           kolumny_okresu: bool = False) -> Dict[str, str]:
+    """
+    Zwraca definicje wyzwalaczy utrzymujących tabelę przychody_miesieczne
+    
+    Args:
+        grosze: Wyrażenie kwoty w groszach z {0} w miejscu aliasu wiersza
+        kolumna_kwoty: Kolumna kwoty obserwowana przez wyzwalacz aktualizacji
+        flaga_usuniecia: Czy liczyć tylko rachunki z deleted_at IS NULL
+        kolumny_okresu: Czy rachunki mają generowane kolumny rok i miesiac
+        
+    Returns:
+        Słownik nazwa wyzwalacza -> CREATE TRIGGER
+    """
+    if kolumny_okresu:
+        rok = "{0}.rok"
+        miesiac = "{0}.miesiac"
+    else:
+        rok = ROK_Z_DATY.format("{0}.data_wystawienia")
+        miesiac = MIESIAC_Z_DATY.format("{0}.data_wystawienia")
+    
+    dodaj = f'''
+        INSERT INTO przychody_miesieczne (rok, miesiac, liczba, suma_gr, min_gr, max_gr)
+        VALUES ({rok.format('new')}, {miesiac.format('new')}, 1,
+                {grosze.format('new')}, {grosze.format('new')}, {grosze.format('new')})
+        ON CONFLICT (rok, miesiac) DO UPDATE SET
+            liczba = liczba + 1,
+            suma_gr = suma_gr + excluded.suma_gr,
+            min_gr = MIN(min_gr, excluded.min_gr),
+            max_gr = MAX(max_gr, excluded.max_gr);
+    '''
+    # Minimum i maksimum po usunięciu liczone są ponownie z indeksu idx_rachunki_okres;
+    # po ostatnim rachunku miesiąca wiersz agregatu i tak jest zaraz usuwany
+    if kolumny_okresu:
+        okres_old = "rok = old.rok AND miesiac = old.miesiac"
+    else:
+        okres_old = (f"strftime('%Y', data_wystawienia) = strftime('%Y', old.data_wystawienia) "
+                     f"AND strftime('%m', data_wystawienia) = strftime('%m', old.data_wystawienia)")
+    if flaga_usuniecia:
+        okres_old += " AND deleted_at IS NULL"
+    odejmij = f'''
+        UPDATE przychody_miesieczne SET
+            liczba = liczba - 1,
+            suma_gr = suma_gr - {grosze.format('old')},
+            min_gr = CASE WHEN {grosze.format('old')} <= min_gr THEN
+                COALESCE((SELECT MIN({grosze.format('rachunki')}) FROM rachunki WHERE {okres_old}), 0)
+                ELSE min_gr END,
+            max_gr = CASE WHEN {grosze.format('old')} >= max_gr THEN
+                COALESCE((SELECT MAX({grosze.format('rachunki')}) FROM rachunki WHERE {okres_old}), 0)
+                ELSE max_gr END
+        WHERE rok = {rok.format('old')} AND miesiac = {miesiac.format('old')};
+        DELETE FROM przychody_miesieczne
+        WHERE rok = {rok.format('old')} AND miesiac = {miesiac.format('old')} AND liczba <= 0;
+    '''
+    
+    return _wyzwalacze_agregatu('przychody', dodaj, odejmij,
+                                f'data_wystawienia, {kolumna_kwoty}', flaga_usuniecia)
+
+
+def _migracja_3_przychody_miesieczne(conn: sqlite3.Connection, rozmiar_paczki: int) -> None:
+    """
+    Tworzy tabelę przychodów miesięcznych utrzymywaną przez wyzwalacze
+    
+    Kwoty agregatu są przechowywane w groszach, więc sumy pozostają
+    dokładne niezależnie od liczby dodanych i usuniętych rachunków.
+    """
+    rok = ROK_Z_DATY.format("{0}.data_wystawienia")
+    miesiac = MIESIAC_Z_DATY.format("{0}.data_wystawienia")
+    grosze = GROSZE_REAL
+    
+    # Wyzwalacze i granica uzupełniania w jednej transakcji - rachunki dodane
+    # później liczą wyzwalacze, wcześniejsze uzupełnia migracja
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS przychody_miesieczne (
+                rok INTEGER NOT NULL,
+                miesiac INTEGER NOT NULL,
+                liczba INTEGER NOT NULL,
+                suma_gr INTEGER NOT NULL,
+                min_gr INTEGER NOT NULL,
+                max_gr INTEGER NOT NULL,
+                PRIMARY KEY (rok, miesiac)
+            ) WITHOUT ROWID
+        ''')
+        for sql in _wyzwalacze_przychodow(GROSZE_REAL, 'kwota_do_zaplaty').values():
+            conn.execute(sql)
+        conn.execute("DELETE FROM przychody_miesieczne")
+        max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM rachunki").fetchone()[0]
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    
+    aktualizuj_w_paczkach(conn, 'rachunki', f'''
+        INSERT INTO przychody_miesieczne (rok, miesiac, liczba, suma_gr, min_gr, max_gr)
+        SELECT {rok.format('r')}, {miesiac.format('r')}, COUNT(*),
+               SUM({grosze.format('r')}), MIN({grosze.format('r')}), MAX({grosze.format('r')})
+        FROM rachunki r
+        WHERE r.id > :od AND r.id <= :do
+        GROUP BY 1, 2
+        ON CONFLICT (rok, miesiac) DO UPDATE SET
+            liczba = liczba + excluded.liczba,
+            suma_gr = suma_gr + excluded.suma_gr,
+            min_gr = MIN(min_gr, excluded.min_gr),
+            max_gr = MAX(max_gr, excluded.max_gr)
+    ''', rozmiar_paczki, max_id)
+
+
+def _wyzwalacze_klientow(grosze: str, kolumna_kwoty: str,
+                         flaga_usuniecia: bool = False) -> Dict[str, str]:
+    """
+    Zwraca definicje wyzwalaczy utrzymujących agregaty tabeli klienci
+    
+    Args:
+        grosze: Wyrażenie kwoty w groszach z {0} w miejscu aliasu wiersza
+        kolumna_kwoty: Kolumna kwoty obserwowana przez wyzwalacz aktualizacji
+        flaga_usuniecia: Czy liczyć tylko rachunki z deleted_at IS NULL
+        
+    Returns:
+        Słownik nazwa wyzwalacza -> CREATE TRIGGER
+    """
+    aktywne = " AND deleted_at IS NULL" if flaga_usuniecia else ""
+    dodaj = f'''
+        UPDATE klienci SET
+            liczba_rachunkow = liczba_rachunkow + 1,
+            suma_gr = suma_gr + {grosze.format('new')},
+            ostatni_rachunek = CASE
+                WHEN ostatni_rachunek IS NULL OR new.data_wystawienia > ostatni_rachunek
+                THEN new.data_wystawienia ELSE ostatni_rachunek END
+        WHERE id = new.klient_id;
+    '''
+    odejmij = f'''
+        UPDATE klienci SET
+            liczba_rachunkow = liczba_rachunkow - 1,
+            suma_gr = suma_gr - {grosze.format('old')},
+            ostatni_rachunek = CASE
+                WHEN old.data_wystawienia >= ostatni_rachunek
+                THEN (SELECT MAX(data_wystawienia) FROM rachunki WHERE klient_id = old.klient_id{aktywne})
+                ELSE ostatni_rachunek END
+        WHERE id = old.klient_id;
+    '''
+    
+    return _wyzwalacze_agregatu('klienci', dodaj, odejmij,
+                                f'klient_id, data_wystawienia, {kolumna_kwoty}', flaga_usuniecia)
+
+
+def _migracja_4_klienci_schemat(conn: sqlite3.Connection, rozmiar_paczki: int) -> None:
+    """Tworzy tabelę klientów z agregatami utrzymywanymi przez wyzwalacze"""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS klienci (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                klucz TEXT UNIQUE NOT NULL,
+                imie TEXT NOT NULL,
+                nazwisko TEXT NOT NULL,
+                liczba_rachunkow INTEGER NOT NULL DEFAULT 0,
+                suma_gr INTEGER NOT NULL DEFAULT 0,
+                ostatni_rachunek DATE,
+                data_utworzenia TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        if 'klient_id' not in _kolumny_tabeli(conn, 'rachunki'):
+            conn.execute("ALTER TABLE rachunki ADD COLUMN klient_id INTEGER REFERENCES klienci(id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_rachunki_klient ON rachunki(klient_id, data_wystawienia)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_klienci_suma ON klienci(suma_gr)")
+        
+        for sql in _wyzwalacze_klientow(GROSZE_REAL, 'kwota_do_zaplaty').values():
+            conn.execute(sql)
+        
+        # Indeks FTS odświeżany tylko przy zmianie indeksowanych kolumn,
+        # a nie np. przy uzupełnianiu klient_id
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'rachunki_fts_au'").fetchone():
+            kolumny = ', '.join(KOLUMNY_FTS)
+            nowe = ', '.join(f'new.{k}' for k in KOLUMNY_FTS)
+            stare = ', '.join(f'old.{k}' for k in KOLUMNY_FTS)
+            conn.execute("DROP TRIGGER rachunki_fts_au")
+            conn.execute(f'''
+                CREATE TRIGGER rachunki_fts_au AFTER UPDATE OF {kolumny} ON rachunki BEGIN
+                    INSERT INTO rachunki_fts(rachunki_fts, rowid, {kolumny}) VALUES ('delete', old.id, {stare});
+                    INSERT INTO rachunki_fts(rowid, {kolumny}) VALUES (new.id, {nowe});
+                END
+            ''')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def _migracja_4_klienci_dane(conn: sqlite3.Connection, rozmiar_paczki: int) -> None:
+    """Przypisuje istniejące rachunki do klientów, paczkami"""
+    max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM rachunki").fetchone()[0]
+    od = 0
+    while od < max_id:
+        do = min(od + rozmiar_paczki, max_id)
+        with conn:
+            wiersze = conn.execute('''
+                SELECT id, nabywca_imie, nabywca_nazwisko FROM rachunki
+                WHERE id > ? AND id <= ? AND klient_id IS NULL
+            ''', (od, do)).fetchall()
+            
+            klucze = {}
+            for _, imie, nazwisko in wiersze:
+                klucz = WalidatorDanych.normalizuj_klucz_klienta(imie, nazwisko)
+                klucze.setdefault(klucz, (imie.strip(), nazwisko.strip()))
+            conn.executemany(
+                "INSERT OR IGNORE INTO klienci (klucz, imie, nazwisko) VALUES (?, ?, ?)",
+                [(klucz, imie, nazwisko) for klucz, (imie, nazwisko) in klucze.items()]
+            )
+            
+            id_klientow = {}
+            for klucz in klucze:
+                id_klientow[klucz] = conn.execute(
+                    "SELECT id FROM klienci WHERE klucz = ?", (klucz,)
+                ).fetchone()[0]
+            
+            # Aktualizacja klient_id uzupełnia agregaty przez wyzwalacz klienci_au
+            conn.executemany("UPDATE rachunki SET klient_id = ? WHERE id = ?", [
+                (id_klientow[WalidatorDanych.normalizuj_klucz_klienta(imie, nazwisko)], rachunek_id)
+                for rachunek_id, imie, nazwisko in wiersze
+            ])
+        od = do
+
+
+# Kolumny wspólne dla rachunków i usuniętych rachunków po migracji 5
+KOLUMNY_RACHUNKU_GR = '''
+    numer_rachunku TEXT {unikalny}NOT NULL,
+    data_wystawienia DATE NOT NULL,
+    data_wykonania_uslugi DATE NOT NULL,
+    
+    sprzedawca_imie TEXT NOT NULL,
+    sprzedawca_nazwisko TEXT NOT NULL,
+    sprzedawca_ulica TEXT NOT NULL,
+    sprzedawca_nr_domu TEXT NOT NULL,
+    sprzedawca_kod_pocztowy TEXT NOT NULL,
+    sprzedawca_miasto TEXT NOT NULL,
+    
+    nabywca_imie TEXT NOT NULL,
+    nabywca_nazwisko TEXT NOT NULL,
+    nabywca_ulica TEXT NOT NULL,
+    nabywca_nr_domu TEXT NOT NULL,
+    nabywca_kod_pocztowy TEXT NOT NULL,
+    nabywca_miasto TEXT NOT NULL,
+    
+    nazwa_uslugi TEXT NOT NULL,
+    cena_jednostkowa_gr INTEGER NOT NULL,
+    kwota_do_zaplaty_gr INTEGER NOT NULL,
+    kwota_slownie TEXT NOT NULL,
+    
+    plik_pdf TEXT,
+'''
+
+
+def _migracja_5_kwoty_w_groszach(conn: sqlite3.Connection, rozmiar_paczki: int) -> None:
+    """
+    Zamienia kolumny kwot REAL na liczby całkowite groszy
+    
+    Tabele są przebudowywane, a wyzwalacze agregatów i indeks okresu
+    tworzone od nowa na kolumnie kwoty w groszach.
+    """
+    wyrazenia = {
+        'cena_jednostkowa_gr': "kwota_gr(cena_jednostkowa)",
+        'kwota_do_zaplaty_gr': "kwota_gr(kwota_do_zaplaty)",
+    }
+    
+    if 'kwota_do_zaplaty' in _kolumny_tabeli(conn, 'rachunki'):
+        obiekty = {
+            'idx_rachunki_okres':
+                "CREATE INDEX idx_rachunki_okres ON rachunki(strftime('%Y', data_wystawienia), "
+                "strftime('%m', data_wystawienia), kwota_do_zaplaty_gr)",
+            # Top klienci korzystają z tabeli klienci
+            'idx_rachunki_nabywca': None,
+        }
+        obiekty.update(_wyzwalacze_przychodow(GROSZE, 'kwota_do_zaplaty_gr'))
+        obiekty.update(_wyzwalacze_klientow(GROSZE, 'kwota_do_zaplaty_gr'))
+        
+        przebuduj_tabele(conn, 'rachunki', '''
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ''' + KOLUMNY_RACHUNKU_GR.format(unikalny='UNIQUE ') + '''
+            data_utworzenia TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            klient_id INTEGER REFERENCES klienci(id)
+        ''', wyrazenia, obiekty)
+    
+    if 'kwota_do_zaplaty' in _kolumny_tabeli(conn, 'usunięte_rachunki'):
+        przebuduj_tabele(conn, 'usunięte_rachunki', '''
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            original_id INTEGER NOT NULL,
+        ''' + KOLUMNY_RACHUNKU_GR.format(unikalny='') + '''
+            data_utworzenia TIMESTAMP,
+            data_usuniecia TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            powod_usuniecia TEXT
+        ''', wyrazenia)
+
+
+def _migracja_6_flaga_usuniecia(conn: sqlite3.Connection, rozmiar_paczki: int) -> None:
+    """
+    Dodaje do rachunków flagę usunięcia (deleted_at, powod_usuniecia)
+    
+    Numer rachunku jest unikalny tylko wśród aktywnych rachunków, a indeksy
+    list i agregatów są częściowe (WHERE deleted_at IS NULL), więc usunięte
+    rachunki nie spowalniają zapytań o aktywne.
+    """
+    if 'deleted_at' in _kolumny_tabeli(conn, 'rachunki'):
+        return
+    
+    obiekty = {
+        'idx_rachunki_numer':
+            "CREATE UNIQUE INDEX idx_rachunki_numer ON rachunki(numer_rachunku) WHERE deleted_at IS NULL",
+        'idx_rachunki_data_wystawienia':
+            "CREATE INDEX idx_rachunki_data_wystawienia ON rachunki(data_wystawienia) WHERE deleted_at IS NULL",
+        'idx_rachunki_okres':
+            "CREATE INDEX idx_rachunki_okres ON rachunki(strftime('%Y', data_wystawienia), "
+            "strftime('%m', data_wystawienia), kwota_do_zaplaty_gr) WHERE deleted_at IS NULL",
+        'idx_rachunki_klient':
+            "CREATE INDEX idx_rachunki_klient ON rachunki(klient_id, data_wystawienia) WHERE deleted_at IS NULL",
+        'idx_rachunki_usuniete':
+            "CREATE INDEX idx_rachunki_usuniete ON rachunki(deleted_at) WHERE deleted_at IS NOT NULL",
+        'przychody_au': None,
+        'klienci_au': None,
+    }
+    obiekty.update(_wyzwalacze_przychodow(GROSZE, 'kwota_do_zaplaty_gr', flaga_usuniecia=True))
+    obiekty.update(_wyzwalacze_klientow(GROSZE, 'kwota_do_zaplaty_gr', flaga_usuniecia=True))
+    
+    przebuduj_tabele(conn, 'rachunki', '''
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ''' + KOLUMNY_RACHUNKU_GR.format(unikalny='') + '''
+        data_utworzenia TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        klient_id INTEGER REFERENCES klienci(id),
+        deleted_at TIMESTAMP,
+        powod_usuniecia TEXT
+    ''', obiekty=obiekty)
+
+
+def _migracja_6_usuniete_rachunki(conn: sqlite3.Connection, rozmiar_paczki: int) -> None:
+    """Przenosi usunięte rachunki do tabeli rachunki i zastępuje tabelę widokiem"""
+    typ = conn.execute("SELECT type FROM sqlite_master WHERE name = 'usunięte_rachunki'").fetchone()
+    if typ and typ[0] == 'view':
+        return
+    
+    kolumny = [k for k in _kolumny_tabeli(conn, 'usunięte_rachunki')
+               if k not in ('id', 'original_id', 'data_usuniecia', 'powod_usuniecia')]
+    lista = ', '.join(kolumny)
+    
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        wiersze = conn.execute(f'''
+            SELECT original_id, {lista}, data_usuniecia, powod_usuniecia
+            FROM usunięte_rachunki ORDER BY id
+        ''').fetchall()
+        
+        for wiersz in wiersze:
+            original_id, dane = wiersz[0], wiersz[1:]
+            # Rachunek wraca pod swoim dawnym id, chyba że jest ono zajęte
+            if conn.execute("SELECT 1 FROM rachunki WHERE id = ?", (original_id,)).fetchone():
+                original_id = None
+            
+            imie, nazwisko = dane[kolumny.index('nabywca_imie')], dane[kolumny.index('nabywca_nazwisko')]
+            klucz = WalidatorDanych.normalizuj_klucz_klienta(imie, nazwisko)
+            conn.execute("INSERT OR IGNORE INTO klienci (klucz, imie, nazwisko) VALUES (?, ?, ?)",
+                         (klucz, imie.strip(), nazwisko.strip()))
+            klient_id = conn.execute("SELECT id FROM klienci WHERE klucz = ?", (klucz,)).fetchone()[0]
+            
+            conn.execute(f'''
+                INSERT INTO rachunki (id, {lista}, deleted_at, powod_usuniecia, klient_id)
+                VALUES ({', '.join('?' * (len(kolumny) + 4))})
+            ''', (original_id, *dane, klient_id))
+        
+        conn.execute("DROP TABLE usunięte_rachunki")
+        conn.execute(f'''
+            CREATE VIEW usunięte_rachunki AS
+            SELECT id, id AS original_id, {lista},
+                   deleted_at AS data_usuniecia, powod_usuniecia
+            FROM rachunki
+            WHERE deleted_at IS NOT NULL
+        ''')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def _migracja_7_kolumny_okresu(conn: sqlite3.Connection, rozmiar_paczki: int) -> None:
+    """
+    Dodaje do rachunków generowane kolumny rok i miesiac z indeksem złożonym
+    
+    Kolumny są wirtualne (ALTER TABLE nie przepisuje tabeli), a ich wartości
+    przechowuje indeks idx_rachunki_okres, który zastępuje indeks na wyrażeniach
+    strftime. Wyzwalacze przychodów miesięcznych porównują rok i miesiac zamiast
+    wywoływać strftime dla każdego wiersza.
+    """
+    # table_info pomija kolumny generowane, table_xinfo je zawiera
+    if 'rok' in [row[1] for row in conn.execute("PRAGMA table_xinfo(rachunki)")]:
+        return
+    
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(f"ALTER TABLE rachunki ADD COLUMN rok INTEGER "
+                     f"GENERATED ALWAYS AS ({ROK_Z_DATY.format('data_wystawienia')}) VIRTUAL")
+        conn.execute(f"ALTER TABLE rachunki ADD COLUMN miesiac INTEGER "
+                     f"GENERATED ALWAYS AS ({MIESIAC_Z_DATY.format('data_wystawienia')}) VIRTUAL")
+        conn.execute("DROP INDEX IF EXISTS idx_rachunki_okres")
+        conn.execute("CREATE INDEX idx_rachunki_okres ON rachunki(rok, miesiac, kwota_do_zaplaty_gr) "
+                     "WHERE deleted_at IS NULL")
+        
+        wyzwalacze = _wyzwalacze_przychodow(GROSZE, 'kwota_do_zaplaty_gr',
+                                            flaga_usuniecia=True, kolumny_okresu=True)
+        for nazwa, sql in wyzwalacze.items():
+            conn.execute(f"DROP TRIGGER IF EXISTS {nazwa}")
+            conn.execute(sql)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+# Migracja 8: tabela sprzedawca przechowuje tylko najnowsze dane (rachunki mają własną kopię)
+MIGRACJA_8 = [
+    "DELETE FROM sprzedawca WHERE id < (SELECT MAX(id) FROM sprzedawca)",
+]
+
+
+# Migracja 9: dziennik konserwacji bazy (konserwacja.py)
+MIGRACJA_9 = [
+    '''
+    CREATE TABLE IF NOT EXISTS konserwacja (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        data_wykonania TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        krok TEXT NOT NULL,
+        czas_ms REAL NOT NULL,
+        szczegoly TEXT
+    )
+    ''',
+]
+
+
+# Pola danych sprzedawcy (tabela sprzedawca, snapshoty i słownik rachunku), w kolejności skrótu
+POLA_SPRZEDAWCY = ('imie', 'nazwisko', 'ulica', 'nr_domu', 'kod_pocztowy', 'miasto')
+
+SCHEMAT_SPRZEDAWCA_SNAPSHOT = '''
+    CREATE TABLE IF NOT EXISTS sprzedawca_snapshot (
+        id INTEGER PRIMARY KEY,
+        skrot TEXT NOT NULL UNIQUE,
+        imie TEXT NOT NULL,
+        nazwisko TEXT NOT NULL,
+        ulica TEXT NOT NULL,
+        nr_domu TEXT NOT NULL,
+        kod_pocztowy TEXT NOT NULL,
+        miasto TEXT NOT NULL
+    )
+'''
+
+# Widok usuniętych rachunków z danymi sprzedawcy ze snapshotu. LEFT JOIN po kluczu
+# głównym SQLite pomija, gdy zapytanie nie czyta kolumn sprzedawcy (lista usuniętych).
+WIDOK_USUNIETYCH_RACHUNKOW = '''
+    CREATE VIEW usunięte_rachunki AS
+    SELECT rachunki.id, rachunki.id AS original_id, numer_rachunku, data_wystawienia, data_wykonania_uslugi,
+           s.imie AS sprzedawca_imie, s.nazwisko AS sprzedawca_nazwisko, s.ulica AS sprzedawca_ulica,
+           s.nr_domu AS sprzedawca_nr_domu, s.kod_pocztowy AS sprzedawca_kod_pocztowy,
+           s.miasto AS sprzedawca_miasto,
+           nabywca_imie, nabywca_nazwisko, nabywca_ulica, nabywca_nr_domu, nabywca_kod_pocztowy,
+           nabywca_miasto, nazwa_uslugi, cena_jednostkowa_gr, kwota_do_zaplaty_gr, kwota_slownie,
+           plik_pdf, data_utworzenia, deleted_at AS data_usuniecia, powod_usuniecia
+    FROM rachunki
+    LEFT JOIN sprzedawca_snapshot s ON s.id = rachunki.sprzedawca_id
+    WHERE deleted_at IS NOT NULL
+'''
+
+
+def skrot_sprzedawcy(*pola: str) -> str:
+    """
+    Zwraca skrót SHA-256 danych sprzedawcy, który identyfikuje snapshot
+    
+    Args:
+        pola: Wartości pól w kolejności POLA_SPRZEDAWCY, dokładnie jak na rachunku
+        
+    Returns:
+        Skrót szesnastkowy
+    """
+    return hashlib.sha256(json.dumps(pola, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def _sprzedawca_w_snapshotach(conn: sqlite3.Connection,
+                              obiekty: Dict[str, Optional[str]]) -> None:
+    """
+    Zastępuje sześć kolumn sprzedawcy rachunków odwołaniem do sprzedawca_snapshot
+    
+    Każde różne dane sprzedawcy trafiają do snapshotów raz (po skrócie
+    treści), a rachunki są przebudowywane z kolumną sprzedawca_id.
+    """
+    if 'sprzedawca_id' in _kolumny_tabeli(conn, 'rachunki'):
+        return
+    
+    kolumny = ', '.join(f"sprzedawca_{pole}" for pole in POLA_SPRZEDAWCY)
+    conn.create_function('skrot_sprzedawcy', len(POLA_SPRZEDAWCY), skrot_sprzedawcy, deterministic=True)
+    with conn:
+        conn.execute(SCHEMAT_SPRZEDAWCA_SNAPSHOT)
+        conn.execute(f'''
+            INSERT OR IGNORE INTO sprzedawca_snapshot (skrot, {', '.join(POLA_SPRZEDAWCY)})
+            SELECT skrot_sprzedawcy({kolumny}), {kolumny}
+            FROM (SELECT DISTINCT {kolumny} FROM rachunki)
+        ''')
+    
+    przebuduj_tabele(conn, 'rachunki', f'''
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        numer_rachunku TEXT NOT NULL,
+        data_wystawienia DATE NOT NULL,
+        data_wykonania_uslugi DATE NOT NULL,
+        
+        sprzedawca_id INTEGER NOT NULL REFERENCES sprzedawca_snapshot(id),
+        
+        nabywca_imie TEXT NOT NULL,
+        nabywca_nazwisko TEXT NOT NULL,
+        nabywca_ulica TEXT NOT NULL,
+        nabywca_nr_domu TEXT NOT NULL,
+        nabywca_kod_pocztowy TEXT NOT NULL,
+        nabywca_miasto TEXT NOT NULL,
+        
+        nazwa_uslugi TEXT NOT NULL,
+        cena_jednostkowa_gr INTEGER NOT NULL,
+        kwota_do_zaplaty_gr INTEGER NOT NULL,
+        kwota_slownie TEXT NOT NULL,
+        
+        plik_pdf TEXT,
+        data_utworzenia TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        klient_id INTEGER REFERENCES klienci(id),
+        deleted_at TIMESTAMP,
+        powod_usuniecia TEXT,
+        rok INTEGER GENERATED ALWAYS AS ({ROK_Z_DATY.format('data_wystawienia')}) VIRTUAL,
+        miesiac INTEGER GENERATED ALWAYS AS ({MIESIAC_Z_DATY.format('data_wystawienia')}) VIRTUAL
+    ''', wyrazenia={
+        'sprzedawca_id': f"(SELECT id FROM sprzedawca_snapshot WHERE skrot = skrot_sprzedawcy({kolumny}))",
+    }, obiekty=obiekty)
+
+
+def _migracja_10_sprzedawca_snapshot(conn: sqlite3.Connection, rozmiar_paczki: int) -> None:
+    """Przenosi dane sprzedawcy rachunków do snapshotów i odtwarza widok usuniętych rachunków"""
+    _sprzedawca_w_snapshotach(conn, {'usunięte_rachunki': WIDOK_USUNIETYCH_RACHUNKOW})
+
+
+def _migracja_10_archiwa(conn: sqlite3.Connection, rozmiar_paczki: int) -> None:
+    """Przenosi dane sprzedawcy do snapshotów w archiwach rocznych (archiwum.py) obok bazy"""
+    sciezka = next((plik for _, nazwa, plik in conn.execute("PRAGMA database_list") if nazwa == 'main'), '')
+    if not sciezka:
+        return
+    
+    for plik in archiwum.lista_archiwow(sciezka).values():
+        polaczenie = sqlite3.connect(plik)
+        try:
+            _sprzedawca_w_snapshotach(polaczenie, {})
+        finally:
+            polaczenie.close()
+
+
+MIGRACJE: List[Tuple[int, str, List[Krok]]] = [
+    (1, "Indeksy dla najczęstszych zapytań", MIGRACJA_1),
+    (2, "Wyszukiwanie pełnotekstowe FTS5", [_migracja_2_fts]),
+    (3, "Tabela przychodów miesięcznych", [_migracja_3_przychody_miesieczne]),
+    (4, "Znormalizowana tabela klientów", [_migracja_4_klienci_schemat, _migracja_4_klienci_dane]),
+    (5, "Kwoty w groszach", [_migracja_5_kwoty_w_groszach]),
+    (6, "Usuwanie rachunków przez flagę", [_migracja_6_flaga_usuniecia, _migracja_6_usuniete_rachunki]),
+    (7, "Generowane kolumny roku i miesiąca", [_migracja_7_kolumny_okresu]),
+    (8, "Tylko najnowsze dane sprzedawcy", MIGRACJA_8),
+    (9, "Dziennik konserwacji bazy", MIGRACJA_9),
+    (10, "Snapshoty danych sprzedawcy", [_migracja_10_sprzedawca_snapshot, _migracja_10_archiwa]),
+]
+
+
+def wykonaj_migracje(conn: sqlite3.Connection, rozmiar_paczki: int = None) -> List[int]:
+    """
+    Podnosi schemat bazy danych do najnowszej wersji
+
+    Args:
+        conn: Połączenie z bazą danych
+        rozmiar_paczki: Liczba wierszy przetwarzanych w jednej transakcji
+
+    Returns:
+        Lista numerów wykonanych migracji
+    """
+    if rozmiar_paczki is None:
+        rozmiar_paczki = config.DB_MIGRATION_CHUNK_SIZE
+
+    wykonane = []
+    obecna = wersja_schematu(conn)
+    # Migracje 3-5 przeliczają kwoty REAL na grosze (GROSZE_REAL)
+    conn.create_function('kwota_gr', 1, _kwota_gr)
+
+    for wersja, opis, kroki in MIGRACJE:
+        if wersja <= obecna:
+            continue
+
+        for krok in kroki:
+            if callable(krok):
+                krok(conn, rozmiar_paczki)
+            else:
+                with conn:
+                    conn.execute(krok)
+
+        with conn:
+            conn.execute(f"PRAGMA user_version = {wersja}")
+        wykonane.append(wersja)
+
+    return wykonane
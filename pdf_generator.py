@@ -14,6 +14,7 @@ from reportlab.lib.fonts import addMapping
 import os
 from typing import Dict
 from datetime import datetime
+from pieniadze import Kwota
 
 class PDFGenerator:
     """Klasa odpowiedzialna za generowanie rachunków PDF"""
@@ -233,12 +234,12 @@ class PDFGenerator:
         # Data miejsca wystawienia
         c.drawString(3*cm, y_pos, f"Miejsce i data: ........................., dnia {datetime.now().strftime('%d.%m.%Y')}")
 
-def kwota_slownie(kwota: float) -> str:
+def kwota_slownie(kwota) -> str:
     """
     Konwertuje kwotę liczbową na słowną reprezentację w języku polskim
     
     Args:
-        kwota: Kwota do konwersji
+        kwota: Kwota do konwersji (Kwota lub liczba w złotych)
         
     Returns:
         Kwota zapisana słownie
@@ -247,8 +248,7 @@ def kwota_slownie(kwota: float) -> str:
         from num2words import num2words
         
         # Rozdzielenie na złote i grosze
-        zlote = int(kwota)
-        grosze = int(round((kwota - zlote) * 100))
+        zlote, grosze = divmod(Kwota.z_zlotych(kwota).grosze, 100)
         
         # Konwersja złotych
         zlote_slownie = num2words(zlote, lang='pl')
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Moduł z typem pieniężnym przechowującym kwoty w groszach
+
+Kwoty w bazie danych są liczbami całkowitymi groszy, a Kwota pozwala liczyć
+i porównywać je bez błędów zaokrągleń arytmetyki zmiennoprzecinkowej.
+"""
+
+from decimal import Decimal, ROUND_HALF_UP
+from functools import total_ordering
+from typing import Union
+
+Wartosc = Union['Kwota', int, float, str, Decimal]
+
+
+@total_ordering
+class Kwota:
+    """Niezmienna kwota w złotych przechowywana jako całkowita liczba groszy"""
+
+    __slots__ = ('_grosze',)
+
+    def __init__(self, grosze: int = 0):
+        object.__setattr__(self, '_grosze', int(grosze))
+
+    def __setattr__(self, nazwa, wartosc):
+        raise AttributeError("Kwota jest niezmienna")
+
+    @classmethod
+    def z_zlotych(cls, wartosc: Wartosc) -> 'Kwota':
+        """
+        Tworzy kwotę z wartości w złotych
+
+        Args:
+            wartosc: Kwota w złotych (liczba, Decimal lub tekst "12,50")
+
+        Returns:
+            Kwota zaokrąglona do pełnych groszy (połówki w górę)
+        """
+        if isinstance(wartosc, Kwota):
+            return wartosc
+        if isinstance(wartosc, str):
+            wartosc = wartosc.strip().replace(',', '.').replace(' ', '')
+        elif isinstance(wartosc, float):
+            # repr float to najkrótszy zapis dziesiętny, np. 0.1 a nie 0.1000000000000000055
+            wartosc = repr(wartosc)
+        grosze = (Decimal(wartosc) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP)
+        return cls(int(grosze))
+
+    @property
+    def grosze(self) -> int:
+        """Kwota w groszach"""
+        return self._grosze
+
+    @property
+    def zlote(self) -> Decimal:
+        """Dokładna kwota w złotych"""
+        return Decimal(self._grosze).scaleb(-2)
+
+    def __add__(self, inna: Wartosc) -> 'Kwota':
+        return Kwota(self._grosze + Kwota.z_zlotych(inna)._grosze)
+
+    def __radd__(self, inna: Wartosc) -> 'Kwota':
+        # Pozwala na sum(kwoty) zaczynające od 0
+        return self + inna
+
+    def __sub__(self, inna: Wartosc) -> 'Kwota':
+        return Kwota(self._grosze - Kwota.z_zlotych(inna)._grosze)
+
+    def __rsub__(self, inna: Wartosc) -> 'Kwota':
+        return Kwota.z_zlotych(inna) - self
+
+    def __mul__(self, ile: int) -> 'Kwota':
+        if not isinstance(ile, int):
+            return NotImplemented
+        return Kwota(self._grosze * ile)
+
+    __rmul__ = __mul__
+
+    def __neg__(self) -> 'Kwota':
+        return Kwota(-self._grosze)
+
+    def __eq__(self, inna) -> bool:
+        try:
+            return self._grosze == Kwota.z_zlotych(inna)._grosze
+        except (ArithmeticError, ValueError, TypeError):
+            return NotImplemented
+
+    def __lt__(self, inna: Wartosc) -> bool:
+        return self._grosze < Kwota.z_zlotych(inna)._grosze
+
+    def __hash__(self) -> int:
+        return hash(self._grosze)
+
+    def __bool__(self) -> bool:
+        return self._grosze != 0
+
+    def __float__(self) -> float:
+        return self._grosze / 100
+
+    def __format__(self, spec: str) -> str:
+        return format(self.zlote, spec or '.2f')
+
+    def __str__(self) -> str:
+        return format(self, '.2f')
+
+    def __repr__(self) -> str:
+        return f"Kwota('{self}')"
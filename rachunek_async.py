@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Moduł z asynchroniczną fasadą RachunekManager dla usług asyncio
+
+Wywołania RachunekManager blokują wątek do zakończenia zapytań SQLite,
+więc w usłudze asyncio wstrzymywałyby pętlę zdarzeń. RachunekManagerAsync
+wykonuje je kolejno w osobnym wątku bazy danych - DatabaseManager
+przydziela połączenie na wątek, więc wątek ma własne połączenie - a pętla
+zdarzeń tylko czeka na wynik:
+
+    async with RachunekManagerAsync("rachunki.db") as manager:
+        strona = await manager.pobierz_strone_rachunkow()
+
+Każda publiczna metoda RachunekManager ma tu odpowiednik zwracający
+korutynę. Równoczesne identyczne odczyty (ta sama metoda i argumenty)
+są wykonywane raz, a każdy z oczekujących dostaje własną kopię wyniku,
+więc zmiana wyniku przez jednego nie jest widoczna dla pozostałych.
+Anulowanie zadania asyncio usuwa zlecenie z kolejki, a trwający odczyt
+przerywa przez Connection.interrupt(); rozpoczęty zapis zawsze kończy się
+normalnie, bo może obejmować też pliki PDF.
+
+Fasada jest przeznaczona dla jednej pętli zdarzeń. Wymaga tylko
+biblioteki standardowej.
+"""
+
+import copy
+import queue
+import asyncio
+import functools
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+from rachunek_manager import RachunekManager
+
+# Metody RachunekManager, które tylko czytają bazę - mogą być łączone i przerywane
+METODY_ODCZYTU = frozenset({
+    'pobierz_domyslnego_sprzedawce',
+    'pobierz_liste_rachunkow',
+    'pobierz_strone_rachunkow',
+    'wyszukaj_rachunki',
+    'pobierz_szczegoly_rachunku',
+    'sprawdz_czy_plik_pdf_istnieje',
+    'pobierz_podsumowanie_miesięczne',
+    'pobierz_raport_miesięczny',
+    'pobierz_raport_roczny',
+    'pobierz_raport_top_klientow',
+    'pobierz_historie_klienta',
+    'pobierz_usunięte_rachunki',
+})
+
+
+class ZlecenieBazy:
+    """Pojedyncze zlecenie dla wątku bazy danych"""
+
+    def __init__(self, funkcja: Callable[[RachunekManager], Any], future: asyncio.Future,
+                 odczyt: bool, klucz: Optional[Hashable] = None):
+        self.funkcja = funkcja
+        self.future = future
+        self.odczyt = odczyt
+        self.klucz = klucz
+        # Liczba wywołań czekających na wynik (więcej niż 1 po połączeniu odczytów)
+        self.oczekujacy = 0
+        # Liczba wszystkich wywołań, które dołączyły do zlecenia
+        self.wywolania = 0
+        self.anulowane = False
+
+
+class RachunekManagerAsync:
+    """Asynchroniczna fasada RachunekManager z osobnym wątkiem bazy danych"""
+
+    def __init__(self, db_path: str = "rachunki.db"):
+        """
+        Inicjalizacja fasady - RachunekManager jest tworzony w wątku bazy danych
+
+        Args:
+            db_path: Ścieżka do bazy danych
+        """
+        self.db_path = db_path
+        self._zlecenia = queue.Queue()
+        # Odczyty w kolejce lub w toku, do których mogą dołączyć identyczne wywołania
+        self._odczyty: Dict[Hashable, ZlecenieBazy] = {}
+        self._blokada = threading.Lock()
+        self._biezace: Optional[ZlecenieBazy] = None
+        self._polaczenie = None
+        self._zamkniety = False
+        self._watek = threading.Thread(target=self._petla, name="RachunekManagerAsync", daemon=True)
+        self._watek.start()
+
+    async def __aenter__(self) -> 'RachunekManagerAsync':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.zamknij()
+
+    async def wykonaj(self, funkcja: Callable[[RachunekManager], Any], odczyt: bool = False) -> Any:
+        """
+        Wykonuje dowolną funkcję na RachunekManager w wątku bazy danych
+
+        Args:
+            funkcja: Funkcja wywoływana z RachunekManager, np. lambda m: m.db.pobierz_statystyki_ogolne()
+            odczyt: Czy funkcja tylko czyta bazę (anulowanie może przerwać jej zapytanie)
+
+        Returns:
+            Wynik funkcji
+        """
+        return await self._wywolaj(funkcja, odczyt)
+
+    async def zamknij(self) -> None:
+        """Wykonuje zlecenia z kolejki, zamyka połączenia z bazą i kończy wątek bazy danych"""
+        if self._zamkniety:
+            return
+        self._zamkniety = True
+        try:
+            await self._wywolaj(lambda manager: manager.zamknij(), odczyt=False, wewnetrzne=True)
+        finally:
+            # Wątek kończy się także wtedy, gdy zamknięcie bazy zgłosiło błąd
+            self._zlecenia.put(None)
+            await asyncio.get_running_loop().run_in_executor(None, self._watek.join)
+
+    async def _wywolaj(self, funkcja: Callable[[RachunekManager], Any], odczyt: bool,
+                       klucz: Optional[Hashable] = None, wewnetrzne: bool = False) -> Any:
+        """
+        Zleca funkcję wątkowi bazy danych lub dołącza do identycznego odczytu
+
+        Args:
+            funkcja: Funkcja wywoływana z RachunekManager
+            odczyt: Czy funkcja tylko czyta bazę
+            klucz: Klucz łączenia identycznych odczytów (None - bez łączenia)
+            wewnetrzne: Zlecenie zamknięcia, dopuszczalne po zamknij()
+
+        Returns:
+            Wynik funkcji
+        """
+        if self._zamkniety and not wewnetrzne:
+            raise RuntimeError("RachunekManagerAsync został zamknięty")
+
+        zlecenie = self._odczyty.get(klucz) if klucz is not None else None
+        if zlecenie is None:
+            zlecenie = ZlecenieBazy(funkcja, asyncio.get_running_loop().create_future(), odczyt, klucz)
+            if klucz is not None:
+                self._odczyty[klucz] = zlecenie
+            elif not odczyt:
+                # Odczyt zlecony po zapisie ma zobaczyć jego wynik, więc nie dołącza
+                # do odczytów zleconych wcześniej
+                self._odczyty.clear()
+            self._zlecenia.put(zlecenie)
+
+        zlecenie.oczekujacy += 1
+        zlecenie.wywolania += 1
+        try:
+            # shield - anulowanie jednego oczekującego nie anuluje wyniku pozostałych
+            wynik = await asyncio.shield(zlecenie.future)
+            # Połączone odczyty nie współdzielą zmiennych list i słowników wyniku
+            return copy.deepcopy(wynik) if zlecenie.wywolania > 1 else wynik
+        except asyncio.CancelledError:
+            if not zlecenie.future.done() and zlecenie.oczekujacy == 1:
+                self._anuluj(zlecenie)
+            raise
+        finally:
+            zlecenie.oczekujacy -= 1
+
+    def _anuluj(self, zlecenie: ZlecenieBazy) -> None:
+        """Anuluje zlecenie, na którego wynik nikt już nie czeka (wątek pętli zdarzeń)"""
+        zlecenie.anulowane = True
+        if self._odczyty.get(zlecenie.klucz) is zlecenie:
+            del self._odczyty[zlecenie.klucz]
+        with self._blokada:
+            if zlecenie.odczyt and self._biezace is zlecenie and self._polaczenie is not None:
+                self._polaczenie.interrupt()
+
+    def _petla(self) -> None:
+        """Pętla wątku bazy danych - wykonuje zlecenia po kolei"""
+        manager = None
+        blad_otwarcia = None
+        try:
+            manager = RachunekManager(self.db_path)
+            # Połączenie wątku, przez które biegną zapytania zleceń (do interrupt())
+            self._polaczenie = manager.db._polaczenie()
+        except Exception as e:
+            blad_otwarcia = e
+
+        while True:
+            zlecenie = self._zlecenia.get()
+            if zlecenie is None:
+                return
+
+            # Flaga sprawdzana pod blokadą - _anuluj ustawia ją przed wzięciem blokady,
+            # więc zlecenie anulowane później jest już bieżące i może zostać przerwane
+            with self._blokada:
+                anulowane = zlecenie.anulowane
+                if not anulowane:
+                    self._biezace = zlecenie
+            if anulowane:
+                self._oddaj(zlecenie, None, None)
+                continue
+            try:
+                if blad_otwarcia is not None:
+                    raise blad_otwarcia
+                wynik, blad = zlecenie.funkcja(manager), None
+            except Exception as e:
+                wynik, blad = None, e
+            finally:
+                with self._blokada:
+                    self._biezace = None
+            self._oddaj(zlecenie, wynik, blad)
+
+    def _oddaj(self, zlecenie: ZlecenieBazy, wynik: Any, blad: Optional[Exception]) -> None:
+        """Przekazuje wynik zlecenia do pętli zdarzeń (wątek bazy danych)"""
+        try:
+            zlecenie.future.get_loop().call_soon_threadsafe(self._zakoncz, zlecenie, wynik, blad)
+        except RuntimeError:
+            # Pętla zdarzeń została już zamknięta - nikt nie czeka na wynik
+            pass
+
+    def _zakoncz(self, zlecenie: ZlecenieBazy, wynik: Any, blad: Optional[Exception]) -> None:
+        """Ustawia wynik zlecenia (wątek pętli zdarzeń)"""
+        if self._odczyty.get(zlecenie.klucz) is zlecenie:
+            del self._odczyty[zlecenie.klucz]
+        if zlecenie.future.done():
+            return
+        if zlecenie.anulowane:
+            zlecenie.future.cancel()
+        elif blad is not None:
+            zlecenie.future.set_exception(blad)
+        else:
+            zlecenie.future.set_result(wynik)
+
+
+def _metoda_async(nazwa: str, metoda: Callable) -> Callable:
+    """Tworzy asynchroniczny odpowiednik metody RachunekManager"""
+    odczyt = nazwa in METODY_ODCZYTU
+
+    @functools.wraps(metoda)
+    async def wywolanie(self: RachunekManagerAsync, *args, **kwargs):
+        klucz = None
+        if odczyt:
+            klucz = (nazwa, args, tuple(sorted(kwargs.items())))
+            try:
+                hash(klucz)
+            except TypeError:
+                # Argumentów nie da się porównać jako klucza (np. słownik) - bez łączenia
+                klucz = None
+        return await self._wywolaj(lambda manager: getattr(manager, nazwa)(*args, **kwargs),
+                                   odczyt, klucz)
+    return wywolanie
+
+
+for _nazwa, _metoda in vars(RachunekManager).items():
+    if not _nazwa.startswith('_') and callable(_metoda) and not hasattr(RachunekManagerAsync, _nazwa):
+        setattr(RachunekManagerAsync, _nazwa, _metoda_async(_nazwa, _metoda))
+del _nazwa, _metoda
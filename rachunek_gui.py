@@ -10,6 +10,7 @@ import os
 from datetime import datetime
 from typing import Dict, List
 from rachunek_manager import RachunekManager
+from wykonawca_gui import WykonawcaGUI
 import config
 from version import get_full_version_string, get_build_info, VERSION_HISTORY, __version__
 
@@ -39,6 +40,11 @@ class RachunekApp:
         
         # Tworzenie głównego interfejsu
         self.create_notebook()
+        
+        # Raporty, podsumowanie i wyszukiwanie wykonywane w tle
+        self.wskaznik_pracy = ttk.Progressbar(self.root, mode='indeterminate')
+        self.wykonawca = WykonawcaGUI(self.root, self.pokaz_prace_w_tle)
+        
         self.create_nowy_rachunek_tab()
         self.create_lista_rachunkow_tab()
         self.create_ustawienia_tab()
@@ -51,6 +57,28 @@ class RachunekApp:
         
         # Dodaj skróty klawiszowe
         self.setup_keyboard_shortcuts()
+        
+        # Zamknij połączenia z bazą przy zamykaniu okna
+        self.root.protocol("WM_DELETE_WINDOW", self.zamknij_aplikacje)
+    
+    def zamknij_aplikacje(self):
+        """Zamyka połączenia z bazą danych i okno aplikacji"""
+        try:
+            self.wykonawca.zamknij()
+            self.manager.zamknij()
+        finally:
+            self.root.destroy()
+    
+    def pokaz_prace_w_tle(self, zajety: bool):
+        """Pokazuje lub ukrywa wskaźnik zapytań wykonywanych w tle"""
+        if zajety:
+            self.wskaznik_pracy.pack(side="bottom", fill="x", padx=10, pady=(0, 5), before=self.notebook)
+            self.wskaznik_pracy.start(15)
+            self.root.config(cursor="watch")
+        else:
+            self.wskaznik_pracy.stop()
+            self.wskaznik_pracy.pack_forget()
+            self.root.config(cursor="")
     
     def center_window(self, width, height):
         """Wyśrodkowuje okno na ekranie"""
@@ -300,12 +328,15 @@ class RachunekApp:
             usuniete_pomyslnie = []
             bledy = []
             
+            wynik = self.manager.usun_rachunki([r['id'] for r in wybrane_rachunki], powod)
+            if not wynik['wyniki']:
+                bledy.append(wynik['error'])
+            
             for rachunek in wybrane_rachunki:
-                wynik = self.manager.usun_rachunek_z_potwierdzeniem(rachunek['id'], powod)
-                if wynik['success']:
-                    usuniete_pomyslnie.append(wynik['numer_rachunku'])
-                else:
-                    bledy.append(f"{rachunek['numer']}: {wynik['error']}")
+                if rachunek['id'] in wynik.get('udane', ()):
+                    usuniete_pomyslnie.append(rachunek['numer'])
+                elif rachunek['id'] in wynik.get('nieudane', {}):
+                    bledy.append(f"{rachunek['numer']}: {wynik['nieudane'][rachunek['id']]}")
             
             # Pokaż wyniki
             if usuniete_pomyslnie and not bledy:
@@ -403,58 +434,70 @@ class RachunekApp:
         odswież_liste()
         
         # Przyciski
+        def wybrane_usuniete():
+            """Zwraca listę (id, numer) zaznaczonych rachunków"""
+            wybrane = []
+            for item_id in tree.selection():
+                values = tree.item(item_id)['values']
+                wybrane.append((values[0], str(values[1])))
+            return wybrane
+        
+        def opis_wybranych(wybrane):
+            if len(wybrane) == 1:
+                return f"rachunek {wybrane[0][1]}"
+            numery = ", ".join(numer for _, numer in wybrane[:3])
+            if len(wybrane) > 3:
+                numery += f" i {len(wybrane) - 3} innych"
+            return f"{len(wybrane)} rachunków ({numery})"
+        
+        def pokaz_wynik(wynik, wybrane, tekst_sukcesu):
+            numery = dict(wybrane)
+            bledy = [f"{numery[i]}: {blad}" for i, blad in wynik.get('nieudane', {}).items()]
+            if not wynik['success']:
+                messagebox.showerror("Błąd", "\n".join(bledy) or wynik['error'], parent=manage_window)
+            elif bledy:
+                messagebox.showwarning("Częściowy sukces",
+                    f"{tekst_sukcesu}: {len(wynik['udane'])}.\n\nBłędy:\n" + "\n".join(bledy),
+                    parent=manage_window)
+            else:
+                messagebox.showinfo("Sukces", f"{tekst_sukcesu}: {len(wynik['udane'])}.", parent=manage_window)
+        
         def przywroc_wybrany():
-            selection = tree.selection()
-            if not selection:
+            wybrane = wybrane_usuniete()
+            if not wybrane:
                 messagebox.showwarning("Uwaga", "Wybierz rachunek do przywrócenia.", parent=manage_window)
                 return
             
-            item = tree.item(selection[0])
-            deleted_id = item['values'][0]
-            numer = item['values'][1]
-            
             if messagebox.askyesno("Potwierdzenie", 
-                                 f"Czy na pewno przywrócić rachunek {numer}?", 
+                                 f"Czy na pewno przywrócić {opis_wybranych(wybrane)}?", 
                                  parent=manage_window):
-                wynik = self.manager.przywroc_rachunek(deleted_id)
+                wynik = self.manager.przywroc_rachunki([deleted_id for deleted_id, _ in wybrane])
+                pokaz_wynik(wynik, wybrane, "Przywrócone rachunki")
                 
                 if wynik['success']:
-                    messagebox.showinfo("Sukces", 
-                                      f"Rachunek {numer} został przywrócony.", 
-                                      parent=manage_window)
                     odswież_liste()
                     # Odśwież listę rachunków w głównym oknie
                     self.load_rachunki_data()
-                else:
-                    messagebox.showerror("Błąd", wynik['error'], parent=manage_window)
         
         def trwale_usun_wybrany():
-            selection = tree.selection()
-            if not selection:
+            wybrane = wybrane_usuniete()
+            if not wybrane:
                 messagebox.showwarning("Uwaga", "Wybierz rachunek do trwałego usunięcia.", parent=manage_window)
                 return
             
-            item = tree.item(selection[0])
-            deleted_id = item['values'][0]
-            numer = item['values'][1]
-            
             if messagebox.askyesno("Ostrzeżenie", 
-                                 f"⚠️ UWAGA: Trwałe usunięcie rachunku {numer} nie może być cofnięte!\n\nCzy na pewno kontynuować?", 
+                                 f"⚠️ UWAGA: Trwałe usunięcie ({opis_wybranych(wybrane)}) nie może być cofnięte!\n\nCzy na pewno kontynuować?", 
                                  parent=manage_window):
-                wynik = self.manager.trwale_usun_rachunek(deleted_id)
+                wynik = self.manager.trwale_usun_rachunki([deleted_id for deleted_id, _ in wybrane])
+                pokaz_wynik(wynik, wybrane, "Trwale usunięte rachunki")
                 
                 if wynik['success']:
-                    messagebox.showinfo("Sukces", 
-                                      f"Rachunek {numer} został trwale usunięty.", 
-                                      parent=manage_window)
                     odswież_liste()
-                else:
-                    messagebox.showerror("Błąd", wynik['error'], parent=manage_window)
         
         buttons_frame = ttk.Frame(main_frame)
         buttons_frame.pack(fill="x", pady=(10, 0))
         
-        ttk.Button(buttons_frame, text="↩️ Przywróć wybrany", command=przywroc_wybrany,
+        ttk.Button(buttons_frame, text="↩️ Przywróć wybrane", command=przywroc_wybrany,
                   style="Success.TButton").pack(side="left", padx=(0, 10))
         ttk.Button(buttons_frame, text="🗑️ Usuń trwale", command=trwale_usun_wybrany,
                   style="Warning.TButton").pack(side="left", padx=(0, 10))
@@ -817,16 +860,17 @@ class RachunekApp:
         self.tree.column("Nabywca", width=150)
         self.tree.column("Kwota (PLN)", width=80, anchor="e")
         
-        # Scrollbar dla tabeli
-        tree_scrollbar = ttk.Scrollbar(lista_frame, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=tree_scrollbar.set)
+        # Scrollbar dla tabeli - dojście do końca listy doładowuje kolejną stronę
+        self.tree_scrollbar = ttk.Scrollbar(lista_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.on_tree_scroll)
+        self.lista_kursor = None
         
         # Pakowanie tabeli
         tree_container = ttk.Frame(lista_frame)
         tree_container.pack(fill="both", expand=True)
         
         self.tree.pack(side="left", fill="both", expand=True)
-        tree_scrollbar.pack(side="right", fill="y")
+        self.tree_scrollbar.pack(side="right", fill="y")
         
         # Podwójne kliknięcie otwiera PDF
         self.tree.bind('<Double-1>', self.otworz_pdf_rachunek)
@@ -1102,6 +1146,41 @@ class RachunekApp:
         
         ttk.Label(shortcuts_frame, text=shortcuts_text, justify="left").pack(anchor="w")
         
+        # Kopia zapasowa bazy danych
+        backup_frame = ttk.LabelFrame(scrollable_frame, text="💾 Kopia zapasowa", padding=15)
+        backup_frame.pack(fill="x", padx=15, pady=15)
+        
+        ttk.Label(backup_frame, 
+                 text=f"Kopie są zapisywane w katalogu '{config.BACKUP_FOLDER}' "
+                      f"(zachowywanych jest {config.BACKUP_KEEP} najnowszych).",
+                 justify="left").pack(anchor="w", pady=(0, 10))
+        
+        self.backup_btn = ttk.Button(backup_frame, text="💾 Utwórz kopię zapasową teraz", 
+                                     command=self.utworz_kopie_zapasowa)
+        self.backup_btn.pack(anchor="w")
+        
+        # Archiwum zamkniętych lat
+        archiwum_frame = ttk.LabelFrame(scrollable_frame, text="🗄️ Archiwum lat", padding=15)
+        archiwum_frame.pack(fill="x", padx=15, pady=15)
+        
+        ttk.Label(archiwum_frame,
+                 text="Rachunki zamkniętego roku są przenoszone do osobnego pliku (np. rachunki_2024.db).\n"
+                      "Nadal są widoczne na liście, w wyszukiwaniu i w raportach.",
+                 justify="left").pack(anchor="w", pady=(0, 10))
+        
+        archiwum_wybor = ttk.Frame(archiwum_frame)
+        archiwum_wybor.pack(anchor="w")
+        ttk.Label(archiwum_wybor, text="Rok:").pack(side="left")
+        self.archiwum_rok_var = tk.StringVar(value=str(datetime.now().year - 1))
+        archiwum_combo = ttk.Combobox(archiwum_wybor, textvariable=self.archiwum_rok_var,
+                                      width=8, state="readonly")
+        archiwum_combo['values'] = [str(y) for y in range(2020, datetime.now().year)]
+        archiwum_combo.pack(side="left", padx=(5, 15))
+        
+        self.archiwum_btn = ttk.Button(archiwum_wybor, text="🗄️ Przenieś rok do archiwum",
+                                       command=self.archiwizuj_rok)
+        self.archiwum_btn.pack(side="left")
+        
         # Zarządzanie rachunkami (sekcja administratora)
         admin_frame = ttk.LabelFrame(scrollable_frame, text="🔐 Zarządzanie rachunkami (Administrator)", padding=15)
         admin_frame.pack(fill="x", padx=15, pady=15)
@@ -1176,7 +1255,10 @@ class RachunekApp:
             wynik = self.manager.stworz_rachunek(dane_rachunku, folder)
             
             if wynik['success']:
-                success_msg = f"Rachunek został wygenerowany!\nPlik PDF: {wynik['pdf_path']}"
+                if wynik['pdf_path']:
+                    success_msg = f"Rachunek został wygenerowany!\nPlik PDF: {wynik['pdf_path']}"
+                else:
+                    success_msg = "Rachunek został zapisany bez pliku PDF."
                 
                 # Dodaj ostrzeżenia jeśli są
                 if 'warnings' in wynik and wynik['warnings']:
@@ -1194,7 +1276,7 @@ class RachunekApp:
                 self.update_monthly_summary()
                 
                 # Zapytaj czy otworzyć PDF
-                if messagebox.askyesno("Otwórz plik", "Czy chcesz otworzyć wygenerowany plik PDF?"):
+                if wynik['pdf_path'] and messagebox.askyesno("Otwórz plik", "Czy chcesz otworzyć wygenerowany plik PDF?"):
                     self.manager.otworz_plik_pdf(wynik['pdf_path'])
                     
             else:
@@ -1216,13 +1298,22 @@ class RachunekApp:
         self.update_monthly_summary()
     
     def load_rachunki_data(self):
-        """Ładuje dane rachunków do tabeli"""
+        """Ładuje pierwszą stronę rachunków do tabeli"""
+        # Wynik wcześniejszego wyszukiwania nie może nadpisać pełnej listy
+        self.wykonawca.anuluj('wyszukiwanie')
+        
         # Wyczyść tabelę
         for item in self.tree.get_children():
             self.tree.delete(item)
         
-        # Pobierz rachunki
-        rachunki = self.manager.pobierz_liste_rachunkow()
+        self.lista_kursor = None
+        self.zaladuj_strone_rachunkow()
+    
+    def zaladuj_strone_rachunkow(self):
+        """Dołącza do tabeli kolejną stronę rachunków"""
+        strona = self.manager.pobierz_strone_rachunkow(self.lista_kursor)
+        rachunki = strona['rachunki']
+        self.lista_kursor = strona['kursor']
         
         # Dodaj do tabeli
         for rachunek in rachunki:
@@ -1238,22 +1329,37 @@ class RachunekApp:
         """Wyszukuje rachunki według zapytania"""
         query = self.search_var.get().strip()
         
-        # Wyczyść tabelę
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # Wyszukaj
-        rachunki = self.manager.wyszukaj_rachunki(query)
+        def pokaz(rachunki):
+            # Wyczyść tabelę
+            for item in self.tree.get_children():
+                self.tree.delete(item)
+            
+            # Wyniki wyszukiwania nie są stronicowane
+            self.lista_kursor = None
+            
+            # Dodaj do tabeli
+            for rachunek in rachunki:
+                self.tree.insert("", "end", values=(
+                    rachunek['id'],
+                    rachunek['numer_rachunku'],
+                    rachunek['data_wystawienia'],
+                    rachunek['nabywca'],
+                    f"{rachunek['kwota']:.2f}"
+                ))
         
-        # Dodaj do tabeli
-        for rachunek in rachunki:
-            self.tree.insert("", "end", values=(
-                rachunek['id'],
-                rachunek['numer_rachunku'],
-                rachunek['data_wystawienia'],
-                rachunek['nabywca'],
-                f"{rachunek['kwota']:.2f}"
-            ))
+        # Nowe wyszukiwanie zastępuje poprzednie, jeśli to jeszcze trwa
+        self.wykonawca.zlec('wyszukiwanie', self.manager.wyszukaj_rachunki, query,
+                            po_wyniku=pokaz, po_bledzie=self._blad_wyszukiwania)
+    
+    def _blad_wyszukiwania(self, e: Exception):
+        """Pokazuje błąd wyszukiwania zgłoszony przez wątek roboczy"""
+        messagebox.showerror("Błąd", f"Błąd podczas wyszukiwania: {str(e)}")
+    
+    def on_tree_scroll(self, first, last):
+        """Aktualizuje scrollbar i doładowuje rachunki po dojściu do końca listy"""
+        self.tree_scrollbar.set(first, last)
+        if self.lista_kursor and float(last) >= 1.0:
+            self.zaladuj_strone_rachunkow()
     
     def on_search_change(self, event):
         """Wywoływane przy zmianie tekstu wyszukiwania"""
@@ -1374,142 +1480,189 @@ Plik PDF: {szczegoly.get('plik_pdf', 'Brak')}"""
         sciezka = filedialog.asksaveasfilename(
             title="Zapisz jako CSV",
             defaultextension=".csv",
-            filetypes=[("Pliki CSV", "*.csv"), ("Wszystkie pliki", "*.*")]
+            filetypes=[("Pliki CSV", "*.csv"), ("Pliki CSV (gzip)", "*.csv.gz"), ("Wszystkie pliki", "*.*")]
         )
         
         if sciezka:
             wynik = self.manager.eksportuj_rachunki_csv(sciezka)
             
             if wynik['success']:
-                messagebox.showinfo("Sukces", f"Rachunki zostały wyeksportowane do: {sciezka}")
+                messagebox.showinfo("Sukces", f"Wyeksportowano {wynik['liczba_rachunkow']} rachunków do: {sciezka}")
             else:
                 messagebox.showerror("Błąd", wynik['error'])
     
+    def utworz_kopie_zapasowa(self):
+        """Tworzy kopię zapasową bazy w tle"""
+        def pokaz(wynik):
+            self.backup_btn.config(state="normal")
+            if wynik['success']:
+                messagebox.showinfo("Sukces", f"Kopia zapasowa zapisana i sprawdzona:\n{wynik['plik']}")
+            else:
+                messagebox.showerror("Błąd", wynik['error'])
+        
+        self.backup_btn.config(state="disabled")
+        self.wykonawca.zlec('kopia_zapasowa', self.manager.utworz_kopie_zapasowa, po_wyniku=pokaz)
+    
+    def archiwizuj_rok(self):
+        """Przenosi wybrany rok do archiwum w tle"""
+        rok = int(self.archiwum_rok_var.get())
+        if not messagebox.askyesno("Archiwum lat",
+                                   f"Przenieść rachunki z roku {rok} do archiwum?\n\n"
+                                   "Rachunki pozostaną widoczne w aplikacji."):
+            return
+        
+        def pokaz(wynik):
+            self.archiwum_btn.config(state="normal")
+            if wynik['success']:
+                messagebox.showinfo("Sukces", f"Przeniesiono do archiwum {wynik['liczba']} rachunków z roku {rok}")
+                # Rachunki roku są teraz czytane z archiwum
+                self.load_rachunki_data()
+                self.update_monthly_summary()
+            else:
+                messagebox.showerror("Błąd", wynik['error'])
+        
+        self.archiwum_btn.config(state="disabled")
+        self.wykonawca.zlec('archiwum', self.manager.archiwizuj_rok, rok, po_wyniku=pokaz)
+    
     def generuj_raport_miesięczny(self):
         """Generuje raport miesięczny"""
         try:
             rok = int(self.miesiac_rok_var.get())
-            raport = self.manager.pobierz_raport_miesięczny(rok)
-            
-            # Formatuj raport
-            tekst = f"🗓️ RAPORT MIESIĘCZNY - {rok}\n"
-            tekst += "=" * 50 + "\n\n"
-            
-            if not raport['miesiace']:
-                tekst += "❌ Brak danych dla tego roku.\n"
-            else:
-                for miesiac in raport['miesiace']:
-                    status_emoji = {
-                        'PRZEKROCZONY': '🔴',
-                        'OSTRZEŻENIE': '🟠', 
-                        'NORMALNY': '🟡',
-                        'BEZPIECZNY': '🟢'
-                    }.get(miesiac['status'], '⚪')
-                    
-                    tekst += f"{status_emoji} {miesiac['miesiac_nazwa']} {rok}\n"
-                    tekst += f"   💰 Przychody: {miesiac['suma_kwot']:.2f} PLN\n"
-                    tekst += f"   📊 Rachunków: {miesiac['liczba_rachunkow']}\n"
-                    tekst += f"   📈 Średnia: {miesiac['srednia_kwota']:.2f} PLN\n"
-                    tekst += f"   🎯 Limit: {miesiac['limit_miesięczny']:.2f} PLN\n"
-                    tekst += f"   ⚡ Pozostało: {miesiac['pozostaly_limit']:.2f} PLN\n"
-                    tekst += f"   📍 Status: {miesiac['status']} ({miesiac['procent_wykorzystania']:.1f}%)\n\n"
-                
-                # Podsumowanie roczne
-                podsumowanie = raport['podsumowanie_roczne']
-                tekst += "📈 PODSUMOWANIE ROCZNE\n"
-                tekst += "-" * 30 + "\n"
-                tekst += f"📊 Łączna liczba rachunków: {podsumowanie['total_rachunki']}\n"
-                tekst += f"💰 Łączne przychody: {podsumowanie['total_kwoty']:.2f} PLN\n"
-                tekst += f"📅 Aktywnych miesięcy: {podsumowanie['miesiace_aktywne']}/12\n"
-                tekst += f"🔴 Miesięcy z przekroczonym limitem: {podsumowanie['miesiace_przekroczone']}\n"
-                tekst += f"📊 Średnia miesięczna: {podsumowanie['srednia_miesieczna']:.2f} PLN\n"
+        except ValueError as e:
+            self._blad_raportu(e)
+            return
+        
+        self.wykonawca.zlec('raport_miesieczny', self.manager.pobierz_raport_miesięczny, rok,
+                            po_wyniku=lambda raport: self._pokaz_raport_miesięczny(rok, raport),
+                            po_bledzie=self._blad_raportu)
+    
+    def _pokaz_raport_miesięczny(self, rok: int, raport: Dict):
+        """Wyświetla pobrany raport miesięczny"""
+        # Formatuj raport
+        tekst = f"🗓️ RAPORT MIESIĘCZNY - {rok}\n"
+        tekst += "=" * 50 + "\n\n"
+        
+        if not raport['miesiace']:
+            tekst += "❌ Brak danych dla tego roku.\n"
+        else:
+            for miesiac in raport['miesiace']:
+                status_emoji = {
+                    'PRZEKROCZONY': '🔴',
+                    'OSTRZEŻENIE': '🟠', 
+                    'NORMALNY': '🟡',
+                    'BEZPIECZNY': '🟢'
+                }.get(miesiac['status'], '⚪')
                 
-                if podsumowanie['max_miesiac']:
-                    tekst += f"🏆 Najlepszy miesiąc: {podsumowanie['max_miesiac']['miesiac_nazwa']} ({podsumowanie['max_miesiac']['suma_kwot']:.2f} PLN)\n"
-                if podsumowanie['min_miesiac']:
-                    tekst += f"📉 Najsłabszy miesiąc: {podsumowanie['min_miesiac']['miesiac_nazwa']} ({podsumowanie['min_miesiac']['suma_kwot']:.2f} PLN)\n"
+                tekst += f"{status_emoji} {miesiac['miesiac_nazwa']} {rok}\n"
+                tekst += f"   💰 Przychody: {miesiac['suma_kwot']:.2f} PLN\n"
+                tekst += f"   📊 Rachunków: {miesiac['liczba_rachunkow']}\n"
+                tekst += f"   📈 Średnia: {miesiac['srednia_kwota']:.2f} PLN\n"
+                tekst += f"   🎯 Limit: {miesiac['limit_miesięczny']:.2f} PLN\n"
+                tekst += f"   ⚡ Pozostało: {miesiac['pozostaly_limit']:.2f} PLN\n"
+                tekst += f"   📍 Status: {miesiac['status']} ({miesiac['procent_wykorzystania']:.1f}%)\n\n"
             
-            # Wyświetl w widget tekstowym
-            self.miesiac_text.config(state="normal")
-            self.miesiac_text.delete("1.0", tk.END)
-            self.miesiac_text.insert("1.0", tekst)
-            self.miesiac_text.config(state="disabled")
+            # Podsumowanie roczne
+            podsumowanie = raport['podsumowanie_roczne']
+            tekst += "📈 PODSUMOWANIE ROCZNE\n"
+            tekst += "-" * 30 + "\n"
+            tekst += f"📊 Łączna liczba rachunków: {podsumowanie['total_rachunki']}\n"
+            tekst += f"💰 Łączne przychody: {podsumowanie['total_kwoty']:.2f} PLN\n"
+            tekst += f"📅 Aktywnych miesięcy: {podsumowanie['miesiace_aktywne']}/12\n"
+            tekst += f"🔴 Miesięcy z przekroczonym limitem: {podsumowanie['miesiace_przekroczone']}\n"
+            tekst += f"📊 Średnia miesięczna: {podsumowanie['srednia_miesieczna']:.2f} PLN\n"
             
-        except Exception as e:
-            messagebox.showerror("Błąd", f"Błąd podczas generowania raportu: {str(e)}")
+            if podsumowanie['max_miesiac']:
+                tekst += f"🏆 Najlepszy miesiąc: {podsumowanie['max_miesiac']['miesiac_nazwa']} ({podsumowanie['max_miesiac']['suma_kwot']:.2f} PLN)\n"
+            if podsumowanie['min_miesiac']:
+                tekst += f"📉 Najsłabszy miesiąc: {podsumowanie['min_miesiac']['miesiac_nazwa']} ({podsumowanie['min_miesiac']['suma_kwot']:.2f} PLN)\n"
+        
+        # Wyświetl w widget tekstowym
+        self.miesiac_text.config(state="normal")
+        self.miesiac_text.delete("1.0", tk.END)
+        self.miesiac_text.insert("1.0", tekst)
+        self.miesiac_text.config(state="disabled")
     
     def generuj_raport_roczny(self):
         """Generuje raport roczny"""
-        try:
-            raport = self.manager.pobierz_raport_roczny()
-            
-            # Formatuj raport
-            tekst = "📅 RAPORT ROCZNY - WSZYSTKIE LATA\n"
-            tekst += "=" * 50 + "\n\n"
-            
-            if not raport['lata']:
-                tekst += "❌ Brak danych w bazie.\n"
-            else:
-                tekst += "📊 PRZYCHODY WG LAT\n"
-                tekst += "-" * 25 + "\n"
-                for rok in raport['lata']:
-                    tekst += f"📅 Rok {rok['rok']}\n"
-                    tekst += f"   💰 Przychody: {rok['suma_kwot']:.2f} PLN\n"
-                    tekst += f"   📊 Rachunków: {rok['liczba_rachunkow']}\n"
-                    tekst += f"   📈 Średnia: {rok['srednia_kwota']:.2f} PLN\n"
-                    tekst += f"   📉 Min: {rok['min_kwota']:.2f} PLN | 📈 Max: {rok['max_kwota']:.2f} PLN\n\n"
-                
-                # Statystyki ogólne
-                stats = raport['statystyki_ogolne']
-                tekst += "📈 STATYSTYKI OGÓLNE\n"
-                tekst += "-" * 20 + "\n"
-                tekst += f"📊 Łączna liczba rachunków: {stats['total_rachunki']}\n"
-                tekst += f"💰 Łączne przychody: {stats['total_kwota']:.2f} PLN\n"
-                tekst += f"📊 Średnia wartość rachunku: {stats['srednia_kwota']:.2f} PLN\n"
-                tekst += f"👥 Unikalnych klientów: {stats['unikalni_klienci']}\n"
-                if stats['pierwszy_rachunek']:
-                    tekst += f"📅 Pierwszy rachunek: {stats['pierwszy_rachunek']}\n"
-                if stats['ostatni_rachunek']:
-                    tekst += f"📅 Ostatni rachunek: {stats['ostatni_rachunek']}\n"
-            
-            # Wyświetl w widget tekstowym
-            self.rok_text.config(state="normal")
-            self.rok_text.delete("1.0", tk.END)
-            self.rok_text.insert("1.0", tekst)
-            self.rok_text.config(state="disabled")
+        self.wykonawca.zlec('raport_roczny', self.manager.pobierz_raport_roczny,
+                            po_wyniku=self._pokaz_raport_roczny,
+                            po_bledzie=self._blad_raportu)
+    
+    def _pokaz_raport_roczny(self, raport: Dict):
+        """Wyświetla pobrany raport roczny"""
+        # Formatuj raport
+        tekst = "📅 RAPORT ROCZNY - WSZYSTKIE LATA\n"
+        tekst += "=" * 50 + "\n\n"
+        
+        if not raport['lata']:
+            tekst += "❌ Brak danych w bazie.\n"
+        else:
+            tekst += "📊 PRZYCHODY WG LAT\n"
+            tekst += "-" * 25 + "\n"
+            for rok in raport['lata']:
+                tekst += f"📅 Rok {rok['rok']}\n"
+                tekst += f"   💰 Przychody: {rok['suma_kwot']:.2f} PLN\n"
+                tekst += f"   📊 Rachunków: {rok['liczba_rachunkow']}\n"
+                tekst += f"   📈 Średnia: {rok['srednia_kwota']:.2f} PLN\n"
+                tekst += f"   📉 Min: {rok['min_kwota']:.2f} PLN | 📈 Max: {rok['max_kwota']:.2f} PLN\n\n"
             
-        except Exception as e:
-            messagebox.showerror("Błąd", f"Błąd podczas generowania raportu: {str(e)}")
+            # Statystyki ogólne
+            stats = raport['statystyki_ogolne']
+            tekst += "📈 STATYSTYKI OGÓLNE\n"
+            tekst += "-" * 20 + "\n"
+            tekst += f"📊 Łączna liczba rachunków: {stats['total_rachunki']}\n"
+            tekst += f"💰 Łączne przychody: {stats['total_kwota']:.2f} PLN\n"
+            tekst += f"📊 Średnia wartość rachunku: {stats['srednia_kwota']:.2f} PLN\n"
+            tekst += f"👥 Unikalnych klientów: {stats['unikalni_klienci']}\n"
+            if stats['pierwszy_rachunek']:
+                tekst += f"📅 Pierwszy rachunek: {stats['pierwszy_rachunek']}\n"
+            if stats['ostatni_rachunek']:
+                tekst += f"📅 Ostatni rachunek: {stats['ostatni_rachunek']}\n"
+        
+        # Wyświetl w widget tekstowym
+        self.rok_text.config(state="normal")
+        self.rok_text.delete("1.0", tk.END)
+        self.rok_text.insert("1.0", tekst)
+        self.rok_text.config(state="disabled")
     
     def generuj_raport_klientów(self):
         """Generuje raport top klientów"""
         try:
             limit = int(self.top_limit_var.get())
-            klienci = self.manager.pobierz_raport_top_klientow(limit)
-            
-            # Formatuj raport
-            tekst = f"👥 TOP {limit} KLIENTÓW\n"
-            tekst += "=" * 40 + "\n\n"
-            
-            if not klienci:
-                tekst += "❌ Brak danych o klientach.\n"
-            else:
-                for i, klient in enumerate(klienci, 1):
-                    medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i:2d}."
-                    tekst += f"{medal} {klient['klient']}\n"
-                    tekst += f"    💰 Łączne kwoty: {klient['suma_kwot']:.2f} PLN\n"
-                    tekst += f"    📊 Rachunków: {klient['liczba_rachunkow']}\n"
-                    tekst += f"    📈 Średnia: {klient['srednia_kwota']:.2f} PLN\n"
-                    tekst += f"    📅 Ostatni rachunek: {klient['ostatni_rachunek']}\n\n"
-            
-            # Wyświetl w widget tekstowym
-            self.klienci_text.config(state="normal")
-            self.klienci_text.delete("1.0", tk.END)
-            self.klienci_text.insert("1.0", tekst)
-            self.klienci_text.config(state="disabled")
-            
-        except Exception as e:
-            messagebox.showerror("Błąd", f"Błąd podczas generowania raportu: {str(e)}")
+        except ValueError as e:
+            self._blad_raportu(e)
+            return
+        
+        self.wykonawca.zlec('raport_klientow', self.manager.pobierz_raport_top_klientow, limit,
+                            po_wyniku=lambda klienci: self._pokaz_raport_klientów(limit, klienci),
+                            po_bledzie=self._blad_raportu)
+    
+    def _pokaz_raport_klientów(self, limit: int, klienci: List[Dict]):
+        """Wyświetla pobrany raport top klientów"""
+        # Formatuj raport
+        tekst = f"👥 TOP {limit} KLIENTÓW\n"
+        tekst += "=" * 40 + "\n\n"
+        
+        if not klienci:
+            tekst += "❌ Brak danych o klientach.\n"
+        else:
+            for i, klient in enumerate(klienci, 1):
+                medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i:2d}."
+                tekst += f"{medal} {klient['klient']}\n"
+                tekst += f"    💰 Łączne kwoty: {klient['suma_kwot']:.2f} PLN\n"
+                tekst += f"    📊 Rachunków: {klient['liczba_rachunkow']}\n"
+                tekst += f"    📈 Średnia: {klient['srednia_kwota']:.2f} PLN\n"
+                tekst += f"    📅 Ostatni rachunek: {klient['ostatni_rachunek']}\n\n"
+        
+        # Wyświetl w widget tekstowym
+        self.klienci_text.config(state="normal")
+        self.klienci_text.delete("1.0", tk.END)
+        self.klienci_text.insert("1.0", tekst)
+        self.klienci_text.config(state="disabled")
+    
+    def _blad_raportu(self, e: Exception):
+        """Pokazuje błąd generowania raportu"""
+        messagebox.showerror("Błąd", f"Błąd podczas generowania raportu: {str(e)}")
     
     def odswież_raport_miesięczny(self):
         """Odświeża raport miesięczny"""
@@ -1577,48 +1730,52 @@ Plik PDF: {szczegoly.get('plik_pdf', 'Brak')}"""
     
     def update_monthly_summary(self):
         """Aktualizuje podsumowanie miesięczne"""
-        try:
-            podsumowanie = self.manager.pobierz_podsumowanie_miesięczne()
-            
-            # Zaktualizuj etykiety
-            self.monthly_summary_vars['przychody'].set(f"{podsumowanie['przychody_suma']:.2f} PLN")
-            self.monthly_summary_vars['limit'].set(f"{podsumowanie['limit_miesięczny']:.2f} PLN")
-            self.monthly_summary_vars['pozostaly'].set(f"{podsumowanie['pozostaly_limit']:.2f} PLN")
-            self.monthly_summary_vars['status'].set(f"{podsumowanie['status']} ({podsumowanie['procent_wykorzystania']:.1f}%)")
-            
-            # Ustaw kolor statusu
-            if podsumowanie['status_kolor'] == 'red':
-                self.status_label.config(foreground='red')
-                self.pozostaly_label.config(foreground='red')
-            elif podsumowanie['status_kolor'] == 'orange':
-                self.status_label.config(foreground='orange')
-                self.pozostaly_label.config(foreground='orange')
-            elif podsumowanie['status_kolor'] == 'yellow':
-                self.status_label.config(foreground='#DAA520')  # Ciemny złoty
-                self.pozostaly_label.config(foreground='black')
-            else:
-                self.status_label.config(foreground='green')
-                self.pozostaly_label.config(foreground='green')
-            
-            # Ustaw pasek postępu
-            self.progress_var.set(podsumowanie['procent_wykorzystania'])
-            
-            # Ustaw kolor paska postępu
-            style = ttk.Style()
-            if podsumowanie['status_kolor'] == 'red':
-                style.configure("TProgressbar", background='red')
-            elif podsumowanie['status_kolor'] == 'orange':
-                style.configure("TProgressbar", background='orange')
-            elif podsumowanie['status_kolor'] == 'yellow':
-                style.configure("TProgressbar", background='#DAA520')
-            else:
-                style.configure("TProgressbar", background='green')
-                
-        except Exception as e:
-            self.monthly_summary_vars['przychody'].set("Błąd ładowania")
-            self.monthly_summary_vars['pozostaly'].set("Błąd ładowania")
-            self.monthly_summary_vars['status'].set("Błąd ładowania")
-            print(f"Błąd aktualizacji podsumowania: {e}")
+        self.wykonawca.zlec('podsumowanie_miesieczne', self.manager.pobierz_podsumowanie_miesięczne,
+                            po_wyniku=self._pokaz_podsumowanie_miesieczne,
+                            po_bledzie=self._blad_podsumowania)
+    
+    def _pokaz_podsumowanie_miesieczne(self, podsumowanie: Dict):
+        """Wyświetla pobrane podsumowanie miesięczne"""
+        # Zaktualizuj etykiety
+        self.monthly_summary_vars['przychody'].set(f"{podsumowanie['przychody_suma']:.2f} PLN")
+        self.monthly_summary_vars['limit'].set(f"{podsumowanie['limit_miesięczny']:.2f} PLN")
+        self.monthly_summary_vars['pozostaly'].set(f"{podsumowanie['pozostaly_limit']:.2f} PLN")
+        self.monthly_summary_vars['status'].set(f"{podsumowanie['status']} ({podsumowanie['procent_wykorzystania']:.1f}%)")
+        
+        # Ustaw kolor statusu
+        if podsumowanie['status_kolor'] == 'red':
+            self.status_label.config(foreground='red')
+            self.pozostaly_label.config(foreground='red')
+        elif podsumowanie['status_kolor'] == 'orange':
+            self.status_label.config(foreground='orange')
+            self.pozostaly_label.config(foreground='orange')
+        elif podsumowanie['status_kolor'] == 'yellow':
+            self.status_label.config(foreground='#DAA520')  # Ciemny złoty
+            self.pozostaly_label.config(foreground='black')
+        else:
+            self.status_label.config(foreground='green')
+            self.pozostaly_label.config(foreground='green')
+        
+        # Ustaw pasek postępu
+        self.progress_var.set(podsumowanie['procent_wykorzystania'])
+        
+        # Ustaw kolor paska postępu
+        style = ttk.Style()
+        if podsumowanie['status_kolor'] == 'red':
+            style.configure("TProgressbar", background='red')
+        elif podsumowanie['status_kolor'] == 'orange':
+            style.configure("TProgressbar", background='orange')
+        elif podsumowanie['status_kolor'] == 'yellow':
+            style.configure("TProgressbar", background='#DAA520')
+        else:
+            style.configure("TProgressbar", background='green')
+    
+    def _blad_podsumowania(self, e: Exception):
+        """Oznacza podsumowanie miesięczne jako nieudane"""
+        self.monthly_summary_vars['przychody'].set("Błąd ładowania")
+        self.monthly_summary_vars['pozostaly'].set("Błąd ładowania")
+        self.monthly_summary_vars['status'].set("Błąd ładowania")
+        print(f"Błąd aktualizacji podsumowania: {e}")
     
     def show_about_dialog(self):
         """Pokazuje okno dialogowe z pełnymi informacjami o wersji"""
@@ -6,9 +6,11 @@ Główna logika biznesowa aplikacji do rachunków
 
 import os
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 from database import DatabaseManager
 from walidacja import WalidatorDanych
+from pieniadze import Kwota
+import kopia_zapasowa
 
 # Spróbuj zaimportować reportlab, jeśli nie ma to użyj prostej wersji
 try:
@@ -33,6 +35,69 @@ class RachunekManager:
         self.pdf_generator = PDFGenerator()
         self.walidator = WalidatorDanych()
     
+    def zamknij(self) -> None:
+        """Zamyka połączenia z bazą danych"""
+        self.db.zamknij()
+    
+    def utworz_kopie_zapasowa(self) -> Dict:
+        """
+        Tworzy skompresowaną kopię zapasową bazy danych z rotacją starych kopii
+        
+        Returns:
+            Słownik z wynikiem operacji i ścieżką pliku kopii
+        """
+        wynik = {'success': False, 'error': None}
+        
+        try:
+            wynik['plik'] = kopia_zapasowa.utworz_kopie(self.db.db_path)
+            wynik['success'] = True
+        except Exception as e:
+            wynik['error'] = f"Błąd podczas tworzenia kopii zapasowej: {str(e)}"
+        
+        return wynik
+    
+    def archiwizuj_rok(self, rok: int) -> Dict:
+        """
+        Przenosi rachunki zamkniętego roku do archiwum rocznego
+        
+        Args:
+            rok: Rok wcześniejszy niż bieżący
+        
+        Returns:
+            Słownik z wynikiem operacji i liczbą przeniesionych rachunków
+        """
+        wynik = {'success': False, 'error': None, 'liczba': 0}
+        
+        try:
+            wynik['liczba'] = self.db.archiwizuj_rok(rok)
+            wynik['success'] = True
+        except ValueError as e:
+            wynik['error'] = str(e)
+        except Exception as e:
+            wynik['error'] = f"Błąd podczas archiwizacji roku {rok}: {str(e)}"
+        
+        return wynik
+    
+    def konserwuj_baze(self, pelna: bool = False) -> Dict:
+        """
+        Konserwacja bazy danych: odzyskanie wolnych stron i odświeżenie statystyk
+        
+        Args:
+            pelna: Czy wykonać pełne VACUUM
+        
+        Returns:
+            Słownik z wynikiem operacji i listą wykonanych kroków
+        """
+        wynik = {'success': False, 'error': None, 'kroki': []}
+        
+        try:
+            wynik['kroki'] = self.db.konserwuj(pelna)
+            wynik['success'] = True
+        except Exception as e:
+            wynik['error'] = f"Błąd podczas konserwacji bazy danych: {str(e)}"
+        
+        return wynik
+    
     def pobierz_domyslnego_sprzedawce(self) -> Optional[Dict]:
         """Pobiera dane domyślnego sprzedawcy"""
         return self.db.get_domyslny_sprzedawca()
@@ -65,6 +130,7 @@ class RachunekManager:
             
         Returns:
             Słownik z wynikiem operacji: {'success': bool, 'errors': List[str], 'rachunek_id': int, 'pdf_path': str}
+            (pdf_path jest None, gdy rachunek zapisano, ale PDF nie powstał - opis w 'warnings')
         """
         wynik = {
             'success': False,
@@ -116,10 +182,6 @@ class RachunekManager:
                     # Ostrzeżenia nie blokują, ale informują użytkownika
                     wynik['warnings'] = ostrzezenia
             
-            # Generowanie numeru rachunku
-            numer_rachunku = self.db.generuj_numer_rachunku()
-            dane_znormalizowane['numer_rachunku'] = numer_rachunku
-            
             # Ustawienie daty wystawienia
             dane_znormalizowane['data_wystawienia'] = datetime.now().strftime('%Y-%m-%d')
             
@@ -128,34 +190,80 @@ class RachunekManager:
             dane_znormalizowane['kwota_do_zaplaty'] = kwota
             dane_znormalizowane['kwota_slownie'] = kwota_slownie(kwota)
             
-            # Tworzenie nazwy pliku PDF
             if folder_docelowy is None:
                 folder_docelowy = os.getcwd()
             
-            safe_numer = numer_rachunku.replace('/', '_')
-            nazwa_pliku = f"rachunek_{safe_numer}.pdf"
-            sciezka_pdf = os.path.join(folder_docelowy, nazwa_pliku)
-            
-            # Generowanie PDF
-            self.pdf_generator.generuj_rachunek_pdf(dane_znormalizowane, sciezka_pdf)
-            dane_znormalizowane['plik_pdf'] = sciezka_pdf
-            
-            # Zapisanie do bazy danych
-            rachunek_id = self.db.zapisz_rachunek(dane_znormalizowane)
+            # Numer i zapis w jednej krótkiej transakcji; PDF powstaje po zatwierdzeniu
+            dane_znormalizowane['plik_pdf'] = None
+            rachunek_id, numer_rachunku = self.db.zapisz_rachunek_z_numerem(dane_znormalizowane)
             
             wynik['success'] = True
             wynik['rachunek_id'] = rachunek_id
-            wynik['pdf_path'] = sciezka_pdf
+            
+            dane_znormalizowane['numer_rachunku'] = numer_rachunku
+            sciezka_pdf = self._sciezka_pdf(folder_docelowy, numer_rachunku)
+            try:
+                self._zapisz_pdf(dane_znormalizowane, sciezka_pdf)
+            except Exception as e:
+                # Rachunek zostaje zapisany bez pliku PDF (plik_pdf = NULL) -
+                # plik można utworzyć później przez regenerację PDF
+                wynik.setdefault('warnings', []).append(
+                    f"Rachunek {numer_rachunku} został zapisany, ale nie udało się "
+                    f"wygenerować pliku PDF: {str(e)}. Użyj opcji \"Regeneruj PDF\"."
+                )
+            else:
+                self.db.ustaw_plik_pdf(rachunek_id, sciezka_pdf)
+                wynik['pdf_path'] = sciezka_pdf
             
         except Exception as e:
             wynik['errors'].append(f"Błąd podczas tworzenia rachunku: {str(e)}")
         
         return wynik
     
+    def _zapisz_pdf(self, dane_rachunku: Dict, sciezka_pdf: str) -> None:
+        """
+        Generuje PDF do pliku tymczasowego i zastępuje nim plik docelowy
+        
+        Nieudane generowanie nie zostawia niepełnego pliku ani nie nadpisuje
+        istniejącego pliku PDF.
+        
+        Args:
+            dane_rachunku: Dane rachunku z nadanym numerem
+            sciezka_pdf: Docelowa ścieżka pliku PDF
+        """
+        sciezka_tymczasowa = sciezka_pdf + '.tmp'
+        try:
+            self.pdf_generator.generuj_rachunek_pdf(dane_rachunku, sciezka_tymczasowa)
+            os.replace(sciezka_tymczasowa, sciezka_pdf)
+        except Exception:
+            if os.path.exists(sciezka_tymczasowa):
+                os.remove(sciezka_tymczasowa)
+            raise
+    
+    @staticmethod
+    def _sciezka_pdf(folder: str, numer_rachunku: str) -> str:
+        """Zwraca ścieżkę pliku PDF rachunku o podanym numerze"""
+        safe_numer = numer_rachunku.replace('/', '_')
+        return os.path.join(folder, f"rachunek_{safe_numer}.pdf")
+    
     def pobierz_liste_rachunkow(self) -> List[Dict]:
         """Pobiera listę wszystkich rachunków"""
         return self.db.pobierz_wszystkie_rachunki()
     
+    def pobierz_strone_rachunkow(self, kursor: Optional[str] = None,
+                                 rozmiar_strony: int = None) -> Dict:
+        """
+        Pobiera stronę listy rachunków, od najnowszych
+        
+        Args:
+            kursor: Token kontynuacji z poprzedniej strony (None - pierwsza strona)
+            rozmiar_strony: Liczba rachunków na stronie
+            
+        Returns:
+            Słownik {'rachunki': List[Dict], 'kursor': token następnej strony lub None}
+        """
+        return self.db.pobierz_strone_rachunkow(kursor, rozmiar_strony)
+    
     def wyszukaj_rachunki(self, query: str) -> List[Dict]:
         """
         Wyszukuje rachunki
@@ -183,20 +291,30 @@ class RachunekManager:
         """
         return self.db.pobierz_rachunek_szczegoly(rachunek_id)
     
-    def eksportuj_rachunki_csv(self, sciezka_pliku: str) -> Dict:
+    def eksportuj_rachunki_csv(self, sciezka_pliku: str, kolumny: List[str] = None,
+                               data_od: str = None, data_do: str = None) -> Dict:
         """
         Eksportuje rachunki do pliku CSV
         
         Args:
-            sciezka_pliku: Ścieżka do pliku CSV
+            sciezka_pliku: Ścieżka do pliku CSV (.csv.gz - plik skompresowany)
+            kolumny: Kolumny do eksportu (domyślnie wszystkie)
+            data_od: Najwcześniejsza data wystawienia (włącznie)
+            data_do: Najpóźniejsza data wystawienia (włącznie)
             
         Returns:
             Słownik z wynikiem operacji
         """
-        wynik = {'success': False, 'error': None}
+        wynik = {'success': False, 'error': None, 'liczba_rachunkow': 0}
         
         try:
-            self.db.eksportuj_do_csv(sciezka_pliku)
+            if data_od:
+                data_od = self.walidator.normalizuj_date(data_od)
+            if data_do:
+                data_do = self.walidator.normalizuj_date(data_do)
+            wynik['liczba_rachunkow'] = self.db.eksportuj_do_csv(
+                sciezka_pliku, kolumny, data_od, data_do
+            )
             wynik['success'] = True
         except Exception as e:
             wynik['error'] = f"Błąd podczas eksportu: {str(e)}"
@@ -251,7 +369,7 @@ class RachunekManager:
             )
         
         # Normalizacja kwoty
-        if 'cena_jednostkowa' in dane and isinstance(dane['cena_jednostkowa'], str):
+        if 'cena_jednostkowa' in dane and not isinstance(dane['cena_jednostkowa'], Kwota):
             dane_znormalizowane['cena_jednostkowa'] = self.walidator.normalizuj_kwote(
                 dane['cena_jednostkowa']
             )
@@ -335,16 +453,16 @@ class RachunekManager:
                 'kwota_slownie': szczegoly['kwota_slownie']
             }
             
-            # Ustaw folder docelowy
+            # Ustaw folder docelowy (rachunek bez PDF nie ma zapisanej ścieżki)
             if folder_docelowy is None:
-                folder_docelowy = os.path.dirname(szczegoly.get('plik_pdf', os.getcwd()))
+                plik_pdf = szczegoly.get('plik_pdf')
+                folder_docelowy = os.path.dirname(plik_pdf) if plik_pdf else os.getcwd()
             
             # Wygeneruj nowy PDF
-            safe_numer = szczegoly['numer_rachunku'].replace('/', '_')
-            nazwa_pliku = f"rachunek_{safe_numer}.pdf"
-            sciezka_pdf = os.path.join(folder_docelowy, nazwa_pliku)
+            sciezka_pdf = self._sciezka_pdf(folder_docelowy, szczegoly['numer_rachunku'])
             
-            self.pdf_generator.generuj_rachunek_pdf(dane_rachunku, sciezka_pdf)
+            self._zapisz_pdf(dane_rachunku, sciezka_pdf)
+            self.db.ustaw_plik_pdf(rachunek_id, sciezka_pdf)
             
             wynik['success'] = True
             wynik['pdf_path'] = sciezka_pdf
@@ -374,27 +492,12 @@ class RachunekManager:
         rachunki = self.db.pobierz_rachunki_miesiac(miesiac, rok)
         
         # Określ limit na podstawie roku
-        limit_miesięczny = 3499.50  # Domyślny limit
-        if rok == 2025:
-            import config
-            limit_miesięczny = config.MONTHLY_REVENUE_LIMIT_2025
+        limit_miesięczny = self._limit_miesieczny(rok)
         
-        pozostaly_limit = max(0, limit_miesięczny - przychody)
-        procent_wykorzystania = (przychody / limit_miesięczny) * 100 if limit_miesięczny > 0 else 0
+        pozostaly_limit = max(Kwota(0), limit_miesięczny - przychody)
+        procent_wykorzystania = (przychody.grosze / limit_miesięczny.grosze) * 100 if limit_miesięczny else 0
         
-        # Określ status
-        if przychody > limit_miesięczny:
-            status = "PRZEKROCZONY"
-            status_kolor = "red"
-        elif przychody > limit_miesięczny * 0.8:
-            status = "OSTRZEŻENIE"
-            status_kolor = "orange"
-        elif przychody > limit_miesięczny * 0.5:
-            status = "NORMALNY"
-            status_kolor = "yellow"
-        else:
-            status = "BEZPIECZNY"
-            status_kolor = "green"
+        status, status_kolor = self._status_limitu(przychody, limit_miesięczny)
         
         return {
             'miesiac': miesiac,
@@ -403,9 +506,9 @@ class RachunekManager:
                 "Styczeń", "Luty", "Marzec", "Kwiecień", "Maj", "Czerwiec",
                 "Lipiec", "Sierpień", "Wrzesień", "Październik", "Listopad", "Grudzień"
             ][miesiac - 1],
-            'przychody_suma': przychody,
-            'limit_miesięczny': limit_miesięczny,
-            'pozostaly_limit': pozostaly_limit,
+            'przychody_suma': float(przychody),
+            'limit_miesięczny': float(limit_miesięczny),
+            'pozostaly_limit': float(pozostaly_limit),
             'procent_wykorzystania': round(procent_wykorzystania, 1),
             'liczba_rachunkow': len(rachunki),
             'rachunki': rachunki,
@@ -429,28 +532,14 @@ class RachunekManager:
         miesiace = self.db.pobierz_raport_miesięczny(rok)
         
         # Dodaj informacje o limitach dla każdego miesiąca
-        import config
-        limit_miesięczny = config.MONTHLY_REVENUE_LIMIT_2025 if rok == 2025 else 3499.50
+        limit_miesięczny = self._limit_miesieczny(rok)
         
         for miesiac in miesiace:
             suma_kwot = miesiac['suma_kwot']
-            miesiac['limit_miesięczny'] = limit_miesięczny
-            miesiac['pozostaly_limit'] = max(0, limit_miesięczny - suma_kwot)
-            miesiac['procent_wykorzystania'] = round((suma_kwot / limit_miesięczny) * 100, 1)
-            
-            # Status kolory
-            if suma_kwot > limit_miesięczny:
-                miesiac['status'] = "PRZEKROCZONY"
-                miesiac['status_kolor'] = "red"
-            elif suma_kwot > limit_miesięczny * 0.8:
-                miesiac['status'] = "OSTRZEŻENIE" 
-                miesiac['status_kolor'] = "orange"
-            elif suma_kwot > limit_miesięczny * 0.5:
-                miesiac['status'] = "NORMALNY"
-                miesiac['status_kolor'] = "yellow"
-            else:
-                miesiac['status'] = "BEZPIECZNY"
-                miesiac['status_kolor'] = "green"
+            miesiac['limit_miesięczny'] = float(limit_miesięczny)
+            miesiac['pozostaly_limit'] = float(max(Kwota(0), limit_miesięczny - suma_kwot))
+            miesiac['procent_wykorzystania'] = round((suma_kwot.grosze / limit_miesięczny.grosze) * 100, 1)
+            miesiac['status'], miesiac['status_kolor'] = self._status_limitu(suma_kwot, limit_miesięczny)
         
         return {
             'rok': rok,
@@ -458,6 +547,29 @@ class RachunekManager:
             'podsumowanie_roczne': self._oblicz_podsumowanie_roczne(miesiace, limit_miesięczny)
         }
     
+    @staticmethod
+    def _limit_miesieczny(rok: int) -> Kwota:
+        """Zwraca miesięczny limit przychodów obowiązujący w danym roku"""
+        import config
+        # Na razie tylko limit na 2025, można rozszerzyć dla innych lat
+        return Kwota.z_zlotych(config.MONTHLY_REVENUE_LIMIT_2025 if rok == 2025 else 3499.50)
+    
+    @staticmethod
+    def _status_limitu(przychody: Kwota, limit_miesięczny: Kwota) -> Tuple[str, str]:
+        """
+        Określa status wykorzystania limitu (porównania w groszach)
+        
+        Returns:
+            Krotka (status, kolor statusu)
+        """
+        if przychody > limit_miesięczny:
+            return "PRZEKROCZONY", "red"
+        if przychody.grosze * 10 > limit_miesięczny.grosze * 8:
+            return "OSTRZEŻENIE", "orange"
+        if przychody.grosze * 2 > limit_miesięczny.grosze:
+            return "NORMALNY", "yellow"
+        return "BEZPIECZNY", "green"
+    
     def pobierz_raport_roczny(self) -> Dict:
         """
         Pobiera raport roczny z dodatkowymi analizami
@@ -483,8 +595,24 @@ class RachunekManager:
             Lista top klientów z dodatkowymi informacjami
         """
         return self.db.pobierz_top_klientow(limit)
-    
-    def _oblicz_podsumowanie_roczne(self, miesiace: List[Dict], limit_miesięczny: float) -> Dict:
+
+    def pobierz_historie_klienta(self, imie: str, nazwisko: str) -> List[Dict]:
+        """
+        Pobiera historię rachunków klienta
+
+        Args:
+            imie: Imię nabywcy
+            nazwisko: Nazwisko nabywcy
+
+        Returns:
+            Lista rachunków klienta (pusta, jeśli klient nie istnieje)
+        """
+        klient = self.db.znajdz_klienta(imie, nazwisko)
+        if not klient:
+            return []
+        return self.db.pobierz_rachunki_klienta(klient['id'])
+
+    def _oblicz_podsumowanie_roczne(self, miesiace: List[Dict], limit_miesięczny: Kwota) -> Dict:
         """
         Oblicza podsumowanie roczne na podstawie danych miesięcznych
         
@@ -507,7 +635,7 @@ class RachunekManager:
             }
         
         total_rachunki = sum(m['liczba_rachunkow'] for m in miesiace)
-        total_kwoty = sum(m['suma_kwot'] for m in miesiace)
+        total_kwoty = float(sum(m['suma_kwot'] for m in miesiace))
         miesiace_aktywne = len([m for m in miesiace if m['liczba_rachunkow'] > 0])
         miesiace_przekroczone = len([m for m in miesiace if m['suma_kwot'] > limit_miesięczny])
         
@@ -558,6 +686,24 @@ class RachunekManager:
         
         return wynik
     
+    def usun_rachunki(self, rachunek_ids: Iterable[int], powod: str = "") -> Dict:
+        """
+        Usuwa wiele rachunków w jednej transakcji
+        
+        Args:
+            rachunek_ids: ID rachunków do usunięcia
+            powod: Powód usunięcia
+            
+        Returns:
+            Słownik z wynikiem operacji i wynikami dla poszczególnych ID
+        """
+        try:
+            wyniki = self.db.usun_rachunki(rachunek_ids, powod)
+        except Exception as e:
+            return {'success': False, 'error': f"Błąd podczas usuwania: {str(e)}", 'wyniki': {}}
+        
+        return self._wynik_zbiorczy(wyniki, "Rachunek nie istnieje lub został już usunięty")
+    
     def pobierz_usunięte_rachunki(self) -> List[Dict]:
         """Pobiera listę usuniętych rachunków"""
         return self.db.pobierz_usunięte_rachunki()
@@ -585,6 +731,23 @@ class RachunekManager:
         
         return wynik
     
+    def przywroc_rachunki(self, deleted_ids: Iterable[int]) -> Dict:
+        """
+        Przywraca wiele usuniętych rachunków w jednej transakcji
+        
+        Args:
+            deleted_ids: ID usuniętych rachunków
+            
+        Returns:
+            Słownik z wynikiem operacji i wynikami dla poszczególnych ID
+        """
+        try:
+            wyniki = self.db.przywroc_rachunki(deleted_ids)
+        except Exception as e:
+            return {'success': False, 'error': f"Błąd podczas przywracania: {str(e)}", 'wyniki': {}}
+        
+        return self._wynik_zbiorczy(wyniki, "Nie można przywrócić rachunku (może już istnieć rachunek o tym numerze)")
+    
     def trwale_usun_rachunek(self, deleted_id: int) -> Dict:
         """
         Trwale usuwa rachunek
@@ -608,6 +771,45 @@ class RachunekManager:
         
         return wynik
     
+    def trwale_usun_rachunki(self, deleted_ids: Iterable[int]) -> Dict:
+        """
+        Trwale usuwa wiele rachunków w jednej transakcji
+        
+        Args:
+            deleted_ids: ID usuniętych rachunków
+            
+        Returns:
+            Słownik z wynikiem operacji i wynikami dla poszczególnych ID
+        """
+        try:
+            wyniki = self.db.trwale_usun_rachunki(deleted_ids)
+        except Exception as e:
+            return {'success': False, 'error': f"Błąd podczas trwałego usuwania: {str(e)}", 'wyniki': {}}
+        
+        return self._wynik_zbiorczy(wyniki, "Rachunek o podanym ID nie istnieje")
+    
+    @staticmethod
+    def _wynik_zbiorczy(wyniki: Dict[int, bool], blad: str) -> Dict:
+        """
+        Składa wynik operacji zbiorczej z wyników dla poszczególnych ID
+        
+        Args:
+            wyniki: Słownik ID -> czy operacja się powiodła
+            blad: Komunikat dla ID, dla których operacja się nie powiodła
+            
+        Returns:
+            Słownik z kluczami success, error, wyniki, udane i nieudane
+        """
+        udane = [rachunek_id for rachunek_id, ok in wyniki.items() if ok]
+        nieudane = {rachunek_id: blad for rachunek_id, ok in wyniki.items() if not ok}
+        return {
+            'success': bool(udane),
+            'error': None if udane else blad,
+            'wyniki': wyniki,
+            'udane': udane,
+            'nieudane': nieudane
+        }
+    
     def sprawdz_haslo_administratora(self, haslo: str) -> bool:
         """
         Sprawdza hasło administratora
@@ -6,6 +6,7 @@ Skrypt do resetowania licznika rachunków
 
 import sqlite3
 import os
+import archiwum
 from database import DatabaseManager
 
 def reset_licznika():
@@ -53,6 +54,18 @@ def reset_licznika():
     wybor = input("\nWybierz opcję (1/2/3): ").strip()
     
     if wybor == "1":
+        # Archiwa roczne też zawierają rachunki - bez ich usunięcia nadal byłyby
+        # widoczne w aplikacji obok rachunków numerowanych od nowa
+        archiwa = archiwum.lista_archiwow(db_path)
+        if archiwa:
+            print("\nIstnieją archiwa roczne rachunków:")
+            for rok, sciezka in archiwa.items():
+                print(f"  {rok}: {sciezka}")
+            if input("Usunąć także pliki archiwów? (t/n): ").strip().lower() != 't':
+                db.zamknij()
+                print("Anulowano reset - baza i archiwa pozostają nietknięte")
+                return
+        
         # Usuń wszystko
         with sqlite3.connect(db_path) as conn:
             cursor = conn.cursor()
@@ -61,6 +74,15 @@ def reset_licznika():
             cursor.execute("DELETE FROM sprzedawca")
             conn.commit()
             
+        # Po wyczyszczeniu bazy prawie cały plik to wolne strony
+        db.konserwuj(pelna=True)
+        db.zamknij()
+        
+        # Po zamknięciu połączeń archiwa nie są już dołączone do bazy
+        for sciezka in archiwa.values():
+            os.remove(sciezka)
+            print(f"✓ Usunięto archiwum {sciezka}")
+        
         print("✓ Cała baza danych została wyczyszczona")
         print("✓ Następny rachunek będzie miał numer 1/MM/YYYY")
         
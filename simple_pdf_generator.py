@@ -7,6 +7,7 @@ Prosty generator rachunków jako pliki tekstowe (fallback gdy brak reportlab)
 import os
 from typing import Dict
 from datetime import datetime
+from pieniadze import Kwota
 
 class SimplePDFGenerator:
     """Klasa generująca rachunki jako pliki tekstowe"""
@@ -86,20 +87,19 @@ Miejsce i data: ........................., dnia {datetime.now().strftime('%d.%m.
 """
         return tekst
 
-def kwota_slownie(kwota: float) -> str:
+def kwota_slownie(kwota) -> str:
     """
     Prosta konwersja kwoty na słowa (bez biblioteki num2words)
     
     Args:
-        kwota: Kwota do konwersji
+        kwota: Kwota do konwersji (Kwota lub liczba w złotych)
         
     Returns:
         Kwota zapisana słownie
     """
     
     # Prosta implementacja dla podstawowych kwot
-    zlote = int(kwota)
-    grosze = int(round((kwota - zlote) * 100))
+    zlote, grosze = divmod(Kwota.z_zlotych(kwota).grosze, 100)
     
     # Słownik cyfr
     cyfry = {
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test agregatów utrzymywanych przez wyzwalacze po każdej zmianie rachunków
+(przychody miesięczne i klienci)
+
+Po wstawieniu, zmianie, usunięciu przez flagę, przywróceniu i trwałym
+usunięciu rachunków agregaty muszą być równe wartościom policzonym od nowa
+z tabeli rachunki.
+"""
+
+import os
+import tempfile
+from datetime import date
+from database import DatabaseManager
+from benchmark_bazy import przykladowy_rachunek
+from pieniadze import Kwota
+
+LICZBA_RACHUNKOW = 60
+# Miesiąc z kwotami, których suma w liczbach zmiennoprzecinkowych nie jest dokładna
+GROSZOWE = [0.10] * 10 + [0.20] * 5
+
+
+def _przychody(db: DatabaseManager) -> list:
+    """Zwraca agregat przychodów i te same wartości policzone z rachunków"""
+    conn = db._polaczenie()
+    agregat = conn.execute('''
+        SELECT rok, miesiac, liczba, suma_gr, min_gr, max_gr
+        FROM przychody_miesieczne ORDER BY rok, miesiac
+    ''').fetchall()
+    z_rachunkow = conn.execute('''
+        SELECT rok, miesiac, COUNT(*), SUM(kwota_do_zaplaty_gr),
+               MIN(kwota_do_zaplaty_gr), MAX(kwota_do_zaplaty_gr)
+        FROM rachunki WHERE deleted_at IS NULL
+        GROUP BY rok, miesiac ORDER BY rok, miesiac
+    ''').fetchall()
+    return agregat, z_rachunkow
+
+
+def _sprawdz_przychody(db: DatabaseManager, krok: str) -> None:
+    """Porównuje agregat przychodów z wartościami policzonymi od nowa"""
+    agregat, z_rachunkow = _przychody(db)
+    assert agregat == z_rachunkow, f"Agregat przychodów po kroku '{krok}' różni się od rachunków"
+
+
+def _sprawdz_klientow(db: DatabaseManager, krok: str) -> None:
+    """Porównuje agregaty tabeli klienci z wartościami policzonymi od nowa"""
+    conn = db._polaczenie()
+    agregat = conn.execute('''
+        SELECT id, liczba_rachunkow, suma_gr, ostatni_rachunek FROM klienci ORDER BY id
+    ''').fetchall()
+    z_rachunkow = conn.execute('''
+        SELECT k.id, COUNT(r.id), COALESCE(SUM(r.kwota_do_zaplaty_gr), 0), MAX(r.data_wystawienia)
+        FROM klienci k
+        LEFT JOIN rachunki r ON r.klient_id = k.id AND r.deleted_at IS NULL
+        GROUP BY k.id ORDER BY k.id
+    ''').fetchall()
+    assert agregat == z_rachunkow, f"Agregaty klientów po kroku '{krok}' różnią się od rachunków"
+
+
+def _baza_z_rachunkami(katalog: str) -> DatabaseManager:
+    """Tworzy bazę z rachunkami z kilku miesięcy i miesiącem drobnych kwot"""
+    db = DatabaseManager(os.path.join(katalog, "agregaty.db"))
+    rachunki = [przykladowy_rachunek(i * 5, date(2025, 1, 1)) for i in range(LICZBA_RACHUNKOW)]
+    for i, kwota in enumerate(GROSZOWE):
+        rachunek = przykladowy_rachunek(LICZBA_RACHUNKOW * 5 + i, date(2025, 12, 1))
+        rachunek['data_wystawienia'] = '2025-12-01'
+        rachunek['cena_jednostkowa'] = rachunek['kwota_do_zaplaty'] = kwota
+        rachunki.append(rachunek)
+    db.zapisz_rachunki_batch(rachunki)
+    return db
+
+
+def _rachunki_miesiaca(db: DatabaseManager, rok: int, miesiac: int) -> list:
+    """Zwraca (id, kwota w groszach) aktywnych rachunków miesiąca, od najmniejszej kwoty"""
+    return db._polaczenie().execute('''
+        SELECT id, kwota_do_zaplaty_gr FROM rachunki
+        WHERE rok = ? AND miesiac = ? AND deleted_at IS NULL
+        ORDER BY kwota_do_zaplaty_gr, id
+    ''', (rok, miesiac)).fetchall()
+
+
+def test_przychody_miesieczne_po_zmianach():
+    """Agregat przychodów miesięcznych jest dokładny po każdej zmianie rachunków"""
+    with tempfile.TemporaryDirectory() as katalog:
+        db = _baza_z_rachunkami(katalog)
+        _sprawdz_przychody(db, "wstawienie paczki")
+        assert db.pobierz_przychody_miesiac(12, 2025) == Kwota(200)
+
+        dane = przykladowy_rachunek(0, date(2025, 2, 1))
+        del dane['numer_rachunku']
+        dane['data_wystawienia'] = '2025-02-14'
+        db.zapisz_rachunek_z_numerem(dane)
+        _sprawdz_przychody(db, "wystawienie rachunku")
+
+        conn = db._polaczenie()
+        luty = _rachunki_miesiaca(db, 2025, 2)
+        with conn:
+            # Zmiana kwoty najdroższego rachunku i przeniesienie najtańszego do innego miesiąca
+            conn.execute("UPDATE rachunki SET kwota_do_zaplaty_gr = 1 WHERE id = ?", (luty[-1][0],))
+            conn.execute("UPDATE rachunki SET data_wystawienia = '2025-03-31' WHERE id = ?", (luty[0][0],))
+        _sprawdz_przychody(db, "zmiana kwoty i daty")
+
+        # Usunięcie najtańszego i najdroższego rachunku miesiąca przelicza minimum i maksimum
+        marzec = _rachunki_miesiaca(db, 2025, 3)
+        najtanszy, najdrozszy = marzec[0][0], marzec[-1][0]
+        db.usun_rachunki([najtanszy, najdrozszy], "test")
+        _sprawdz_przychody(db, "usunięcie")
+
+        assert db.przywroc_rachunki([najtanszy]) == {najtanszy: True}
+        _sprawdz_przychody(db, "przywrócenie")
+
+        assert db.trwale_usun_rachunki([najdrozszy]) == {najdrozszy: True}
+        _sprawdz_przychody(db, "trwałe usunięcie")
+
+        # Usunięcie wszystkich rachunków miesiąca usuwa jego wiersz agregatu
+        db.usun_rachunki([rachunek_id for rachunek_id, _ in _rachunki_miesiaca(db, 2025, 12)])
+        _sprawdz_przychody(db, "usunięcie całego miesiąca")
+        assert db.pobierz_przychody_miesiac(12, 2025) == Kwota(0)
+        db.zamknij()
+
+
+def test_agregaty_klientow_po_zmianach():
+    """Liczba rachunków, suma i data ostatniego rachunku klienta są dokładne po każdej zmianie"""
+    with tempfile.TemporaryDirectory() as katalog:
+        db = _baza_z_rachunkami(katalog)
+        _sprawdz_klientow(db, "wstawienie paczki")
+
+        # Ta sama osoba zapisana inaczej to ten sam klient
+        anna = db.znajdz_klienta('Anna', 'Nowak')
+        dane = przykladowy_rachunek(0, date(2025, 11, 1))
+        del dane['numer_rachunku']
+        dane['nabywca'] = dict(dane['nabywca'], imie='  ANNA ', nazwisko='nowak  ')
+        rachunek_id, _ = db.zapisz_rachunek_z_numerem(dane)
+        po_wystawieniu = db.znajdz_klienta('anna', 'NOWAK')
+        assert po_wystawieniu['id'] == anna['id']
+        assert po_wystawieniu['liczba_rachunkow'] == anna['liczba_rachunkow'] + 1
+        assert po_wystawieniu['ostatni_rachunek'] == dane['data_wystawienia']
+        _sprawdz_klientow(db, "wystawienie rachunku")
+
+        conn = db._polaczenie()
+        jan = db.znajdz_klienta('Jan', 'Nowak')
+        with conn:
+            # Zmiana kwot i przepisanie rachunku do innego klienta
+            conn.execute("UPDATE rachunki SET kwota_do_zaplaty_gr = kwota_do_zaplaty_gr + 1 "
+                         "WHERE klient_id = ?", (jan['id'],))
+            conn.execute("UPDATE rachunki SET klient_id = ? WHERE id = ?", (jan['id'], rachunek_id))
+        _sprawdz_klientow(db, "zmiana kwoty i klienta")
+
+        # Usunięcie najnowszego rachunku klienta cofa datę ostatniego rachunku
+        db.usun_rachunki([rachunek_id])
+        _sprawdz_klientow(db, "usunięcie")
+        db.przywroc_rachunki([rachunek_id])
+        _sprawdz_klientow(db, "przywrócenie")
+        db.usun_rachunki([rachunek_id])
+        db.trwale_usun_rachunki([rachunek_id])
+        _sprawdz_klientow(db, "trwałe usunięcie")
+        assert db.znajdz_klienta('Jan', 'Nowak')['liczba_rachunkow'] == jan['liczba_rachunkow']
+        db.zamknij()
+
+
+if __name__ == "__main__":
+    test_przychody_miesieczne_po_zmianach()
+    test_agregaty_klientow_po_zmianach()
+    print("[OK] Agregaty są zgodne z rachunkami")
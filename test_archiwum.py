@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test archiwów rocznych - odczyty łączące bazę główną z archiwami
+
+Po przeniesieniu lat do archiwów listy, wyszukiwanie, raporty, klienci,
+statystyki i eksport muszą zwracać to samo co przed archiwizacją, także
+gdy archiwów jest więcej, niż SQLite pozwala naraz dołączyć do połączenia.
+Kopia zapasowa obejmuje archiwa, więc przywrócona baza daje te same odczyty.
+"""
+
+import os
+import sqlite3
+import tempfile
+import kopia_zapasowa
+from database import DatabaseManager
+from benchmark_bazy import przykladowy_rachunek
+from test_agregaty import _sprawdz_przychody, _sprawdz_klientow
+
+LATA = list(range(2010, 2022))
+RACHUNKOW_W_ROKU = 6
+
+
+def _baza(katalog: str) -> DatabaseManager:
+    """Tworzy bazę z rachunkami z LATA, każdy z inną datą wystawienia"""
+    db = DatabaseManager(os.path.join(katalog, "archiwum.db"))
+    rachunki = []
+    for i in range(len(LATA) * RACHUNKOW_W_ROKU):
+        rachunek = przykladowy_rachunek(i)
+        rok, miesiac = LATA[i // RACHUNKOW_W_ROKU], i % RACHUNKOW_W_ROKU * 2 + 1
+        rachunek['numer_rachunku'] = f"{i + 1}/{miesiac:02d}/{rok}"
+        rachunek['data_wystawienia'] = rachunek['data_wykonania_uslugi'] = f"{rok}-{miesiac:02d}-{i % 28 + 1:02d}"
+        rachunki.append(rachunek)
+    db.zapisz_rachunki_batch(rachunki)
+    return db
+
+
+def _odczyty(db: DatabaseManager, katalog: str) -> dict:
+    """Zwraca wyniki wszystkich odczytów łączących bazę główną z archiwami"""
+    strony, kursor = [], None
+    while True:
+        strona = db.pobierz_strone_rachunkow(kursor, 7)
+        strony.extend(dict(wiersz) for wiersz in strona['rachunki'])
+        kursor = strona['kursor']
+        if kursor is None:
+            break
+
+    sciezka_csv = os.path.join(katalog, "eksport.csv")
+    liczba_csv = db.eksportuj_do_csv(sciezka_csv)
+    with open(sciezka_csv, encoding='utf-8-sig') as plik:
+        eksport = plik.read()
+
+    rachunki = [dict(wiersz) for wiersz in db.pobierz_wszystkie_rachunki()]
+    klienci = sorted(db.pobierz_top_klientow(1000), key=lambda klient: klient['klient_id'])
+    szczegoly = {}
+    for rachunek in rachunki:
+        # Snapshot sprzedawcy ma w archiwum własne id - porównywane są dane sprzedawcy
+        szczegoly[rachunek['id']] = dict(db.pobierz_rachunek_szczegoly(rachunek['id']), sprzedawca_id=None)
+
+    return {
+        'lista': rachunki,
+        'strony': strony,
+        'szukaj': sorted(wiersz['id'] for wiersz in db.szukaj_rachunki('Nowak')),
+        'szukaj LIKE': [dict(wiersz) for wiersz in db.szukaj_rachunki('/')],
+        'szczegoly': szczegoly,
+        'eksport': (liczba_csv, eksport),
+        'raport roczny': db.pobierz_raport_roczny(),
+        'raporty miesięczne': [db.pobierz_raport_miesięczny(rok) for rok in LATA],
+        'przychody': [db.pobierz_przychody_miesiac(1, rok) for rok in LATA],
+        'miesiace': [[dict(wiersz) for wiersz in db.pobierz_rachunki_miesiac(1, rok)] for rok in LATA],
+        'top klienci': klienci,
+        'klienci': [db.znajdz_klienta(*klient['klient'].split()) for klient in klienci],
+        'rachunki klientów': [db.pobierz_rachunki_klienta(klient['klient_id']) for klient in klienci],
+        'statystyki': db.pobierz_statystyki_ogolne(),
+    }
+
+
+def _dolaczone(conn: sqlite3.Connection) -> list:
+    """Zwraca schematy archiwów dołączonych do połączenia"""
+    return [nazwa for _, nazwa, _ in conn.execute("PRAGMA database_list") if nazwa not in ('main', 'temp')]
+
+
+def test_archiwizacja_roku():
+    """Po przeniesieniu lat odczyty się nie zmieniają, rachunki znikają z głównej bazy, a zmiany są odrzucane"""
+    with tempfile.TemporaryDirectory() as katalog:
+        db = _baza(katalog)
+        conn = db._polaczenie()
+        archiwalne_lata = LATA[:3]
+        usuniety = db.pobierz_rachunki_miesiac(1, archiwalne_lata[1])[0]['id']
+        db.usun_rachunki([usuniety], "Błędne dane nabywcy")
+        przed = _odczyty(db, katalog)
+
+        assert db.archiwizuj_rok(archiwalne_lata[0]) == RACHUNKOW_W_ROKU
+        assert db.archiwizuj_rok(archiwalne_lata[1]) == RACHUNKOW_W_ROKU - 1
+        assert db.archiwizuj_rok(archiwalne_lata[2]) == RACHUNKOW_W_ROKU
+        # Ponowne przeniesienie roku bez nowych rachunków nic nie robi
+        assert db.archiwizuj_rok(archiwalne_lata[0]) == 0
+        assert sorted(db._archiwa()) == archiwalne_lata
+
+        # Aktywne rachunki lat archiwum zniknęły z głównej bazy razem z agregatami,
+        # usunięty rachunek został w niej, żeby można go było przywrócić
+        lata_sql = ', '.join(str(rok) for rok in archiwalne_lata)
+        assert conn.execute(f"SELECT id FROM main.rachunki WHERE rok IN ({lata_sql})").fetchall() == [(usuniety,)]
+        assert conn.execute(f"""
+            SELECT COUNT(*) FROM main.przychody_miesieczne WHERE rok IN ({lata_sql}) AND liczba > 0
+        """).fetchone()[0] == 0
+        _sprawdz_przychody(db, "archiwizacja")
+        _sprawdz_klientow(db, "archiwizacja")
+        assert [wpis['id'] for wpis in db.pobierz_usunięte_rachunki()] == [usuniety]
+
+        po = _odczyty(db, katalog)
+        for nazwa in przed:
+            assert po[nazwa] == przed[nazwa], f"{nazwa} różni się po archiwizacji"
+        statystyki = po['statystyki']
+        assert statystyki['total_rachunki'] == len(po['lista']) == len(LATA) * RACHUNKOW_W_ROKU - 1
+        assert statystyki['total_kwota'] == round(sum(wiersz['kwota'] for wiersz in po['lista']), 2)
+        assert (statystyki['pierwszy_rachunek'], statystyki['ostatni_rachunek']) == \
+            (po['lista'][-1]['data_wystawienia'], po['lista'][0]['data_wystawienia'])
+        archiwalny = next(wiersz for wiersz in po['lista'] if wiersz['numer_rachunku'].endswith(f"/{LATA[0]}"))
+        assert [wiersz['id'] for wiersz in db.szukaj_rachunki(archiwalny['numer_rachunku'])] == [archiwalny['id']]
+
+        # Zmiany rachunków z archiwum są odrzucane w całości, razem z rachunkami głównej bazy
+        biezacy = po['lista'][0]['id']
+        for zmiana in (db.usun_rachunki, db.przywroc_rachunki, db.trwale_usun_rachunki):
+            try:
+                zmiana([biezacy, archiwalny['id']])
+            except ValueError as e:
+                assert archiwalny['numer_rachunku'] in str(e) and str(LATA[0]) in str(e)
+            else:
+                raise AssertionError(f"{zmiana.__name__} zmienił rachunek z archiwum")
+        assert db.ustaw_plik_pdf(archiwalny['id'], "inny.pdf") is False
+        po_zmianach = _odczyty(db, katalog)
+        for nazwa in przed:
+            assert po_zmianach[nazwa] == przed[nazwa], f"{nazwa} zmienione przez odrzuconą zmianę"
+        db.zamknij()
+
+
+def test_wiecej_archiwow_niz_limit_dolaczonych():
+    """Odczyty bez podanego roku działają, gdy archiwów jest więcej niż limit ATTACH"""
+    with tempfile.TemporaryDirectory() as katalog:
+        db = _baza(katalog)
+        conn = db._polaczenie()
+        limit = db._limit_dolaczonych(conn)
+        if limit >= len(LATA):
+            # SQLite zbudowane z wyższym SQLITE_MAX_ATTACHED
+            conn.setlimit(sqlite3.SQLITE_LIMIT_ATTACHED, 10)
+            limit = 10
+        przed = _odczyty(db, katalog)
+
+        for rok in LATA:
+            assert db.archiwizuj_rok(rok) == RACHUNKOW_W_ROKU
+        assert len(db._archiwa()) == len(LATA) > limit
+        assert conn.execute("SELECT COUNT(*) FROM rachunki").fetchone()[0] == 0
+
+        szukane = db.szukaj_rachunki('Nowak')
+        assert sorted(wiersz['id'] for wiersz in szukane) == przed['szukaj']
+        assert len(_dolaczone(conn)) <= limit
+
+        po = _odczyty(db, katalog)
+        for nazwa in przed:
+            assert po[nazwa] == przed[nazwa], f"{nazwa} różni się po archiwizacji"
+        assert len(_dolaczone(conn)) <= limit
+        # Tabele tymczasowe z wynikami grup archiwów są usuwane po zapytaniu
+        assert conn.execute("SELECT COUNT(*) FROM temp.sqlite_master").fetchone()[0] == 0
+
+        # Zmiana rachunku z archiwum spoza dołączonych jest odrzucana
+        najstarszy = przed['strony'][-1]['id']
+        try:
+            db.usun_rachunki([najstarszy])
+        except ValueError as e:
+            assert str(LATA[0]) in str(e)
+        else:
+            raise AssertionError("Usunięto rachunek z archiwum")
+        db.zamknij()
+
+
+def test_kopia_i_przywrocenie_archiwow():
+    """Kopia zapasowa obejmuje archiwa, a niezmienione archiwa nie są kopiowane ponownie"""
+    with tempfile.TemporaryDirectory() as katalog:
+        db = _baza(katalog)
+        katalog_kopii = os.path.join(katalog, "kopie")
+        for rok in LATA[:3]:
+            db.archiwizuj_rok(rok)
+
+        kopia = kopia_zapasowa.utworz_kopie(db.db_path, katalog_kopii)
+        assert list(kopia_zapasowa.kopie_archiwow(db.db_path, katalog_kopii)) == LATA[:3]
+        # Archiwa się nie zmieniły - następna kopia obejmuje tylko bazę
+        assert kopia_zapasowa.kopiuj_archiwa(db.db_path, katalog_kopii) == []
+
+        # Rachunek dopisany do zarchiwizowanego roku zmienia jego archiwum
+        rachunek = przykladowy_rachunek(len(LATA) * RACHUNKOW_W_ROKU)
+        rachunek['numer_rachunku'] = f"99/12/{LATA[0]}"
+        rachunek['data_wystawienia'] = rachunek['data_wykonania_uslugi'] = f"{LATA[0]}-12-30"
+        db.zapisz_rachunek(rachunek)
+        db.archiwizuj_rok(LATA[0])
+        zmienione = kopia_zapasowa.kopiuj_archiwa(db.db_path, katalog_kopii)
+        assert zmienione == [kopia_zapasowa.kopie_archiwow(db.db_path, katalog_kopii)[LATA[0]]]
+        kopia = kopia_zapasowa.utworz_kopie(db.db_path, katalog_kopii)
+        przed = _odczyty(db, katalog)
+        db.zamknij()
+
+        katalog_przywrocenia = os.path.join(katalog, "przywrocona")
+        os.makedirs(katalog_przywrocenia)
+        db_path = os.path.join(katalog_przywrocenia, "archiwum.db")
+        przywrocone = kopia_zapasowa.przywroc_kopie(kopia, db_path)
+        assert len(przywrocone) == 4
+        try:
+            kopia_zapasowa.przywroc_kopie(kopia, db_path)
+        except FileExistsError:
+            pass
+        else:
+            raise AssertionError("Przywrócenie nadpisało istniejącą bazę")
+
+        db = DatabaseManager(db_path)
+        assert sorted(db._archiwa()) == LATA[:3]
+        po = _odczyty(db, katalog_przywrocenia)
+        for nazwa in przed:
+            assert po[nazwa] == przed[nazwa], f"{nazwa} różni się po przywróceniu"
+        db.zamknij()
+
+
+if __name__ == "__main__":
+    test_archiwizacja_roku()
+    test_wiecej_archiwow_niz_limit_dolaczonych()
+    test_kopia_i_przywrocenie_archiwow()
+    print("[OK] Odczyty z archiwów działają przy dowolnej liczbie lat")
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test migracji bazy utworzonej przez pierwszą wersję aplikacji
+
+Baza ze schematem sprzed migracji (kwoty REAL, dane sprzedawcy w każdym
+rachunku, bez tabeli klientów) jest otwierana przez DatabaseManager, który
+musi ją przenieść do bieżącego schematu bez utraty danych.
+"""
+
+import os
+import sqlite3
+import tempfile
+from datetime import date, timedelta
+from collections import Counter
+from database import DatabaseManager
+from migracje import MIGRACJE, wykonaj_migracje
+from benchmark_bazy import przykladowy_rachunek, SPRZEDAWCA
+from test_agregaty import _sprawdz_przychody, _sprawdz_klientow
+
+LICZBA_RACHUNKOW = 30
+LICZBA_KLIENTOW = 10
+# Kwoty REAL niedokładne w zapisie binarnym i oczekiwane grosze po migracji
+# (1.005 to 1.00499999..., a 0.1 + 0.2 to 0.30000000000000004)
+KWOTY_REAL = [(0.1, 10), (0.1 + 0.2, 30), (0.005, 1), (1.005, 101), (2.675, 268),
+              (0.285, 29), (1.115, 112), (8.345, 835), (1234.565, 123457), (999999.99, 99999999)]
+
+# Schemat pierwszej wersji aplikacji (user_version = 0)
+SCHEMAT_BAZOWY = '''
+    CREATE TABLE sprzedawca (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        imie TEXT NOT NULL,
+        nazwisko TEXT NOT NULL,
+        ulica TEXT NOT NULL,
+        nr_domu TEXT NOT NULL,
+        kod_pocztowy TEXT NOT NULL,
+        miasto TEXT NOT NULL,
+        data_utworzenia TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE TABLE rachunki (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        numer_rachunku TEXT UNIQUE NOT NULL,
+        data_wystawienia DATE NOT NULL,
+        data_wykonania_uslugi DATE NOT NULL,
+        sprzedawca_imie TEXT NOT NULL,
+        sprzedawca_nazwisko TEXT NOT NULL,
+        sprzedawca_ulica TEXT NOT NULL,
+        sprzedawca_nr_domu TEXT NOT NULL,
+        sprzedawca_kod_pocztowy TEXT NOT NULL,
+        sprzedawca_miasto TEXT NOT NULL,
+        nabywca_imie TEXT NOT NULL,
+        nabywca_nazwisko TEXT NOT NULL,
+        nabywca_ulica TEXT NOT NULL,
+        nabywca_nr_domu TEXT NOT NULL,
+        nabywca_kod_pocztowy TEXT NOT NULL,
+        nabywca_miasto TEXT NOT NULL,
+        nazwa_uslugi TEXT NOT NULL,
+        cena_jednostkowa REAL NOT NULL,
+        kwota_do_zaplaty REAL NOT NULL,
+        kwota_slownie TEXT NOT NULL,
+        plik_pdf TEXT,
+        data_utworzenia TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE TABLE numeracja (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        miesiac INTEGER NOT NULL,
+        rok INTEGER NOT NULL,
+        ostatni_numer INTEGER NOT NULL,
+        UNIQUE(miesiac, rok)
+    );
+
+    CREATE TABLE usunięte_rachunki (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        original_id INTEGER NOT NULL,
+        numer_rachunku TEXT NOT NULL,
+        data_wystawienia DATE NOT NULL,
+        data_wykonania_uslugi DATE NOT NULL,
+        sprzedawca_imie TEXT NOT NULL,
+        sprzedawca_nazwisko TEXT NOT NULL,
+        sprzedawca_ulica TEXT NOT NULL,
+        sprzedawca_nr_domu TEXT NOT NULL,
+        sprzedawca_kod_pocztowy TEXT NOT NULL,
+        sprzedawca_miasto TEXT NOT NULL,
+        nabywca_imie TEXT NOT NULL,
+        nabywca_nazwisko TEXT NOT NULL,
+        nabywca_ulica TEXT NOT NULL,
+        nabywca_nr_domu TEXT NOT NULL,
+        nabywca_kod_pocztowy TEXT NOT NULL,
+        nabywca_miasto TEXT NOT NULL,
+        nazwa_uslugi TEXT NOT NULL,
+        cena_jednostkowa REAL NOT NULL,
+        kwota_do_zaplaty REAL NOT NULL,
+        kwota_slownie TEXT NOT NULL,
+        plik_pdf TEXT,
+        data_utworzenia TIMESTAMP,
+        data_usuniecia TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        powod_usuniecia TEXT
+    );
+
+    CREATE TABLE ustawienia (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        klucz TEXT UNIQUE NOT NULL,
+        wartosc TEXT NOT NULL,
+        data_zmiany TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+'''
+
+POLA_ADRESU = ('imie', 'nazwisko', 'ulica', 'nr_domu', 'kod_pocztowy', 'miasto')
+KOLUMNY_BAZOWE = (
+    ('numer_rachunku', 'data_wystawienia', 'data_wykonania_uslugi')
+    + tuple(f"sprzedawca_{pole}" for pole in POLA_ADRESU)
+    + tuple(f"nabywca_{pole}" for pole in POLA_ADRESU)
+    + ('nazwa_uslugi', 'cena_jednostkowa', 'kwota_do_zaplaty', 'kwota_slownie', 'plik_pdf')
+)
+
+
+def _wiersz_bazowy(rachunek: dict) -> tuple:
+    """Zamienia słownik rachunku na wartości kolumn KOLUMNY_BAZOWE"""
+    wartosci = dict(rachunek)
+    for strona in ('sprzedawca', 'nabywca'):
+        for pole in POLA_ADRESU:
+            wartosci[f"{strona}_{pole}"] = rachunek[strona][pole]
+    return tuple(wartosci[kolumna] for kolumna in KOLUMNY_BAZOWE)
+
+
+def _rachunki_bazowe() -> list:
+    """
+    Zwraca rachunki starej bazy z numerami nadanymi po kolei w miesiącach
+
+    Każdy z klientów występuje trzy razy, za każdym razem zapisany
+    inaczej (wielkość liter, spacje), jak przy ręcznym wpisywaniu.
+    """
+    warianty = (lambda tekst: tekst, str.upper, lambda tekst: f"  {tekst.lower()} ")
+    numery = Counter()
+    rachunki = []
+    for i in range(LICZBA_RACHUNKOW):
+        rachunek = przykladowy_rachunek(i)
+        data = date(2024, 1, 1) + timedelta(days=i * 7)
+        numery[(data.month, data.year)] += 1
+        rachunek['numer_rachunku'] = f"{numery[(data.month, data.year)]}/{data.month:02d}/{data.year}"
+        rachunek['data_wystawienia'] = rachunek['data_wykonania_uslugi'] = data.isoformat()
+
+        wariant = warianty[i // LICZBA_KLIENTOW]
+        nabywca = dict(przykladowy_rachunek(i % LICZBA_KLIENTOW)['nabywca'])
+        nabywca['imie'], nabywca['nazwisko'] = wariant(nabywca['imie']), wariant(nabywca['nazwisko'])
+        rachunek['nabywca'] = nabywca
+        rachunek['plik_pdf'] = f"rachunki_pdf/rachunek_{i + 1}.pdf"
+        rachunki.append(rachunek)
+    return rachunki
+
+
+def _utworz_baze_bazowa(db_path: str, rachunki: list, usuniete: list = ()) -> None:
+    """
+    Zapisuje rachunki do bazy ze schematem pierwszej wersji aplikacji
+
+    Args:
+        db_path: Ścieżka do tworzonej bazy
+        rachunki: Słowniki aktywnych rachunków
+        usuniete: Słowniki usuniętych rachunków z dodatkowymi kluczami
+            original_id, data_usuniecia i powod_usuniecia
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executescript(SCHEMAT_BAZOWY)
+        with conn:
+            conn.execute(
+                f"INSERT INTO sprzedawca ({', '.join(POLA_ADRESU)}) VALUES (?, ?, ?, ?, ?, ?)",
+                tuple(SPRZEDAWCA[pole] for pole in POLA_ADRESU)
+            )
+            conn.executemany(
+                f"INSERT INTO rachunki ({', '.join(KOLUMNY_BAZOWE)}) "
+                f"VALUES ({', '.join('?' * len(KOLUMNY_BAZOWE))})",
+                [_wiersz_bazowy(rachunek) for rachunek in rachunki]
+            )
+            kolumny_usunietych = ('original_id',) + KOLUMNY_BAZOWE + ('data_usuniecia', 'powod_usuniecia')
+            conn.executemany(
+                f"INSERT INTO usunięte_rachunki ({', '.join(kolumny_usunietych)}) "
+                f"VALUES ({', '.join('?' * len(kolumny_usunietych))})",
+                [(rachunek['original_id'], *_wiersz_bazowy(rachunek),
+                  rachunek['data_usuniecia'], rachunek['powod_usuniecia']) for rachunek in usuniete]
+            )
+            conn.execute('''
+                INSERT INTO numeracja (miesiac, rok, ostatni_numer)
+                SELECT CAST(strftime('%m', data_wystawienia) AS INTEGER),
+                       CAST(strftime('%Y', data_wystawienia) AS INTEGER), COUNT(*)
+                FROM rachunki GROUP BY 1, 2
+            ''')
+    finally:
+        conn.close()
+
+
+def test_migracja_bazy_bazowej():
+    """Stara baza jest migrowana do bieżącego schematu bez utraty danych"""
+    rachunki = _rachunki_bazowe()
+    with tempfile.TemporaryDirectory() as katalog:
+        db_path = os.path.join(katalog, "bazowa.db")
+        _utworz_baze_bazowa(db_path, rachunki)
+        db = DatabaseManager(db_path)
+        conn = db._polaczenie()
+
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == MIGRACJE[-1][0]
+        assert conn.execute("PRAGMA integrity_check").fetchall() == [('ok',)]
+        assert conn.execute("PRAGMA foreign_key_check").fetchall() == []
+        assert wykonaj_migracje(conn) == [], "Migracje wykonane ponownie"
+
+        # Rachunki zachowują id, numery, dane stron i kwoty (teraz w groszach)
+        assert len(db.pobierz_wszystkie_rachunki()) == LICZBA_RACHUNKOW
+        for rachunek_id, rachunek in enumerate(rachunki, start=1):
+            szczegoly = db.pobierz_rachunek_szczegoly(rachunek_id)
+            assert szczegoly['numer_rachunku'] == rachunek['numer_rachunku']
+            assert szczegoly['kwota_do_zaplaty'] == rachunek['kwota_do_zaplaty']
+            assert szczegoly['cena_jednostkowa'] == rachunek['cena_jednostkowa']
+            assert szczegoly['plik_pdf'] == rachunek['plik_pdf']
+            for strona in ('sprzedawca', 'nabywca'):
+                for pole in POLA_ADRESU:
+                    assert szczegoly[f"{strona}_{pole}"] == rachunek[strona][pole], (rachunek_id, strona, pole)
+
+        # Różne zapisy tej samej osoby trafiają do jednego klienta
+        assert conn.execute("SELECT COUNT(*) FROM klienci").fetchone()[0] == LICZBA_KLIENTOW
+        for i, rachunek in enumerate(rachunki):
+            klient = db.znajdz_klienta(rachunek['nabywca']['imie'], rachunek['nabywca']['nazwisko'])
+            # Klient ma dane z pierwszego rachunku, niezależnie od zapisu, którym go szukano
+            pierwszy = rachunki[i % LICZBA_KLIENTOW]['nabywca']
+            assert (klient['imie'], klient['nazwisko']) == (pierwszy['imie'], pierwszy['nazwisko'])
+            assert klient['liczba_rachunkow'] == LICZBA_RACHUNKOW // LICZBA_KLIENTOW
+        _sprawdz_przychody(db, "migracja")
+        _sprawdz_klientow(db, "migracja")
+
+        # Numeracja jest kontynuowana od liczników starej bazy
+        dane = przykladowy_rachunek(LICZBA_RACHUNKOW)
+        del dane['numer_rachunku']
+        dane['data_wystawienia'] = rachunki[-1]['data_wystawienia']
+        ostatni_numer, okres = rachunki[-1]['numer_rachunku'].split('/', 1)
+        _, numer = db.zapisz_rachunek_z_numerem(dane)
+        assert numer == f"{int(ostatni_numer) + 1}/{okres}"
+        db.zamknij()
+
+
+def test_migracja_usunietych_rachunkow():
+    """Rachunki z dawnej tabeli usunięte_rachunki są po migracji widoczne tylko w widoku usuniętych"""
+    rachunki = _rachunki_bazowe()
+    # Rachunek o wolnym id oraz rachunek, którego id i numer zajęły później inne rachunki
+    wolny = dict(przykladowy_rachunek(LICZBA_RACHUNKOW), original_id=LICZBA_RACHUNKOW + 1,
+                 numer_rachunku="99/08/2024", data_usuniecia="2024-08-02 10:00:00",
+                 powod_usuniecia="Duplikat")
+    zajety = dict(przykladowy_rachunek(2), original_id=3, numer_rachunku=rachunki[2]['numer_rachunku'],
+                  data_usuniecia="2024-01-20 08:30:00", powod_usuniecia="Pomyłka w kwocie")
+    with tempfile.TemporaryDirectory() as katalog:
+        db_path = os.path.join(katalog, "bazowa.db")
+        _utworz_baze_bazowa(db_path, rachunki, [wolny, zajety])
+        db = DatabaseManager(db_path)
+
+        assert len(db.pobierz_wszystkie_rachunki()) == LICZBA_RACHUNKOW
+        usuniete = {wpis['numer_rachunku']: wpis for wpis in db.pobierz_usunięte_rachunki()}
+        assert set(usuniete) == {wolny['numer_rachunku'], zajety['numer_rachunku']}
+        for rachunek in (wolny, zajety):
+            wpis = usuniete[rachunek['numer_rachunku']]
+            assert wpis['powod_usuniecia'] == rachunek['powod_usuniecia']
+            assert wpis['data_usuniecia'] == rachunek['data_usuniecia']
+            assert wpis['kwota'] == rachunek['kwota_do_zaplaty']
+        # Rachunek wraca pod dawnym id tylko gdy jest ono wolne
+        wolny_id = usuniete[wolny['numer_rachunku']]['id']
+        zajety_id = usuniete[zajety['numer_rachunku']]['id']
+        assert wolny_id == wolny['original_id']
+        assert zajety_id > LICZBA_RACHUNKOW + 1
+        assert db.pobierz_rachunek_szczegoly(3)['numer_rachunku'] == rachunki[2]['numer_rachunku']
+        _sprawdz_przychody(db, "migracja usuniętych")
+        _sprawdz_klientow(db, "migracja usuniętych")
+
+        # Przywrócić można tylko rachunek, którego numer nie jest zajęty
+        assert db.przywroc_rachunki([wolny_id, zajety_id]) == {wolny_id: True, zajety_id: False}
+        assert len(db.pobierz_wszystkie_rachunki()) == LICZBA_RACHUNKOW + 1
+        szczegoly = db.pobierz_rachunek_szczegoly(wolny_id)
+        assert szczegoly['nabywca_nazwisko'] == wolny['nabywca']['nazwisko']
+        assert szczegoly['sprzedawca_miasto'] == wolny['sprzedawca']['miasto']
+        _sprawdz_przychody(db, "przywrócenie")
+        _sprawdz_klientow(db, "przywrócenie")
+        db.zamknij()
+
+
+def test_migracja_kwot_real():
+    """Kwoty REAL są zamieniane na grosze z zaokrągleniem połówek w górę, jak w Kwota.z_zlotych"""
+    rachunki = _rachunki_bazowe()
+    for rachunek, (kwota, _) in zip(rachunki, KWOTY_REAL):
+        rachunek['cena_jednostkowa'] = rachunek['kwota_do_zaplaty'] = kwota
+    usuniety = dict(rachunki[0], original_id=LICZBA_RACHUNKOW + 1, numer_rachunku="99/08/2024",
+                    cena_jednostkowa=2.675, kwota_do_zaplaty=2.675,
+                    data_usuniecia="2024-08-02 10:00:00", powod_usuniecia="Duplikat")
+    with tempfile.TemporaryDirectory() as katalog:
+        db_path = os.path.join(katalog, "bazowa.db")
+        _utworz_baze_bazowa(db_path, rachunki, [usuniety])
+        db = DatabaseManager(db_path)
+        conn = db._polaczenie()
+
+        kwoty = conn.execute(f'''
+            SELECT cena_jednostkowa_gr, kwota_do_zaplaty_gr FROM rachunki
+            WHERE id <= {len(KWOTY_REAL)} ORDER BY id
+        ''').fetchall()
+        assert kwoty == [(grosze, grosze) for _, grosze in KWOTY_REAL]
+        assert conn.execute(
+            "SELECT kwota_do_zaplaty_gr FROM rachunki WHERE numer_rachunku = ?", (usuniety['numer_rachunku'],)
+        ).fetchone() == (268,)
+        # Agregaty liczone przed migracją 5 zgadzają się z kwotami po niej
+        _sprawdz_przychody(db, "migracja kwot")
+        _sprawdz_klientow(db, "migracja kwot")
+        # Funkcja kwota_gr istnieje tylko w trakcie migracji - schemat z niej nie korzysta
+        assert conn.execute("SELECT name FROM sqlite_master WHERE sql LIKE '%kwota_gr(%'").fetchall() == []
+        db.zamknij()
+
+
+if __name__ == "__main__":
+    test_migracja_bazy_bazowej()
+    test_migracja_usunietych_rachunkow()
+    test_migracja_kwot_real()
+    print("[OK] Migracja bazy bazowej zachowuje dane")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test numeracji rachunków przy równoczesnym zapisie z wielu procesów
+"""
+
+import os
+import tempfile
+import multiprocessing
+from database import DatabaseManager
+from benchmark_bazy import przykladowy_rachunek
+
+LICZBA_PROCESOW = 6
+RACHUNKOW_NA_PROCES = 40
+DATA_WYSTAWIENIA = '2025-03-15'
+
+
+def _wystaw_rachunki(db_path: str, nr_procesu: int) -> None:
+    """Wystawia rachunki w osobnym procesie, każdy z własnym DatabaseManager"""
+    db = DatabaseManager(db_path)
+    for i in range(RACHUNKOW_NA_PROCES):
+        dane = przykladowy_rachunek(nr_procesu * RACHUNKOW_NA_PROCES + i)
+        del dane['numer_rachunku']
+        dane['data_wystawienia'] = DATA_WYSTAWIENIA
+        db.zapisz_rachunek_z_numerem(dane)
+    db.zamknij()
+
+
+def test_numeracja_wieloprocesowa():
+    """Numery wystawione równolegle są unikalne i bez przerw"""
+    print("=== TEST NUMERACJI WIELOPROCESOWEJ ===")
+
+    with tempfile.TemporaryDirectory() as katalog:
+        db_path = os.path.join(katalog, "numeracja.db")
+        DatabaseManager(db_path).zamknij()
+
+        kontekst = multiprocessing.get_context("spawn")
+        procesy = [kontekst.Process(target=_wystaw_rachunki, args=(db_path, n))
+                   for n in range(LICZBA_PROCESOW)]
+        for proces in procesy:
+            proces.start()
+        for proces in procesy:
+            proces.join()
+            assert proces.exitcode == 0, f"Proces zakończył się kodem {proces.exitcode}"
+
+        db = DatabaseManager(db_path)
+        numery = [r['numer_rachunku'] for r in db.pobierz_wszystkie_rachunki()]
+        db.zamknij()
+
+        oczekiwane = LICZBA_PROCESOW * RACHUNKOW_NA_PROCES
+        kolejne = sorted(int(numer.split('/')[0]) for numer in numery)
+        print(f"Wystawiono {len(numery)} rachunków w {LICZBA_PROCESOW} procesach")
+
+        assert len(numery) == oczekiwane
+        assert len(set(numery)) == oczekiwane, "Powtórzone numery rachunków"
+        assert kolejne == list(range(1, oczekiwane + 1)), "Przerwy w numeracji"
+        assert all(numer.endswith('/03/2025') for numer in numery)
+
+
+def test_blad_pdf_nie_wycofuje_rachunku():
+    """Nieudane generowanie PDF po zapisie zostawia rachunek bez pliku, a kolejny numer jest nowy"""
+    from rachunek_manager import RachunekManager
+
+    with tempfile.TemporaryDirectory() as katalog:
+        manager = RachunekManager(os.path.join(katalog, "numeracja.db"))
+        dane = przykladowy_rachunek(0)
+        dane = {
+            'sprzedawca': dane['sprzedawca'],
+            'nabywca': dane['nabywca'],
+            'data_wykonania_uslugi': '01.03.2025',
+            'nazwa_uslugi': dane['nazwa_uslugi'],
+            'cena_jednostkowa': '100.00',
+        }
+        generuj = manager.pdf_generator.generuj_rachunek_pdf
+
+        def blad_pdf(dane_rachunku, sciezka_pliku):
+            open(sciezka_pliku, 'wb').close()
+            raise IOError("Nie można zapisać PDF")
+
+        manager.pdf_generator.generuj_rachunek_pdf = blad_pdf
+        wynik = manager.stworz_rachunek(dane, katalog)
+        assert wynik['success'], wynik['errors']
+        assert wynik['pdf_path'] is None
+        assert any("Regeneruj PDF" in w for w in wynik['warnings'])
+        assert not [p for p in os.listdir(katalog) if p.startswith('rachunek_')], "Pozostał plik PDF"
+        pierwszy = manager.pobierz_szczegoly_rachunku(wynik['rachunek_id'])
+        assert pierwszy['plik_pdf'] is None
+
+        manager.pdf_generator.generuj_rachunek_pdf = generuj
+        drugi = manager.stworz_rachunek(dane, katalog)
+        assert drugi['success'] and os.path.exists(drugi['pdf_path'])
+        numer = manager.pobierz_szczegoly_rachunku(drugi['rachunek_id'])['numer_rachunku']
+        assert numer.startswith("2/"), f"Numer po nieudanym PDF: {numer}"
+
+        regeneracja = manager.regeneruj_pdf_rachunku(wynik['rachunek_id'], katalog)
+        assert regeneracja['success'], regeneracja['error']
+        assert manager.sprawdz_czy_plik_pdf_istnieje(wynik['rachunek_id']) == regeneracja['pdf_path']
+        manager.zamknij()
+
+
+if __name__ == "__main__":
+    test_numeracja_wieloprocesowa()
+    test_blad_pdf_nie_wycofuje_rachunku()
+    print("[OK] Numeracja działa poprawnie")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test typu pieniężnego Kwota i walidacji limitu miesięcznego
+
+Kwoty w złotych są zaokrąglane do groszy połówkami w górę według zapisu
+dziesiętnego (1.005 to 1,01 zł, choć w zapisie binarnym jest mniejsze),
+a działania i porównania odbywają się na całkowitej liczbie groszy.
+"""
+
+from decimal import Decimal
+from pieniadze import Kwota
+from walidacja import WalidatorDanych
+import config
+
+# Wartość w złotych i oczekiwane grosze
+ZAOKRAGLENIA = [
+    (0.005, 1), (1.005, 101), (2.675, 268), (-0.005, -1), (0.1 + 0.2, 30),
+    ("0,005", 1), ("1,005", 101), ("2,675", 268), (" 1 234,565 ", 123457), ("12.5", 1250),
+    (Decimal("0.004"), 0), (7, 700),
+]
+
+
+def test_zaokraglanie_z_zlotych():
+    """Kwota.z_zlotych zaokrągla połówki grosza w górę, także dla tekstu z przecinkiem"""
+    for wartosc, grosze in ZAOKRAGLENIA:
+        assert Kwota.z_zlotych(wartosc).grosze == grosze, wartosc
+    kwota = Kwota(1050)
+    assert Kwota.z_zlotych(kwota) is kwota
+
+
+def test_dzialania_i_porownania():
+    """Działania i porównania są dokładne w groszach"""
+    dziesiec_groszy = Kwota.z_zlotych(0.1)
+    assert sum([dziesiec_groszy] * 3) == Kwota(30)
+    assert dziesiec_groszy + 0.2 == Kwota(30) and 0.2 + dziesiec_groszy == Kwota(30)
+    assert Kwota(500) - "1,25" == Kwota(375) and 10 - Kwota(125) == Kwota(875)
+    assert Kwota(125) * 3 == 3 * Kwota(125) == Kwota(375)
+    assert -Kwota(125) == Kwota(-125)
+    try:
+        Kwota(125) * 1.5
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("Mnożenie kwoty przez float")
+
+    assert Kwota(30) == 0.3 == Kwota.z_zlotych("0,30")
+    assert Kwota(30) != Kwota(31) and Kwota(30) != "nie kwota"
+    assert Kwota(30) < Kwota(31) <= 0.31 < Kwota(32)
+    assert max(Kwota(5), Kwota(500), Kwota(50)) == Kwota(500)
+    assert len({Kwota(30), Kwota.z_zlotych(0.3)}) == 1
+    assert not Kwota(0) and Kwota(1)
+
+    kwota = Kwota(123456)
+    assert (kwota.zlote, float(kwota)) == (Decimal("1234.56"), 1234.56)
+    assert (str(kwota), f"{kwota:.2f}", f"{kwota:>10}", repr(kwota)) == \
+        ("1234.56", "1234.56", "   1234.56", "Kwota('1234.56')")
+    try:
+        kwota._grosze = 1
+    except AttributeError:
+        pass
+    else:
+        raise AssertionError("Kwota została zmieniona")
+
+
+def test_limit_miesieczny_co_do_grosza():
+    """Kwota równa limitowi go nie przekracza, o grosz większa już tak"""
+    limit = Kwota.z_zlotych(config.MONTHLY_REVENUE_LIMIT_2025)
+    obecne = Kwota.z_zlotych("1000,10")
+    data = "2025-05-15"
+
+    bledy = WalidatorDanych.waliduj_limit_miesięczny(limit - obecne, obecne, data)
+    assert len(bledy) == 1 and bledy[0].startswith("OSTRZEŻENIE")
+    assert "pozostanie: 0.00 PLN" in bledy[0]
+
+    bledy = WalidatorDanych.waliduj_limit_miesięczny(limit - obecne + Kwota(1), obecne, data)
+    assert len(bledy) == 1 and bledy[0].startswith("Przekroczony")
+    assert "Przekroczenie o: 0.01 PLN" in bledy[0]
+
+    # Daleko od limitu nie ma ani błędu, ani ostrzeżenia
+    assert WalidatorDanych.waliduj_limit_miesięczny(Kwota(100), Kwota(0), data) == []
+
+
+if __name__ == "__main__":
+    test_zaokraglanie_z_zlotych()
+    test_dzialania_i_porownania()
+    test_limit_miesieczny_co_do_grosza()
+    print("[OK] Kwoty są liczone dokładnie w groszach")
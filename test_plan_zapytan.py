@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test planów zapytań - ścieżki odczytu DatabaseManager korzystają z indeksów
+
+Testy budują syntetyczną bazę, przechwytują zapytania wysyłane przez metody
+DatabaseManager i sprawdzają ich plany EXPLAIN QUERY PLAN. Zmiana zapytania
+lub schematu, po której SQLite wraca do pełnego skanu tabeli rachunków albo
+przestaje używać oczekiwanego indeksu, kończy się błędem testu.
+"""
+
+import os
+import re
+import tempfile
+from typing import Callable, List, Tuple
+from database import DatabaseManager
+from diagnostyka_sql import ZAPYTANIA_Z_PLANEM
+from benchmark_bazy import przykladowy_rachunek
+
+LICZBA_RACHUNKOW = 400
+
+# Pełny skan tabeli: "SCAN rachunki" lub "SCAN archiwum_2023.rachunki" bez "USING ... INDEX"
+PELNY_SKAN = re.compile(r'^SCAN (?:\w+\.)?(\w+)\b(?! USING)')
+
+# Ścieżka odczytu -> (wywołanie, krok planu, który musi wystąpić)
+OCZEKIWANE_INDEKSY = {
+    'pobierz_strone_rachunkow': (
+        lambda db: db.pobierz_strone_rachunkow(rozmiar_strony=20),
+        'SCAN rachunki USING INDEX idx_rachunki_data_wystawienia'),
+    'pobierz_strone_rachunkow (kursor)': (
+        lambda db: db.pobierz_strone_rachunkow(
+            db.pobierz_strone_rachunkow(rozmiar_strony=20)['kursor'], 20),
+        'SEARCH rachunki USING INDEX idx_rachunki_data_wystawienia (data_wystawienia<?)'),
+    'pobierz_wszystkie_rachunki': (
+        lambda db: db.pobierz_wszystkie_rachunki(),
+        'SCAN rachunki USING INDEX idx_rachunki_data_wystawienia'),
+    'szukaj_rachunki': (
+        lambda db: db.szukaj_rachunki('Nowak'),
+        'SEARCH r USING INTEGER PRIMARY KEY'),
+    'pobierz_rachunek_szczegoly': (
+        lambda db: db.pobierz_rachunek_szczegoly(7),
+        'SEARCH rachunki USING INTEGER PRIMARY KEY'),
+    'pobierz_rachunki_miesiac': (
+        lambda db: db.pobierz_rachunki_miesiac(3, 2023),
+        'SEARCH rachunki USING INDEX idx_rachunki_data_wystawienia'),
+    'pobierz_przychody_miesiac': (
+        lambda db: db.pobierz_przychody_miesiac(3, 2023),
+        'przychody_miesieczne USING'),
+    'pobierz_top_klientow': (
+        lambda db: db.pobierz_top_klientow(),
+        'SCAN klienci USING INDEX idx_klienci_suma'),
+    'znajdz_klienta': (
+        lambda db: db.znajdz_klienta('Anna', 'Nowak'),
+        'SEARCH klienci USING INDEX sqlite_autoindex_klienci_1 (klucz=?)'),
+    'pobierz_rachunki_klienta': (
+        lambda db: db.pobierz_rachunki_klienta(1),
+        'SEARCH rachunki USING INDEX idx_rachunki_klient (klient_id=?)'),
+    'pobierz_usunięte_rachunki': (
+        lambda db: db.pobierz_usunięte_rachunki(),
+        'SEARCH rachunki USING INDEX idx_rachunki_usuniete'),
+    'eksportuj_do_csv (zakres dat)': (
+        lambda db: db.eksportuj_do_csv(os.devnull, data_od='2023-03-01', data_do='2023-03-31'),
+        'SEARCH rachunki USING INDEX idx_rachunki_data_wystawienia (data_wystawienia>? AND data_wystawienia<?)'),
+    'zarezerwuj_numery (zwrot)': (
+        lambda db: db.zarezerwuj_numery(3).zwroc(),
+        'SEARCH numeracja USING INDEX sqlite_autoindex_numeracja_1 (miesiac=? AND rok=?)'),
+    'pobierz_statystyki_ogolne': (
+        lambda db: db.pobierz_statystyki_ogolne(),
+        'SEARCH rachunki USING INDEX idx_rachunki_data_wystawienia'),
+    'pobierz_ustawienie': (
+        lambda db: db.pobierz_ustawienie('nieistniejace'),
+        'SEARCH ustawienia USING INDEX sqlite_autoindex_ustawienia_1 (klucz=?)'),
+}
+
+
+def _baza_testowa(katalog: str) -> DatabaseManager:
+    """Tworzy bazę z przykładowymi rachunkami, w tym kilkoma usuniętymi"""
+    db = DatabaseManager(os.path.join(katalog, "plan.db"))
+    db.zapisz_rachunki_batch([przykladowy_rachunek(i) for i in range(LICZBA_RACHUNKOW)])
+    db.usun_rachunki([1, 2, 3])
+    return db
+
+
+def plany_zapytan(db: DatabaseManager, wywolanie: Callable[[], object]) -> List[Tuple[str, List[str]]]:
+    """
+    Wykonuje wywołanie i zwraca plany wszystkich zapytań, które wysłało do bazy
+
+    Args:
+        db: Baza danych
+        wywolanie: Funkcja wywołująca metodę DatabaseManager
+
+    Returns:
+        Lista (zapytanie, kroki planu z EXPLAIN QUERY PLAN)
+    """
+    conn = db._polaczenie()
+    zapytania = []
+    conn.set_trace_callback(zapytania.append)
+    try:
+        wywolanie()
+    finally:
+        conn.set_trace_callback(None)
+
+    plany = []
+    for sql in zapytania:
+        # Wewnętrzne zapytania FTS5 są zgłaszane jako komentarze '-- ...'
+        if sql.lstrip().upper().startswith(ZAPYTANIA_Z_PLANEM):
+            kroki = [wiersz[3] for wiersz in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+            plany.append((sql, kroki))
+    assert plany, "Wywołanie nie wysłało żadnego zapytania"
+    return plany
+
+
+def pelne_skany(plany: List[Tuple[str, List[str]]], tabela: str = 'rachunki') -> List[str]:
+    """Zwraca kroki planów, które czytają całą tabelę bez indeksu"""
+    return [krok for _, kroki in plany for krok in kroki
+            if (m := PELNY_SKAN.match(krok)) and m.group(1) == tabela]
+
+
+def test_okresy_bez_pelnego_skanu():
+    """Przychody, rachunki i raporty miesiąca nie skanują tabeli rachunki"""
+    print("=== TEST PLANÓW ZAPYTAŃ O OKRESY ===")
+
+    with tempfile.TemporaryDirectory() as katalog:
+        db = _baza_testowa(katalog)
+        wywolania = {
+            'pobierz_przychody_miesiac': lambda: db.pobierz_przychody_miesiac(3, 2023),
+            'pobierz_rachunki_miesiac': lambda: db.pobierz_rachunki_miesiac(12, 2023),
+            'pobierz_raport_miesięczny': lambda: db.pobierz_raport_miesięczny(2023),
+            'pobierz_raport_roczny': lambda: db.pobierz_raport_roczny(),
+        }
+
+        for nazwa, wywolanie in wywolania.items():
+            plany = plany_zapytan(db, wywolanie)
+            print(f"{nazwa}: {[kroki for _, kroki in plany]}")
+            assert not pelne_skany(plany), f"{nazwa} skanuje całą tabelę rachunki"
+            assert not any('strftime' in sql for sql, _ in plany), f"{nazwa} filtruje przez strftime"
+        db.zamknij()
+
+
+def test_rachunki_miesiac_z_indeksu_dat():
+    """Rachunki miesiąca są czytane z przedziału indeksu dat, bez sortowania"""
+    with tempfile.TemporaryDirectory() as katalog:
+        db = _baza_testowa(katalog)
+        plany = plany_zapytan(db, lambda: db.pobierz_rachunki_miesiac(2, 2023))
+        kroki = [krok for _, kroki in plany for krok in kroki]
+
+        assert any(krok.startswith('SEARCH rachunki USING INDEX idx_rachunki_data_wystawienia')
+                   for krok in kroki), kroki
+        assert not any('TEMP B-TREE' in krok for krok in kroki), kroki
+
+        # Przedział obejmuje cały miesiąc, także grudzień
+        for miesiac, rok in ((2, 2023), (12, 2023)):
+            wiersze = db.pobierz_rachunki_miesiac(miesiac, rok)
+            assert wiersze and all(r['data_wystawienia'].startswith(f"{rok}-{miesiac:02d}-")
+                                   for r in wiersze)
+        db.zamknij()
+
+
+def test_agregat_miesiaca_z_indeksu_okresu():
+    """Przeliczenie minimum i maksimum miesiąca w wyzwalaczach korzysta z idx_rachunki_okres"""
+    with tempfile.TemporaryDirectory() as katalog:
+        db = _baza_testowa(katalog)
+        conn = db._polaczenie()
+        for funkcja in ('MIN', 'MAX'):
+            kroki = [wiersz[3] for wiersz in conn.execute(f'''
+                EXPLAIN QUERY PLAN
+                SELECT {funkcja}(kwota_do_zaplaty_gr) FROM rachunki
+                WHERE rok = 2023 AND miesiac = 3 AND deleted_at IS NULL
+            ''')]
+            assert any('idx_rachunki_okres (rok=? AND miesiac=?)' in krok for krok in kroki), kroki
+
+        wyzwalacze = ' '.join(sql for (sql,) in conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'przychody_%'"))
+        assert 'strftime' not in wyzwalacze
+        db.zamknij()
+
+
+def test_sciezki_odczytu_z_indeksow():
+    """Każda ścieżka odczytu używa oczekiwanego indeksu i nie skanuje tabeli rachunki"""
+    print("=== TEST PLANÓW ŚCIEŻEK ODCZYTU ===")
+
+    with tempfile.TemporaryDirectory() as katalog:
+        db = _baza_testowa(katalog)
+        bledy = []
+        for nazwa, (wywolanie, oczekiwany) in OCZEKIWANE_INDEKSY.items():
+            plany = plany_zapytan(db, lambda: wywolanie(db))
+            kroki = [krok for _, kroki in plany for krok in kroki]
+            print(f"{nazwa}: {kroki}")
+            if not any(oczekiwany in krok for krok in kroki):
+                bledy.append(f"{nazwa}: brak '{oczekiwany}' w {kroki}")
+            if pelne_skany(plany):
+                bledy.append(f"{nazwa}: pełny skan rachunków {pelne_skany(plany)}")
+        db.zamknij()
+        assert not bledy, '\n'.join(bledy)
+
+
+def test_wyszukiwanie_pelnotekstowe():
+    """Wyszukiwanie idzie przez indeks FTS5, a nie przez LIKE na całej tabeli"""
+    with tempfile.TemporaryDirectory() as katalog:
+        db = _baza_testowa(katalog)
+        plany = plany_zapytan(db, lambda: db.szukaj_rachunki('Nowak'))
+        kroki = [krok for _, kroki in plany for krok in kroki]
+        assert any(krok.startswith('SCAN rachunki_fts VIRTUAL TABLE') for krok in kroki), kroki
+        assert not any('LIKE' in sql for sql, _ in plany)
+        db.zamknij()
+
+
+def test_numeracja_z_indeksu():
+    """Licznik numeracji miesiąca jest odczytywany i zmieniany jednym poleceniem przez UNIQUE(miesiac, rok)"""
+    with tempfile.TemporaryDirectory() as katalog:
+        db = _baza_testowa(katalog)
+        plany = plany_zapytan(db, db.generuj_numer_rachunku)
+        zapytania = [sql for sql, _ in plany if 'numeracja' in sql]
+        assert len(zapytania) == 1, zapytania
+        assert zapytania[0].lstrip().upper().startswith('INSERT INTO NUMERACJA')
+        assert 'ON CONFLICT (miesiac, rok)' in zapytania[0] and 'RETURNING' in zapytania[0]
+        db.zamknij()
+
+
+def test_archiwa_bez_pelnego_skanu():
+    """Po przeniesieniu lat do archiwów zapytania łączone nie skanują rachunków żadnej bazy"""
+    with tempfile.TemporaryDirectory() as katalog:
+        db = _baza_testowa(katalog)
+        db.archiwizuj_rok(2023)
+        db.archiwizuj_rok(2024)
+
+        wywolania = {nazwa: wywolanie for nazwa, (wywolanie, _) in OCZEKIWANE_INDEKSY.items()}
+        wywolania.update({
+            'pobierz_raport_miesięczny': lambda db: db.pobierz_raport_miesięczny(2023),
+            'pobierz_raport_roczny': lambda db: db.pobierz_raport_roczny(),
+        })
+        for nazwa, wywolanie in wywolania.items():
+            plany = plany_zapytan(db, lambda: wywolanie(db))
+            assert not pelne_skany(plany), f"{nazwa} skanuje całą tabelę rachunki: {plany}"
+
+        kroki = [krok for _, kroki in plany_zapytan(db, db.pobierz_strone_rachunkow) for krok in kroki]
+        assert any('archiwum_2023.rachunki USING INDEX idx_rachunki_data_wystawienia' in krok
+                   for krok in kroki), kroki
+        db.zamknij()
+
+
+if __name__ == "__main__":
+    test_okresy_bez_pelnego_skanu()
+    test_rachunki_miesiac_z_indeksu_dat()
+    test_agregat_miesiaca_z_indeksu_okresu()
+    test_sciezki_odczytu_z_indeksow()
+    test_wyszukiwanie_pelnotekstowe()
+    test_numeracja_z_indeksu()
+    test_archiwa_bez_pelnego_skanu()
+    print("[OK] Ścieżki odczytu korzystają z indeksów")
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testy asynchronicznej fasady RachunekManagerAsync
+
+Wątek bazy danych jest na czas testu wstrzymywany zleceniem czekającym na
+threading.Event, dzięki czemu kolejne wywołania trafiają do kolejki razem
+i można sprawdzić ich łączenie oraz anulowanie.
+"""
+
+import os
+import time
+import asyncio
+import tempfile
+import threading
+from rachunek_async import RachunekManagerAsync
+from benchmark_bazy import SPRZEDAWCA
+
+# Zapytanie, które bez przerwania liczyłoby się bardzo długo
+NIESKONCZONE_ZAPYTANIE = '''
+    WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c)
+    SELECT COUNT(*) FROM c
+'''
+
+
+def _uruchom(test) -> None:
+    """Wykonuje korutynę testu na fasadzie z nową bazą w katalogu tymczasowym"""
+    with tempfile.TemporaryDirectory() as katalog:
+        async def przebieg():
+            async with RachunekManagerAsync(os.path.join(katalog, "async.db")) as manager:
+                await test(manager)
+        asyncio.run(przebieg())
+
+
+async def _wstrzymaj(manager: RachunekManagerAsync) -> threading.Event:
+    """Zajmuje wątek bazy danych do ustawienia zwróconego zdarzenia"""
+    zwolnij = threading.Event()
+    zajety = threading.Event()
+
+    def czekaj(_manager):
+        zajety.set()
+        zwolnij.wait(10)
+
+    asyncio.ensure_future(manager.wykonaj(czekaj))
+    while not zajety.is_set():
+        await asyncio.sleep(0.001)
+    return zwolnij
+
+
+async def _licz_wywolania(manager: RachunekManagerAsync, nazwa: str) -> list:
+    """Podmienia metodę RachunekManager w wątku bazy na wersję notującą wywołania"""
+    wywolania = []
+
+    def podmien(rachunek_manager):
+        metoda = getattr(rachunek_manager, nazwa)
+
+        def liczaca(*args, **kwargs):
+            wywolania.append(args)
+            return metoda(*args, **kwargs)
+        setattr(rachunek_manager, nazwa, liczaca)
+
+    await manager.wykonaj(podmien)
+    return wywolania
+
+
+def test_laczenie_odczytow():
+    """Równoczesne identyczne odczyty wykonują się raz, a każdy dostaje własną kopię wyniku"""
+    async def test(manager):
+        wywolania = await _licz_wywolania(manager, 'pobierz_raport_roczny')
+        zwolnij = await _wstrzymaj(manager)
+        zadania = [asyncio.ensure_future(manager.pobierz_raport_roczny()) for _ in range(5)]
+        await asyncio.sleep(0.01)
+        zwolnij.set()
+        wyniki = await asyncio.gather(*zadania)
+
+        assert len(wywolania) == 1, f"Odczyt wykonany {len(wywolania)} razy"
+        assert all(wynik == wyniki[0] for wynik in wyniki)
+        assert len({id(wynik) for wynik in wyniki}) == len(wyniki), "Wspólny obiekt wyniku"
+        wyniki[0]['zmieniony'] = True
+        assert 'zmieniony' not in wyniki[1]
+
+        # Odczyt zlecony po zakończeniu poprzedniego jest wykonywany od nowa
+        await manager.pobierz_raport_roczny()
+        assert len(wywolania) == 2
+    _uruchom(test)
+
+
+def test_zapis_konczy_laczenie():
+    """Odczyt zlecony po zapisie nie dołącza do wcześniejszego odczytu i widzi zapis"""
+    async def test(manager):
+        wywolania = await _licz_wywolania(manager, 'pobierz_domyslnego_sprzedawce')
+        zwolnij = await _wstrzymaj(manager)
+        przed = asyncio.ensure_future(manager.pobierz_domyslnego_sprzedawce())
+        zapis = asyncio.ensure_future(manager.zapisz_domyslnego_sprzedawce(dict(SPRZEDAWCA)))
+        po = asyncio.ensure_future(manager.pobierz_domyslnego_sprzedawce())
+        await asyncio.sleep(0.01)
+        zwolnij.set()
+
+        assert await przed is None
+        assert await zapis == []
+        sprzedawca = await po
+        assert sprzedawca is not None and sprzedawca['nazwisko'] == SPRZEDAWCA['nazwisko']
+        assert len(wywolania) == 2
+    _uruchom(test)
+
+
+def test_anulowanie_odczytu_w_toku():
+    """Anulowanie trwającego odczytu przerywa zapytanie przez Connection.interrupt()"""
+    async def test(manager):
+        zadanie = asyncio.ensure_future(manager.wykonaj(
+            lambda m: m.db._polaczenie().execute(NIESKONCZONE_ZAPYTANIE).fetchone(), odczyt=True))
+        while manager._biezace is None:
+            await asyncio.sleep(0.001)
+        await asyncio.sleep(0.05)
+
+        poczatek = time.perf_counter()
+        zadanie.cancel()
+        try:
+            await zadanie
+        except asyncio.CancelledError:
+            pass
+        else:
+            raise AssertionError("Zadanie nie zostało anulowane")
+
+        # Wątek bazy jest od razu wolny dla kolejnych zleceń
+        assert await manager.pobierz_usunięte_rachunki() == []
+        assert time.perf_counter() - poczatek < 2, "Zapytanie nie zostało przerwane"
+    _uruchom(test)
+
+
+def test_anulowanie_w_kolejce():
+    """Zlecenie anulowane w kolejce nie jest wykonywane, a anulowanie jednego z połączonych nie wpływa na resztę"""
+    async def test(manager):
+        wywolania = await _licz_wywolania(manager, 'pobierz_raport_top_klientow')
+        zwolnij = await _wstrzymaj(manager)
+        samotne = asyncio.ensure_future(manager.pobierz_raport_top_klientow(5))
+        pierwsze = asyncio.ensure_future(manager.pobierz_raport_top_klientow(3))
+        drugie = asyncio.ensure_future(manager.pobierz_raport_top_klientow(3))
+        await asyncio.sleep(0.01)
+        samotne.cancel()
+        pierwsze.cancel()
+        await asyncio.sleep(0.01)
+        zwolnij.set()
+
+        assert await drugie == []
+        assert samotne.cancelled() and pierwsze.cancelled()
+        assert wywolania == [(3,)], f"Wykonane odczyty: {wywolania}"
+    _uruchom(test)
+
+
+def test_anulowanie_przed_rozpoczeciem():
+    """Zlecenie anulowane po pobraniu z kolejki, ale przed rozpoczęciem, nie jest wykonywane"""
+    async def test(manager):
+        wykonane = []
+        # Wątek bazy pobiera zlecenie i czeka na blokadę, pod którą oznacza je jako bieżące
+        manager._blokada.acquire()
+        zadanie = asyncio.ensure_future(manager.wykonaj(lambda m: wykonane.append(True)))
+        await asyncio.sleep(0.01)
+        while not manager._zlecenia.empty():
+            await asyncio.sleep(0.001)
+        await asyncio.sleep(0.05)
+
+        # Anulowanie w pętli zdarzeń też czeka na blokadę, więc zwalnia ją osobny wątek
+        threading.Timer(0.05, manager._blokada.release).start()
+        zadanie.cancel()
+        try:
+            await zadanie
+        except asyncio.CancelledError:
+            pass
+        else:
+            raise AssertionError("Zadanie nie zostało anulowane")
+
+        assert await manager.pobierz_usunięte_rachunki() == []
+        assert wykonane == [], "Anulowane zlecenie zostało wykonane"
+    _uruchom(test)
+
+
+def test_zamkniecie_konczy_watek():
+    """zamknij() kończy wątek bazy, także gdy zamknięcie RachunekManager zgłosi błąd"""
+    async def test():
+        with tempfile.TemporaryDirectory() as katalog:
+            async with RachunekManagerAsync(os.path.join(katalog, "async.db")) as manager:
+                await manager.pobierz_liste_rachunkow()
+            assert not manager._watek.is_alive()
+            try:
+                await manager.pobierz_liste_rachunkow()
+            except RuntimeError:
+                pass
+            else:
+                raise AssertionError("Wywołanie po zamknięciu nie zgłosiło błędu")
+
+            manager = RachunekManagerAsync(os.path.join(katalog, "async.db"))
+
+            def blad_zamkniecia(rachunek_manager):
+                zamknij = rachunek_manager.zamknij
+
+                def zamknij_z_bledem():
+                    zamknij()
+                    raise OSError("Błąd zamykania")
+                rachunek_manager.zamknij = zamknij_z_bledem
+
+            await manager.wykonaj(blad_zamkniecia)
+            try:
+                await manager.zamknij()
+            except OSError:
+                pass
+            else:
+                raise AssertionError("Błąd zamykania nie został przekazany")
+            assert not manager._watek.is_alive()
+    asyncio.run(test())
+
+
+if __name__ == "__main__":
+    test_laczenie_odczytow()
+    test_zapis_konczy_laczenie()
+    test_anulowanie_odczytu_w_toku()
+    test_anulowanie_w_kolejce()
+    test_anulowanie_przed_rozpoczeciem()
+    test_zamkniecie_konczy_watek()
+    print("[OK] Fasada asynchroniczna działa poprawnie")
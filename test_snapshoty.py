@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test snapshotów danych sprzedawcy
+
+Rachunki wystawione z tymi samymi danymi sprzedawcy wskazują jeden wiersz
+sprzedawca_snapshot (rozpoznawany po skrócie treści), a zmiana danych
+tworzy nowy snapshot bez zmiany wcześniejszych rachunków.
+"""
+
+import os
+import tempfile
+from datetime import date
+from database import DatabaseManager
+from migracje import skrot_sprzedawcy, POLA_SPRZEDAWCY
+from benchmark_bazy import przykladowy_rachunek, SPRZEDAWCA
+from test_migracje import _rachunki_bazowe, _utworz_baze_bazowa
+
+PRZEPROWADZKA = dict(SPRZEDAWCA, ulica='Nowa', nr_domu='5')
+INNY_SPRZEDAWCA = dict(SPRZEDAWCA, imie='Anna', nazwisko='Kowalska')
+
+
+def _snapshoty(db: DatabaseManager) -> dict:
+    """Zwraca snapshoty sprzedawcy jako słownik skrót -> (id, dane)"""
+    wiersze = db._polaczenie().execute(f'''
+        SELECT skrot, id, {', '.join(POLA_SPRZEDAWCY)} FROM sprzedawca_snapshot
+    ''').fetchall()
+    return {skrot: (snapshot_id, dict(zip(POLA_SPRZEDAWCY, pola))) for skrot, snapshot_id, *pola in wiersze}
+
+
+def _skrot(sprzedawca: dict) -> str:
+    """Skrót danych sprzedawcy w kolejności POLA_SPRZEDAWCY"""
+    return skrot_sprzedawcy(*(sprzedawca[pole] for pole in POLA_SPRZEDAWCY))
+
+
+def _wystaw(db: DatabaseManager, i: int, sprzedawca: dict) -> int:
+    """Wystawia rachunek z podanymi danymi sprzedawcy i zwraca ID snapshotu, który wskazuje"""
+    dane = przykladowy_rachunek(i, date(2025, 5, 1))
+    del dane['numer_rachunku']
+    dane['sprzedawca'] = sprzedawca
+    rachunek_id, _ = db.zapisz_rachunek_z_numerem(dane)
+    return db._polaczenie().execute(
+        "SELECT sprzedawca_id FROM rachunki WHERE id = ?", (rachunek_id,)
+    ).fetchone()[0]
+
+
+def _sprawdz_dane_sprzedawcy(db: DatabaseManager) -> None:
+    """Każdy rachunek wskazuje snapshot, którego skrót zgadza się z danymi sprzedawcy rachunku"""
+    snapshoty = _snapshoty(db)
+    for skrot, (_, dane) in snapshoty.items():
+        assert _skrot(dane) == skrot, f"Skrót snapshotu nie odpowiada danym: {dane}"
+    for (rachunek_id,) in db._polaczenie().execute("SELECT id FROM rachunki").fetchall():
+        szczegoly = db.pobierz_rachunek_szczegoly(rachunek_id)
+        sprzedawca = {pole: szczegoly[f"sprzedawca_{pole}"] for pole in POLA_SPRZEDAWCY}
+        assert snapshoty[_skrot(sprzedawca)][0] == szczegoly['sprzedawca_id']
+
+
+def test_snapshoty_po_skrocie():
+    """Te same dane sprzedawcy dają jeden snapshot, zmienione dane nowy, a powrót do starych ponownie używa pierwszego"""
+    with tempfile.TemporaryDirectory() as katalog:
+        db = DatabaseManager(os.path.join(katalog, "snapshoty.db"))
+
+        pierwszy = {_wystaw(db, i, dict(SPRZEDAWCA)) for i in range(3)}
+        assert len(pierwszy) == 1
+        snapshoty = _snapshoty(db)
+        assert list(snapshoty) == [_skrot(SPRZEDAWCA)]
+        assert snapshoty[_skrot(SPRZEDAWCA)] == (*pierwszy, {pole: SPRZEDAWCA[pole] for pole in POLA_SPRZEDAWCY})
+
+        # Zmiana adresu tworzy nowy snapshot, wcześniejsze rachunki zachowują stary adres
+        drugi = _wystaw(db, 3, PRZEPROWADZKA)
+        assert drugi not in pierwszy and len(_snapshoty(db)) == 2
+        assert db.pobierz_rachunek_szczegoly(1)['sprzedawca_ulica'] == SPRZEDAWCA['ulica']
+        assert db.pobierz_rachunek_szczegoly(4)['sprzedawca_ulica'] == PRZEPROWADZKA['ulica']
+
+        # Powrót do poprzednich danych wskazuje pierwszy snapshot
+        assert {_wystaw(db, 4, dict(SPRZEDAWCA))} == pierwszy
+        assert len(_snapshoty(db)) == 2
+
+        # Zapis zbiorczy z przeplatanymi sprzedawcami korzysta z tych samych snapshotów
+        rachunki = []
+        for i in range(12):
+            rachunek = przykladowy_rachunek(100 + i, date(2025, 6, 1))
+            rachunek['sprzedawca'] = (SPRZEDAWCA, PRZEPROWADZKA, INNY_SPRZEDAWCA)[i % 3]
+            rachunki.append(rachunek)
+        db.zapisz_rachunki_batch(rachunki)
+        snapshoty = _snapshoty(db)
+        assert set(snapshoty) == {_skrot(SPRZEDAWCA), _skrot(PRZEPROWADZKA), _skrot(INNY_SPRZEDAWCA)}
+        assert snapshoty[_skrot(SPRZEDAWCA)][0] in pierwszy
+        assert snapshoty[_skrot(PRZEPROWADZKA)][0] == drugi
+        _sprawdz_dane_sprzedawcy(db)
+        db.zamknij()
+
+
+def test_migracja_do_snapshotow():
+    """Migracja starej bazy tworzy jeden snapshot na każde różne dane sprzedawcy"""
+    rachunki = _rachunki_bazowe()
+    for rachunek in rachunki[len(rachunki) // 2:]:
+        rachunek['sprzedawca'] = PRZEPROWADZKA
+    # Dane sprzedawcy występujące tylko w usuniętym rachunku
+    usuniety = dict(przykladowy_rachunek(len(rachunki)), sprzedawca=INNY_SPRZEDAWCA,
+                    original_id=len(rachunki) + 1, numer_rachunku="99/12/2023",
+                    data_usuniecia="2024-01-02 12:00:00", powod_usuniecia="Test")
+
+    with tempfile.TemporaryDirectory() as katalog:
+        db_path = os.path.join(katalog, "bazowa.db")
+        _utworz_baze_bazowa(db_path, rachunki, [usuniety])
+        db = DatabaseManager(db_path)
+
+        snapshoty = _snapshoty(db)
+        assert set(snapshoty) == {_skrot(SPRZEDAWCA), _skrot(PRZEPROWADZKA), _skrot(INNY_SPRZEDAWCA)}
+        _sprawdz_dane_sprzedawcy(db)
+        for rachunek_id, rachunek in enumerate(rachunki, start=1):
+            szczegoly = db.pobierz_rachunek_szczegoly(rachunek_id)
+            for pole in POLA_SPRZEDAWCY:
+                assert szczegoly[f"sprzedawca_{pole}"] == rachunek['sprzedawca'][pole]
+
+        # Widok usuniętych rachunków podaje dane sprzedawcy ze snapshotu
+        wiersz = db._polaczenie().execute(f'''
+            SELECT {', '.join(f"sprzedawca_{pole}" for pole in POLA_SPRZEDAWCY)}
+            FROM usunięte_rachunki WHERE numer_rachunku = ?
+        ''', (usuniety['numer_rachunku'],)).fetchone()
+        assert wiersz == tuple(INNY_SPRZEDAWCA[pole] for pole in POLA_SPRZEDAWCY)
+
+        # Nowy rachunek z danymi sprzedawcy ze starej bazy nie tworzy kolejnego snapshotu
+        assert _wystaw(db, 0, dict(PRZEPROWADZKA)) == snapshoty[_skrot(PRZEPROWADZKA)][0]
+        assert len(_snapshoty(db)) == 3
+        db.zamknij()
+
+
+if __name__ == "__main__":
+    test_snapshoty_po_skrocie()
+    test_migracja_do_snapshotow()
+    print("[OK] Snapshoty danych sprzedawcy są współdzielone po skrócie")
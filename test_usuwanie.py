@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test usuwania rachunków przez flagę deleted_at
+
+Rachunek usunięty znika ze wszystkich list i wyszukiwania, a pojawia się
+tylko w widoku usunięte_rachunki. Przywrócenie cofa ten stan, a trwałe
+usunięcie usuwa rachunek z obu miejsc.
+"""
+
+import os
+import tempfile
+from datetime import date
+from database import DatabaseManager
+from benchmark_bazy import przykladowy_rachunek
+
+LICZBA_RACHUNKOW = 20
+ROZMIAR_STRONY = 6
+POWOD = "Błędne dane nabywcy"
+
+
+def _baza(katalog: str) -> DatabaseManager:
+    """Tworzy bazę z rachunkami ze stycznia i lutego 2025"""
+    db = DatabaseManager(os.path.join(katalog, "usuwanie.db"))
+    db.zapisz_rachunki_batch([przykladowy_rachunek(i * 3, date(2025, 1, 1))
+                              for i in range(LICZBA_RACHUNKOW)])
+    return db
+
+
+def _widocznosc(db: DatabaseManager, rachunek_id: int) -> dict:
+    """Zwraca, na których listach i w jakich wynikach widać rachunek"""
+    szczegoly = db.pobierz_rachunek_szczegoly(rachunek_id)
+    if szczegoly is None:
+        return {}
+
+    strony, kursor = [], None
+    while True:
+        strona = db.pobierz_strone_rachunkow(kursor, ROZMIAR_STRONY)
+        strony.extend(strona['rachunki'])
+        kursor = strona['kursor']
+        if kursor is None:
+            break
+
+    data = date.fromisoformat(szczegoly['data_wystawienia'])
+    listy = {
+        'lista': db.pobierz_wszystkie_rachunki(),
+        'strony': strony,
+        'szukaj': db.szukaj_rachunki(szczegoly['numer_rachunku']),
+        'miesiac': db.pobierz_rachunki_miesiac(data.month, data.year),
+        'klient': db.pobierz_rachunki_klienta(szczegoly['klient_id']),
+        'usuniete': db.pobierz_usunięte_rachunki(),
+    }
+    return {nazwa: any(rachunek['id'] == rachunek_id for rachunek in lista)
+            for nazwa, lista in listy.items()}
+
+
+def test_widocznosc_usunietego_rachunku():
+    """Usunięty rachunek jest widoczny tylko na liście usuniętych, do przywrócenia"""
+    with tempfile.TemporaryDirectory() as katalog:
+        db = _baza(katalog)
+        rachunek = db.pobierz_wszystkie_rachunki()[LICZBA_RACHUNKOW // 2]
+        aktywny = {'lista': True, 'strony': True, 'szukaj': True,
+                   'miesiac': True, 'klient': True, 'usuniete': False}
+        usuniety = {nazwa: nazwa == 'usuniete' for nazwa in aktywny}
+        assert _widocznosc(db, rachunek['id']) == aktywny
+
+        assert db.usun_rachunki([rachunek['id']], POWOD) == {rachunek['id']: True}
+        assert _widocznosc(db, rachunek['id']) == usuniety
+        wpis, = db.pobierz_usunięte_rachunki()
+        assert (wpis['original_id'], wpis['numer_rachunku'], wpis['kwota']) == \
+            (rachunek['id'], rachunek['numer_rachunku'], rachunek['kwota'])
+        assert wpis['powod_usuniecia'] == POWOD and wpis['data_usuniecia']
+        assert len(db.pobierz_wszystkie_rachunki()) == LICZBA_RACHUNKOW - 1
+
+        # Ponowne usunięcie nic nie zmienia
+        assert db.usun_rachunki([rachunek['id']], "inny powód") == {rachunek['id']: False}
+        assert db.pobierz_usunięte_rachunki()[0]['powod_usuniecia'] == POWOD
+
+        assert db.przywroc_rachunki([rachunek['id']]) == {rachunek['id']: True}
+        assert _widocznosc(db, rachunek['id']) == aktywny
+        assert db.pobierz_rachunek_szczegoly(rachunek['id'])['powod_usuniecia'] is None
+
+        # Trwale usunąć można tylko rachunek oznaczony jako usunięty
+        assert db.trwale_usun_rachunki([rachunek['id']]) == {rachunek['id']: False}
+        assert _widocznosc(db, rachunek['id']) == aktywny
+        db.usun_rachunki([rachunek['id']], POWOD)
+        assert db.trwale_usun_rachunki([rachunek['id']]) == {rachunek['id']: True}
+        assert _widocznosc(db, rachunek['id']) == {}
+        assert db.pobierz_usunięte_rachunki() == []
+        assert len(db.pobierz_wszystkie_rachunki()) == LICZBA_RACHUNKOW - 1
+        db.zamknij()
+
+
+def test_przywrocenie_zajetego_numeru():
+    """Rachunek, którego numer wystawiono ponownie, zostaje na liście usuniętych"""
+    with tempfile.TemporaryDirectory() as katalog:
+        db = _baza(katalog)
+        pierwszy, drugi = [rachunek['id'] for rachunek in db.pobierz_wszystkie_rachunki()[:2]]
+        szczegoly = db.pobierz_rachunek_szczegoly(pierwszy)
+        db.usun_rachunki([pierwszy, drugi], POWOD)
+
+        dane = przykladowy_rachunek(LICZBA_RACHUNKOW * 3)
+        dane['numer_rachunku'] = szczegoly['numer_rachunku']
+        nowy = db.zapisz_rachunek(dane)
+
+        assert db.przywroc_rachunki([pierwszy, drugi]) == {pierwszy: False, drugi: True}
+        assert [wpis['id'] for wpis in db.pobierz_usunięte_rachunki()] == [pierwszy]
+        assert _widocznosc(db, nowy)['lista'] and _widocznosc(db, drugi)['lista']
+        db.zamknij()
+
+
+if __name__ == "__main__":
+    test_widocznosc_usunietego_rachunku()
+    test_przywrocenie_zajetego_numeru()
+    print("[OK] Usuwanie i przywracanie rachunków działa poprawnie")
@@ -8,6 +8,7 @@ import re
 from datetime import datetime
 from typing import Dict, List, Optional
 import config
+from pieniadze import Kwota
 
 class WalidatorDanych:
     """Klasa odpowiedzialna za walidację danych rachunku"""
@@ -274,21 +275,39 @@ class WalidatorDanych:
         return data_str
     
     @staticmethod
-    def normalizuj_kwote(kwota_str: str) -> float:
+    def normalizuj_kwote(kwota_str: str) -> Kwota:
         """
-        Normalizuje kwotę do formatu float
+        Normalizuje kwotę do dokładnej kwoty w groszach
         
         Args:
             kwota_str: Kwota w formacie string
             
         Returns:
-            Kwota jako liczba float
+            Kwota (formatowana jak float, np. f"{kwota:.2f}")
         """
-        kwota_clean = kwota_str.strip().replace(',', '.').replace(' ', '')
-        return float(kwota_clean)
+        return Kwota.z_zlotych(kwota_str)
+    
+    @staticmethod
+    def normalizuj_klucz_klienta(imie: str, nazwisko: str) -> str:
+        """
+        Tworzy klucz tożsamości klienta z imienia i nazwiska
+        
+        Klucz nie zależy od wielkości liter ani nadmiarowych spacji, więc
+        "Jan  Kowalski" i "JAN KOWALSKI" to ten sam klient.
+        
+        Args:
+            imie: Imię nabywcy
+            nazwisko: Nazwisko nabywcy
+            
+        Returns:
+            Klucz klienta w formacie "imie|nazwisko"
+        """
+        imie = ' '.join((imie or '').split()).casefold()
+        nazwisko = ' '.join((nazwisko or '').split()).casefold()
+        return f"{imie}|{nazwisko}"
     
     @staticmethod
-    def waliduj_limit_miesięczny(nowa_kwota: float, obecne_przychody: float, 
+    def waliduj_limit_miesięczny(nowa_kwota: Kwota, obecne_przychody: Kwota, 
                                  data_rachunku: str = None) -> List[str]:
         """
         Waliduje czy dodanie nowej kwoty nie przekroczy limitu miesięcznego
@@ -320,8 +339,11 @@ class WalidatorDanych:
                 pass
         
         # Na razie tylko limit na 2025, można rozszerzyć dla innych lat
-        limit_miesięczny = config.MONTHLY_REVENUE_LIMIT_2025 if rok_rachunku == 2025 else 3499.50
+        limit_miesięczny = Kwota.z_zlotych(
+            config.MONTHLY_REVENUE_LIMIT_2025 if rok_rachunku == 2025 else 3499.50
+        )
         
+        # Porównania w groszach - bez błędów zaokrągleń float
         suma_po_dodaniu = obecne_przychody + nowa_kwota
         
         if suma_po_dodaniu > limit_miesięczny:
@@ -334,7 +356,7 @@ class WalidatorDanych:
                 f"Limit miesięczny: {limit_miesięczny:.2f} PLN. "
                 f"Przekroczenie o: {przekroczenie:.2f} PLN."
             )
-        elif suma_po_dodaniu > limit_miesięczny * 0.8:  # Ostrzeżenie przy 80% limitu
+        elif suma_po_dodaniu.grosze * 10 > limit_miesięczny.grosze * 8:  # Ostrzeżenie przy 80% limitu
             pozostalo = limit_miesięczny - suma_po_dodaniu
             bledy.append(
                 f"OSTRZEŻENIE: Zbliżasz się do limitu miesięcznego! "
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Moduł z lekkimi typami wierszy zwracanych przez listy rachunków
+
+Wiersze są tworzone przez row_factory kursora SQLite, mają __slots__
+zamiast słownika atrybutów, a pola pochodne (np. nazwa nabywcy) są
+wyliczane dopiero przy pierwszym odczycie. Dostęp przez wiersz['pole']
+działa jak dla dotychczasowych słowników.
+"""
+
+import sqlite3
+from typing import Any, Iterator, Tuple
+
+
+class Wiersz:
+    """Bazowy wiersz tylko do odczytu z dostępem zgodnym ze słownikiem"""
+
+    __slots__ = ()
+
+    # Klucze dostępne przez wiersz['klucz'], w kolejności dawnych słowników
+    POLA: Tuple[str, ...] = ()
+
+    @classmethod
+    def fabryka(cls, cursor: sqlite3.Cursor, row: tuple) -> 'Wiersz':
+        """row_factory tworzące wiersz z kolumn zapytania, w kolejności __slots__"""
+        return cls(*row)
+
+    def __getitem__(self, klucz: str) -> Any:
+        if klucz not in self.POLA:
+            raise KeyError(klucz)
+        return getattr(self, klucz)
+
+    def get(self, klucz: str, domyslna: Any = None) -> Any:
+        """Odpowiednik dict.get"""
+        return getattr(self, klucz) if klucz in self.POLA else domyslna
+
+    def keys(self) -> Tuple[str, ...]:
+        """Odpowiednik dict.keys - pozwala na dict(wiersz)"""
+        return self.POLA
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        """Odpowiednik dict.items"""
+        return ((klucz, getattr(self, klucz)) for klucz in self.POLA)
+
+    def __contains__(self, klucz: str) -> bool:
+        return klucz in self.POLA
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.POLA)
+
+    def __eq__(self, inny) -> bool:
+        if isinstance(inny, (Wiersz, dict)):
+            return dict(self) == dict(inny)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self)!r})"
+
+
+class WierszRachunku(Wiersz):
+    """Rachunek na liście (lista, wyszukiwanie, rachunki miesiąca)"""
+
+    __slots__ = ('id', 'numer_rachunku', 'data_wystawienia', 'nabywca_imie',
+                 'nabywca_nazwisko', 'kwota_gr', 'plik_pdf', '_nabywca')
+
+    POLA = ('id', 'numer_rachunku', 'data_wystawienia', 'nabywca', 'kwota', 'plik_pdf')
+
+    # Kolumny zapytania w kolejności argumentów konstruktora
+    KOLUMNY = ('id', 'numer_rachunku', 'data_wystawienia', 'nabywca_imie',
+               'nabywca_nazwisko', 'kwota_do_zaplaty_gr', 'plik_pdf')
+
+    def __init__(self, id, numer_rachunku, data_wystawienia, nabywca_imie,
+                 nabywca_nazwisko, kwota_gr, plik_pdf):
+        self.id = id
+        self.numer_rachunku = numer_rachunku
+        self.data_wystawienia = data_wystawienia
+        self.nabywca_imie = nabywca_imie
+        self.nabywca_nazwisko = nabywca_nazwisko
+        self.kwota_gr = kwota_gr
+        self.plik_pdf = plik_pdf
+        self._nabywca = None
+
+    @property
+    def nabywca(self) -> str:
+        """Imię i nazwisko nabywcy, składane przy pierwszym odczycie"""
+        if self._nabywca is None:
+            self._nabywca = f"{self.nabywca_imie} {self.nabywca_nazwisko}"
+        return self._nabywca
+
+    @property
+    def kwota(self) -> float:
+        """Kwota do zapłaty w złotych"""
+        return self.kwota_gr / 100
+
+
+class WierszUsunietegoRachunku(Wiersz):
+    """Rachunek na liście usuniętych"""
+
+    __slots__ = ('id', 'original_id', 'numer_rachunku', 'data_wystawienia', 'nabywca_imie',
+                 'nabywca_nazwisko', 'kwota_gr', 'data_usuniecia', '_powod_usuniecia', '_nabywca')
+
+    POLA = ('id', 'original_id', 'numer_rachunku', 'data_wystawienia', 'nabywca',
+            'kwota', 'data_usuniecia', 'powod_usuniecia')
+
+    KOLUMNY = ('id', 'original_id', 'numer_rachunku', 'data_wystawienia', 'nabywca_imie',
+               'nabywca_nazwisko', 'kwota_do_zaplaty_gr', 'data_usuniecia', 'powod_usuniecia')
+
+    def __init__(self, id, original_id, numer_rachunku, data_wystawienia, nabywca_imie,
+                 nabywca_nazwisko, kwota_gr, data_usuniecia, powod_usuniecia):
+        self.id = id
+        self.original_id = original_id
+        self.numer_rachunku = numer_rachunku
+        self.data_wystawienia = data_wystawienia
+        self.nabywca_imie = nabywca_imie
+        self.nabywca_nazwisko = nabywca_nazwisko
+        self.kwota_gr = kwota_gr
+        self.data_usuniecia = data_usuniecia
+        self._powod_usuniecia = powod_usuniecia
+        self._nabywca = None
+
+    @property
+    def nabywca(self) -> str:
+        """Imię i nazwisko nabywcy, składane przy pierwszym odczycie"""
+        if self._nabywca is None:
+            self._nabywca = f"{self.nabywca_imie} {self.nabywca_nazwisko}"
+        return self._nabywca
+
+    @property
+    def kwota(self) -> float:
+        """Kwota do zapłaty w złotych"""
+        return self.kwota_gr / 100
+
+    @property
+    def powod_usuniecia(self) -> str:
+        """Powód usunięcia lub 'Brak powodu'"""
+        return self._powod_usuniecia or 'Brak powodu'
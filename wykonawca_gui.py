@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Moduł wykonujący zapytania do bazy danych w tle dla interfejsu graficznego
+
+Zlecone funkcje (zwykle metody RachunekManager) są wykonywane w osobnym
+wątku roboczym. DatabaseManager przydziela połączenie na wątek, więc wątek
+roboczy czyta przez własne połączenie i nie blokuje wątku Tk. Wyniki są
+odbierane w wątku Tk przez cykliczne root.after, bo widgetów Tk nie wolno
+zmieniać z innych wątków.
+"""
+
+import queue
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+log = logging.getLogger('rachunki.gui')
+
+
+class Zadanie:
+    """Pojedyncze zlecenie wykonania funkcji w wątku roboczym"""
+
+    def __init__(self, klucz: str, funkcja: Callable, args: tuple, kwargs: Dict,
+                 po_wyniku: Optional[Callable[[Any], None]],
+                 po_bledzie: Optional[Callable[[Exception], None]]):
+        self.klucz = klucz
+        self.funkcja = funkcja
+        self.args = args
+        self.kwargs = kwargs
+        self.po_wyniku = po_wyniku
+        self.po_bledzie = po_bledzie
+        self.anulowane = False
+
+
+class WykonawcaGUI:
+    """Wykonuje zadania w wątku roboczym i oddaje wyniki do wątku Tk"""
+
+    # Co ile milisekund wątek Tk sprawdza gotowe wyniki
+    INTERWAL_MS = 50
+
+    def __init__(self, root, wskaznik: Optional[Callable[[bool], None]] = None):
+        """
+        Inicjalizacja wykonawcy
+
+        Args:
+            root: Główne okno Tk (używane do root.after)
+            wskaznik: Funkcja wywoływana z True, gdy zaczyna się praca w tle,
+                i z False, gdy wszystkie zadania się zakończą
+        """
+        self.root = root
+        self.wskaznik = wskaznik
+        self._zadania = queue.Queue()
+        self._wyniki = queue.Queue()
+        self._aktualne = {}
+        self._oczekujace = set()
+        self._watek = None
+        self._odbior = None
+
+    @property
+    def zajety(self) -> bool:
+        """Czy są zadania, na których wynik czeka interfejs"""
+        return bool(self._oczekujace)
+
+    def zlec(self, klucz: str, funkcja: Callable, *args,
+             po_wyniku: Optional[Callable[[Any], None]] = None,
+             po_bledzie: Optional[Callable[[Exception], None]] = None,
+             **kwargs) -> Zadanie:
+        """
+        Zleca wykonanie funkcji w wątku roboczym
+
+        Nowe zadanie z tym samym kluczem zastępuje poprzednie: jeśli poprzednie
+        jeszcze nie ruszyło, nie zostanie wykonane, a jeśli trwa, jego wynik
+        zostanie pominięty (np. starsze wyszukiwanie po wpisaniu kolejnej litery).
+
+        Args:
+            klucz: Rodzaj zadania, np. 'wyszukiwanie' lub 'raport_roczny'
+            funkcja: Funkcja do wykonania w tle
+            *args: Argumenty pozycyjne funkcji
+            po_wyniku: Funkcja wywoływana w wątku Tk z wynikiem
+            po_bledzie: Funkcja wywoływana w wątku Tk z wyjątkiem
+            **kwargs: Argumenty nazwane funkcji
+
+        Returns:
+            Zlecone zadanie
+        """
+        byl_zajety = self.zajety
+        poprzednie = self._aktualne.get(klucz)
+        if poprzednie is not None:
+            poprzednie.anulowane = True
+            self._oczekujace.discard(poprzednie)
+
+        zadanie = Zadanie(klucz, funkcja, args, kwargs, po_wyniku, po_bledzie)
+        self._aktualne[klucz] = zadanie
+        self._oczekujace.add(zadanie)
+
+        if self._watek is None:
+            self._watek = threading.Thread(target=self._petla, name="WykonawcaGUI", daemon=True)
+            self._watek.start()
+        self._zadania.put(zadanie)
+
+        if not byl_zajety:
+            self._ustaw_wskaznik(True)
+        if self._odbior is None:
+            self._odbior = self.root.after(self.INTERWAL_MS, self._odbierz)
+        return zadanie
+
+    def anuluj(self, klucz: str) -> None:
+        """
+        Anuluje bieżące zadanie o podanym kluczu
+
+        Args:
+            klucz: Rodzaj zadania
+        """
+        zadanie = self._aktualne.pop(klucz, None)
+        if zadanie is None:
+            return
+        zadanie.anulowane = True
+        self._oczekujace.discard(zadanie)
+        if not self._oczekujace:
+            self._ustaw_wskaznik(False)
+
+    def zamknij(self, timeout: float = 2.0) -> None:
+        """
+        Anuluje zadania i zatrzymuje wątek roboczy
+
+        Args:
+            timeout: Maksymalny czas oczekiwania na bieżące zadanie w sekundach
+        """
+        for klucz in list(self._aktualne):
+            self.anuluj(klucz)
+        if self._odbior is not None:
+            self.root.after_cancel(self._odbior)
+            self._odbior = None
+        if self._watek is not None:
+            self._zadania.put(None)
+            self._watek.join(timeout)
+            self._watek = None
+
+    def _petla(self) -> None:
+        """Pętla wątku roboczego"""
+        while True:
+            zadanie = self._zadania.get()
+            if zadanie is None:
+                return
+            if zadanie.anulowane:
+                continue
+            try:
+                wynik = zadanie.funkcja(*zadanie.args, **zadanie.kwargs)
+            except Exception as e:
+                self._wyniki.put((zadanie, None, e))
+            else:
+                self._wyniki.put((zadanie, wynik, None))
+
+    def _odbierz(self) -> None:
+        """Przekazuje gotowe wyniki do funkcji zwrotnych (wątek Tk)"""
+        self._odbior = None
+        try:
+            while True:
+                try:
+                    zadanie, wynik, blad = self._wyniki.get_nowait()
+                except queue.Empty:
+                    break
+                if not zadanie.anulowane:
+                    self._zakoncz(zadanie, wynik, blad)
+        finally:
+            # Wyjątek w funkcji zwrotnej nie może zatrzymać odbioru kolejnych wyników
+            if self._oczekujace and self._odbior is None:
+                self._odbior = self.root.after(self.INTERWAL_MS, self._odbierz)
+
+    def _zakoncz(self, zadanie: Zadanie, wynik: Any, blad: Optional[Exception]) -> None:
+        """Zdejmuje zadanie z oczekujących i wywołuje jego funkcję zwrotną"""
+        del self._aktualne[zadanie.klucz]
+        self._oczekujace.discard(zadanie)
+        if not self._oczekujace:
+            self._ustaw_wskaznik(False)
+
+        if blad is None:
+            if zadanie.po_wyniku:
+                zadanie.po_wyniku(wynik)
+        elif zadanie.po_bledzie:
+            zadanie.po_bledzie(blad)
+        else:
+            # Zadanie bez obsługi błędu - wyjątek trafia do dziennika zamiast przepaść
+            log.error("Błąd zadania %s w tle", zadanie.klucz, exc_info=blad)
+
+    def _ustaw_wskaznik(self, zajety: bool) -> None:
+        """Włącza lub wyłącza wskaźnik pracy w tle"""
+        if self.wskaznik:
+            self.wskaznik(zajety)